@@ -3,23 +3,46 @@
 import os
 import socket
 import struct
-import select
 import time
 import platform
 import zlib
 import threading
 import logging
 import functools
+import itertools
 import errno
 import ipaddress
+import ctypes
+import collections.abc
 
 from . import errors
+from . import mmsg
+from .aio import async_ping, async_ping_many
+from .cache import TTLCache, DnsCache
+from .flood import TokenBucket, flood
+from .pool import ping_pool
+from .stats import PingStats
+from .stream import StreamReply, stream
+from .sweep import Sweep, sweep
+from .traceroute import TracerouteHop, traceroute
+from .reactor import Reactor, get_reactor
+from .result import PingStatus, PingResult, PingResults
+from .recorder import RttRecord, RttRecorder, RttLog
+from .rtt import RttEstimator
 from .enums import ICMP_DEFAULT_CODE, IcmpV4Type, IcmpV4DestinationUnreachableCode, IcmpTimeExceededCode, IcmpV6Type, IcmpV6DestinationUnreachableCode
 
-__version__ = "5.1.6"
+__version__ = "5.2.0"
 DEBUG = False  # DEBUG: Show debug info for developers. (default False)
 EXCEPTIONS = False  # EXCEPTIONS: Raise exception when delay is not available.
 LOGGER = None  # LOGGER: Record logs into console or file. Logger object should have .debug() method.
+TIMESTAMPING = False  # TIMESTAMPING: Measure delays from a send stamp matched by ICMP sequence to the kernel receive timestamp (SO_TIMESTAMPNS, Linux only) or the monotonic clock, instead of the time echoed in the payload. Delays are returned as `ping3.Delay`. (default False)
+BPF_FILTER = False  # BPF_FILTER: LINUX ONLY. Attach a classic BPF program (SO_ATTACH_FILTER) to raw sockets, so the kernel drops ICMP packets of other processes and ping3 only wakes up for its own replies. (default False)
+MMSG = False  # MMSG: LINUX ONLY. Send and receive the packets of `ping_many()` in batches by sendmmsg/recvmmsg, instead of a syscall per packet. Falls back to a syscall per packet if not supported or with TIMESTAMPING. (default False)
+TRACER = None  # TRACER: A callable which receives every debug message as a str, works with or without DEBUG. Ex. `ping3.TRACER = print`. (default None)
+DNS_CACHE = None  # DNS_CACHE: Cache resolved destination addresses. Assign a `ping3.DnsCache()` to enable. (default None)
+ADAPTIVE_TIMEOUT = None  # ADAPTIVE_TIMEOUT: Wait for each destination by a timeout adapted to its round-trip times, bounded by the given timeout. Assign a `ping3.RttEstimator()` to enable. (default None)
+PING_RESULT = False  # PING_RESULT: Return a `ping3.PingResult` with the reply TTL, source address, size and status from `ping()` and `Pinger.ping()`, instead of the delay, None or False. (default False)
+SRC_ADDR_CACHE = TTLCache(ttl=60, maxsize=1024)  # SRC_ADDR_CACHE: Cache the source address selected by the OS for each IPv6 destination, used in the ICMPv6 checksum. None to disable.
 
 # !=Network Byte Order(Big-Endian), B=Bytes (8), I=Integer (32), H=Unsigned short (16), B=Unsigned char (8)
 IPV4_HEADER_FORMAT = "!BBHHHBBHII"  # B: Version (4) + IHL (4). B: TOS (8). H: Total Length (16). H: ID (16). B: Flags (3) + Fragment Offset (13). B: TTL (8). B: Protocol (8). H: Header Checksum (16). I: Source Address (32). I: Destination Address (32)
@@ -28,33 +51,65 @@ ICMP_HEADER_FORMAT = "!BBHHH"  # According to netinet/ip_icmp.h. B: Type (8). B:
 ICMP_TIME_FORMAT = "!d"  # d=double
 ICMPV6_PSEUDO_HEADER_FORMAT = "!16s16sIBBBB"  # 16s: Source Address (128), 16s: Destination Address (128), I: ICMPv6 Length (32), B: Zeros (24), B: Next Header (8)
 SOCKET_SO_BINDTODEVICE = 25  # socket.SO_BINDTODEVICE
+SOCKET_SO_TIMESTAMPNS = 35  # socket.SO_TIMESTAMPNS, Linux only. Also the type of the ancillary data (SCM_TIMESTAMPNS).
+SOCKET_SO_ATTACH_FILTER = 26  # socket.SO_ATTACH_FILTER, Linux only.
+BPF_INSTRUCTION_FORMAT = "@HBBI"  # struct sock_filter in native byte order. H: Code (16). B: Jump if true (8). B: Jump if false (8). I: Constant (32).
+BPF_PROGRAM_FORMAT = "@HP"  # struct sock_fprog in native byte order. H: Number of instructions (16). P: Pointer to the instructions.
+TIMESPEC_FORMAT = "@ll"  # struct timespec in native byte order. l: Seconds. l: Nanoseconds.
+DEFAULT_TIMEOUT = 4  # Seconds to wait for a response by `ping()` if no timeout is given, same as Windows CMD.
+RECEIVE_BUFFER_SIZE = 1500  # Single packet size limit is 65535 bytes, but usually the network packet limit is 1500 bytes.
+MMSG_BATCH_SIZE = 64  # Max packets sent or received by one sendmmsg/recvmmsg syscall if `MMSG` is True.
+BATCH_RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024  # Socket receive buffer size in bytes for batch pings, so that replies of many in-flight pings are not dropped. Capped by the OS, ex. `net.core.rmem_max` on Linux.
+
+
+IPV4_HEADER_STRUCT = struct.Struct(IPV4_HEADER_FORMAT)  # Precompiled formats, for `unpack_from()` at fixed offsets of the receive buffer.
+IPV6_HEADER_STRUCT = struct.Struct(IPV6_HEADER_FORMAT)
+ICMP_HEADER_STRUCT = struct.Struct(ICMP_HEADER_FORMAT)
+ICMP_TIME_STRUCT = struct.Struct(ICMP_TIME_FORMAT)
+TIMESPEC_STRUCT = struct.Struct(TIMESPEC_FORMAT)
+BPF_INSTRUCTION_STRUCT = struct.Struct(BPF_INSTRUCTION_FORMAT)
+TIMESTAMP_ANCILLARY_SIZE = socket.CMSG_SPACE(TIMESPEC_STRUCT.size) if hasattr(socket, "CMSG_SPACE") else 0  # Buffer size for the ancillary data of `recvmsg_into()`. Not available on Windows.
+_local = threading.local()  # Per-thread state, ex. the receive buffer.
+_SOCKET_FAMILY = socket.SocketType.family  # Members of the C socket, read by `__get__(sock)` as ints. `sock.family` and `sock.type` convert them to enums, which is several times slower for every packet.
+_SOCKET_TYPE = socket.SocketType.type
+_time_ns = getattr(time, "time_ns", lambda: int(time.time() * 1e9))  # time.time_ns() is new in Python 3.7.
+
+
+def _get_logger() -> logging.Logger:
+    """Get the default logger which prints debug info to stderr.
+
+    Returns:
+        logging.Logger: The logger of ping3.
+    """
+    logger = logging.getLogger(__name__)
+    logger.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("[%(levelname)s] %(message)s")
+    cout_handler = logging.StreamHandler()
+    cout_handler.setLevel(logging.DEBUG)
+    cout_handler.setFormatter(formatter)
+    logger.addHandler(cout_handler)
+    logger.debug("Ping3 Version: {}".format(__version__))
+    logger.debug("LOGGER: {}".format(logger))
+    return logger
 
 
 def _debug(*args) -> None:
-    """Print debug info to stdout if `ping3.DEBUG` is True.
+    """Print debug info to stdout if `ping3.DEBUG` is True, and pass it to `ping3.TRACER` if set.
+
+    The message is only formatted when tracing is on. In hot paths, check `DEBUG or TRACER is not None` before building costly arguments.
 
     Args:
         *args (any): Usually are strings or objects that can be converted to str.
     """
-
-    def get_logger():
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.DEBUG)
-        formatter = logging.Formatter("[%(levelname)s] %(message)s")
-        cout_handler = logging.StreamHandler()
-        cout_handler.setLevel(logging.DEBUG)
-        cout_handler.setFormatter(formatter)
-        logger.addHandler(cout_handler)
-        logger.debug("Ping3 Version: {}".format(__version__))
-        logger.debug("LOGGER: {}".format(logger))
-        return logger
-
-    if not DEBUG:
+    if not DEBUG and TRACER is None:
         return None
-    global LOGGER
-    LOGGER = LOGGER or get_logger()
     message = " ".join(str(item) for item in args)
-    LOGGER.debug(message)
+    if TRACER is not None:
+        TRACER(message)
+    if DEBUG:
+        global LOGGER
+        LOGGER = LOGGER or _get_logger()
+        LOGGER.debug(message)
 
 
 def _raise(err: Exception) -> None:
@@ -82,6 +137,8 @@ def _func_logger(func):
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        if not DEBUG and TRACER is None:  # Arguments are not formatted when tracing is off.
+            return func(*args, **kwargs)
         pargs = ", ".join(str(arg) for arg in args)
         kargs = str(kwargs) if kwargs else ""
         all_args = ", ".join((pargs, kargs)) if (pargs and kargs) else (pargs or kargs)
@@ -102,7 +159,7 @@ def is_ipv4(sock: socket.socket) -> bool:
     Returns:
         bool: True if the socket is IPv4, False otherwise.
     """
-    return sock.family == socket.AF_INET
+    return _SOCKET_FAMILY.__get__(sock) == socket.AF_INET
 
 
 def checksum(source: bytes) -> int:
@@ -111,79 +168,270 @@ def checksum(source: bytes) -> int:
     RFC1071: https://tools.ietf.org/html/rfc1071
     RFC792: https://tools.ietf.org/html/rfc792
 
+    Ones' complement sum of 16-bit words equals the value of all the words modulo 0xFFFF, since 0x10000 = 1 (mod 0xFFFF).
+    So the input is read as one little-endian integer without copies or loops in Python. Even bytes (odd indexes) are the high byte of each word.
+    A non-zero sum is never folded to zero, the ones' complement "negative zero" 0xFFFF is used instead.
+
     Args:
-        source (Bytes): The input to be calculated.
+        source (Bytes): The input to be calculated. Any bytes-like object, ex. bytes/bytearray/memoryview.
 
     Returns:
         int: Calculated checksum.
     """
-    BITS = 16  # 16-bit long
-    carry = 1 << BITS  # 0x10000
-    result = sum(source[::2]) + (sum(source[1::2]) << (BITS // 2))  # Even bytes (odd indexes) shift 1 byte to the left.
-    while result >= carry:  # Ones' complement sum.
-        result = sum(divmod(result, carry))  # Each carry add to right most bit.
-    return ~result & ((1 << BITS) - 1)  # Ensure 16-bit
+    value = int.from_bytes(source, "little")
+    result = value % 0xffff or (0xffff if value else 0)  # Ones' complement sum.
+    return ~result & 0xffff  # Ensure 16-bit
+
+
+class _Header(collections.abc.Mapping):
+    """Base of the lightweight headers, with `__slots__` instead of dict.
+
+    Headers are read-only Mappings for backward compatibility with the dict headers: header["src_addr"], header.get("ttl"), dict(header), header == {...}.
+    """
+    __slots__ = ()
+    _fields = ()  # Keys in the order of the dict headers.
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class IcmpHeader(_Header):
+    """ICMP header. Fields: type, code, checksum, id, seq."""
+    __slots__ = _fields = ("type", "code", "checksum", "id", "seq")
+
+    def __init__(self, *fields):
+        self.type, self.code, self.checksum, self.id, self.seq = fields
+
+
+class IPv4Header(_Header):
+    """IPv4 header. Fields: version, tos, len, id, flags, ttl, protocol, checksum, src_addr, dest_addr. Addresses are stringified on access."""
+    __slots__ = ("version", "tos", "len", "id", "flags", "ttl", "protocol", "checksum", "_src_addr", "_dest_addr")
+    _fields = ("version", "tos", "len", "id", "flags", "ttl", "protocol", "checksum", "src_addr", "dest_addr")
+
+    def __init__(self, *fields):
+        self.version, self.tos, self.len, self.id, self.flags, self.ttl, self.protocol, self.checksum, self._src_addr, self._dest_addr = fields
+
+    @staticmethod
+    def _stringify_ip(ip: int) -> str:
+        return ".".join(str(ip >> offset & 0xFF) for offset in (24, 16, 8, 0))  # str(ipaddress.ip_address(ip))
+
+    @property
+    def src_addr(self) -> str:
+        return self._stringify_ip(self._src_addr)
+
+    @property
+    def dest_addr(self) -> str:
+        return self._stringify_ip(self._dest_addr)
 
 
-def read_icmp_header(raw: bytes) -> dict:
+class IPv6Header(_Header):
+    """IPv6 header. Fields: len, next_header, hop_limit, version, traffic_class, flow_label, src_addr, dest_addr. Addresses are stringified on access."""
+    __slots__ = ("_initial", "len", "next_header", "hop_limit", "_src_addr", "_dest_addr")
+    _fields = ("len", "next_header", "hop_limit", "version", "traffic_class", "flow_label", "src_addr", "dest_addr")
+
+    def __init__(self, *fields):
+        self._initial, self.len, self.next_header, self.hop_limit, self._src_addr, self._dest_addr = fields
+
+    @property
+    def version(self) -> int:
+        return (self._initial >> 28) & 0x0F  # First 32 bits is combined version (4), traffic class (8) and flow label (20).
+
+    @property
+    def traffic_class(self) -> int:
+        return (self._initial >> 20) & 0xFF
+
+    @property
+    def flow_label(self) -> int:
+        return self._initial & 0xFFFFF
+
+    @property
+    def src_addr(self) -> str:
+        return socket.inet_ntop(socket.AF_INET6, self._src_addr)  # Convert source address to readable format.
+
+    @property
+    def dest_addr(self) -> str:
+        return socket.inet_ntop(socket.AF_INET6, self._dest_addr)  # Convert destination address to readable format.
+
+
+def read_icmp_header(raw: bytes, offset: int = 0) -> IcmpHeader:
     """Get information from raw ICMP header data.
 
     Args:
-        raw (Bytes): Raw data of ICMP header.
+        raw (Bytes): Raw data of ICMP header. Any bytes-like object.
+        offset (int): Where the ICMP header starts in `raw`. (default 0)
 
     Returns:
-        dict: A map contains the infos from the raw header.
+        IcmpHeader: A read-only map contains the infos from the raw header.
     """
-    icmp_header_keys = ("type", "code", "checksum", "id", "seq")
-    return dict(zip(icmp_header_keys, struct.unpack(ICMP_HEADER_FORMAT, raw)))
+    return IcmpHeader(*ICMP_HEADER_STRUCT.unpack_from(raw, offset))
 
 
-def read_ipv4_header(raw: bytes) -> dict:
+def read_ipv4_header(raw: bytes, offset: int = 0) -> IPv4Header:
     """Get information from raw IPv4 header data.
 
     Args:
-        raw (Bytes): Raw data of IPv4 header.
+        raw (Bytes): Raw data of IPv4 header. Any bytes-like object.
+        offset (int): Where the IPv4 header starts in `raw`. (default 0)
 
     Returns:
-        dict: A map contains the infos from the raw header.
+        IPv4Header: A read-only map contains the infos from the raw header.
     """
+    return IPv4Header(*IPV4_HEADER_STRUCT.unpack_from(raw, offset))
 
-    def stringify_ip(ip: int) -> str:
-        return ".".join(str(ip >> offset & 0xFF) for offset in (24, 16, 8, 0))  # str(ipaddress.ip_address(ip))
 
-    ipv4_header_keys = ("version", "tos", "len", "id", "flags", "ttl", "protocol", "checksum", "src_addr", "dest_addr")
-    ipv4_header = dict(zip(ipv4_header_keys, struct.unpack(IPV4_HEADER_FORMAT, raw)))
-    ipv4_header["src_addr"] = stringify_ip(ipv4_header["src_addr"])
-    ipv4_header["dest_addr"] = stringify_ip(ipv4_header["dest_addr"])
-    return ipv4_header
+def read_ipv6_header(raw: bytes, offset: int = 0) -> IPv6Header:
+    """Get information from raw IPv6 header data.
 
+    Args:
+        raw (Bytes): Raw data of IPv6 header. Any bytes-like object.
+        offset (int): Where the IPv6 header starts in `raw`. (default 0)
 
-def read_ipv6_header(raw: bytes) -> dict:
-    """Get information from raw IPv6 header data.
+    Returns:
+        IPv6Header: A read-only map contains the infos from the raw header.
+    """
+    return IPv6Header(*IPV6_HEADER_STRUCT.unpack_from(raw, offset))
+
+
+class EchoRequestTemplate:
+    """Precomputed ICMP echo request, which only patches the sequence and the time for each new packet.
+
+    The header and the padding are built once into a preallocated buffer, with the checksum of the static part.
+    For each packet, the sequence and the time are packed into the buffer and the checksum is updated incrementally.
+    RFC1624: https://tools.ietf.org/html/rfc1624
+
+    The returned packet is the internal buffer, which is overwritten by the next `pack()`. Not thread-safe.
+    """
+
+    def __init__(self, icmp_type: int, icmp_id: int, size: int, pattern: bytes = b"Q"):
+        """
+        Args:
+            icmp_type (int): ICMP type. IcmpV4Type.ECHO_REQUEST or IcmpV6Type.ECHO_REQUEST.
+            icmp_id (int): ICMP packet id.
+            size (int): The ICMP packet payload size in bytes, including the time. At least the size of a double.
+            pattern (bytes): The padding pattern repeated after the time. (default b"Q")
+        """
+        self.icmp_type = icmp_type
+        self.icmp_id = icmp_id
+        self.size = size
+        self.pattern = pattern
+        self.seq_offset = struct.calcsize(ICMP_HEADER_FORMAT) - 2  # [6:8]
+        self.payload_offset = struct.calcsize(ICMP_HEADER_FORMAT)  # [8:]
+        self.time_size = struct.calcsize(ICMP_TIME_FORMAT)
+        padding_size = max(size - self.time_size, 0)  # Using double to store current time.
+        padding = (pattern * (padding_size // len(pattern) + 1))[:padding_size] if pattern else b""
+        self.buffer = bytearray(struct.pack(ICMP_HEADER_FORMAT, icmp_type, ICMP_DEFAULT_CODE, 0, icmp_id, 0) + bytes(self.time_size) + padding)  # Checksum, sequence and time are zeros.
+        self.checksum = checksum(self.buffer)  # HC: Checksum of the template.
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def pack(self, seq: int, time_sent=None, pseudo_header: bytes = b"") -> bytearray:
+        """Patch the sequence and the time into the buffer and update the checksum.
+
+        RFC1624 Eqn. 3: HC' = ~(~HC + ~m + m'). The changed fields `m` are zeros in the template, so `~m` is a ones' complement zero and HC' = ~(~HC + m').
+        Ones' complement sum of 16-bit words is the value modulo 0xFFFF, since 0x10000 = 1 (mod 0xFFFF). Words are in the byte order of `checksum()`.
+
+        Args:
+            seq (int): ICMP packet sequence.
+            time_sent (float | None): The time packed into the payload. None for `time.time()`. (default None)
+            pseudo_header (bytes): ICMPv6 pseudo header, whose words are added to the checksum. (default b"")
+
+        Returns:
+            bytearray: The packet, which is the internal buffer.
+        """
+        buffer = self.buffer
+        struct.pack_into("!H", buffer, self.seq_offset, seq)
+        struct.pack_into(ICMP_TIME_FORMAT, buffer, self.payload_offset, time.time() if time_sent is None else time_sent)
+        changed = memoryview(buffer)[self.seq_offset:self.payload_offset + self.time_size]  # m': sequence and time.
+        total = (~self.checksum & 0xffff) + int.from_bytes(changed, "little") + int.from_bytes(pseudo_header, "little")
+        total = total % 0xffff or 0xffff  # Folded ones' complement sum. Never zero since the type is not zero.
+        struct.pack_into("!H", buffer, 2, socket.htons(~total & 0xffff))  # Same byte order as `send_one_ping()` always used.
+        return buffer
+
+
+@functools.lru_cache(maxsize=256)
+def _get_echo_request_template(icmp_type: int, icmp_id: int, size: int, thread_id: int) -> EchoRequestTemplate:
+    """Get the cached echo request template. `thread_id` is part of the cache key only."""
+    return EchoRequestTemplate(icmp_type, icmp_id, size)
+
+
+def _resolve_sock_addr(dest_addr: str, version: int) -> tuple:
+    """Resolve the destination address to a socket address.
 
     Args:
-        raw (Bytes): Raw data of IPv6 header.
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"2001:db8::1"
+        version (int): The IP version. 4 for IPv4, 6 for IPv6.
 
     Returns:
-        dict: A map contains the infos from the raw header.
-    """
-    ipv6_header_keys = ("initial", "len", "next_header", "hop_limit", "src_addr", "dest_addr")
-    ipv6_header_unpacked = dict(zip(ipv6_header_keys, struct.unpack(IPV6_HEADER_FORMAT, raw[:40])))
-    ipv6_header = {
-        "len": ipv6_header_unpacked["len"],
-        "next_header": ipv6_header_unpacked["next_header"],
-        "hop_limit": ipv6_header_unpacked["hop_limit"],
-    }
-    ipv6_header["version"] = (ipv6_header_unpacked["initial"] >> 28) & 0x0F  # First 32 bits is combined version (4), traffic class (8) and flow label (20).
-    ipv6_header["traffic_class"] = (ipv6_header_unpacked["initial"] >> 20) & 0xFF
-    ipv6_header["flow_label"] = ipv6_header_unpacked["initial"] & 0xFFFFF
-    ipv6_header["src_addr"] = socket.inet_ntop(socket.AF_INET6, ipv6_header_unpacked["src_addr"])  # Convert source address to readable format.
-    ipv6_header["dest_addr"] = socket.inet_ntop(socket.AF_INET6, ipv6_header_unpacked["dest_addr"])  # Convert destination address to readable format.
-    return ipv6_header
+        tuple: (dest_addr, port) for IPv4 and (dest_addr, port, flowinfo, scopeid) for IPv6.
+
+    Raises:
+        HostUnkown: If destination address is a domain name and cannot resolved.
+    """
+    try:  # Resolve domain name to IP address if needed.
+        if version == 4:
+            return (socket.gethostbyname(dest_addr), 0)  # Domain name will translated into IP address, and IP address leaves unchanged. Port is 0 respectively the OS default behavior will be used.
+        return socket.getaddrinfo(dest_addr, None, socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_ICMPV6)[0][4]  # For IPv6, sock_addr is (dest_addr, port, flowinfo, scopeid)
+    except socket.gaierror as err:
+        raise errors.HostUnknown(dest_addr=dest_addr) from err
+
+
+def _pack_echo_request(sock: socket.socket, sock_addr: tuple, icmp_id: int, seq: int, size: int) -> bytearray:
+    """Build an echo request from the cached template of the current thread.
+
+    Args:
+        sock (socket.socket): The socket to send from.
+        sock_addr (tuple): The resolved destination socket address, see `_resolve_sock_addr()`.
+        icmp_id (int): ICMP packet id.
+        seq (int): ICMP packet sequence.
+        size (int): The ICMP packet payload size in bytes.
+
+    Returns:
+        bytearray: The packet, which is the buffer of the template and overwritten by the next packet of the same template.
+    """
+    tracing = DEBUG or TRACER is not None
+    icmp_type = IcmpV4Type.ECHO_REQUEST if is_ipv4(sock) else IcmpV6Type.ECHO_REQUEST
+    template = _get_echo_request_template(icmp_type, icmp_id, size, threading.get_ident())  # Templates are per thread, since the buffer is patched in place.
+    if is_ipv4(sock):
+        packet = template.pack(seq)
+    else:  # ICMPv6 requires a pseudo header for checksum calculation.
+        src_addr = None if SRC_ADDR_CACHE is None else SRC_ADDR_CACHE.get(sock_addr)
+        if src_addr is None:
+            with socket.socket(socket.AF_INET6, sock.type, sock.proto) as dummy_sock:  # Create a dummy socket to get the source address.
+                dummy_sock.connect(sock_addr)  # Set default dest_addr so the OS can select the correct source address. No real data is sent.
+                src_addr = dummy_sock.getsockname()[0]  # Get the source address.
+            if SRC_ADDR_CACHE is not None:
+                SRC_ADDR_CACHE.set(sock_addr, src_addr)
+        if tracing:
+            _debug("Source Address: {}".format(src_addr))
+        pseudo_header = struct.pack(  # https://en.wikipedia.org/wiki/ICMPv6#Checksum
+            ICMPV6_PSEUDO_HEADER_FORMAT,  # 16s: Source Address (128), 16s: Destination Address (128), B: Next Header (8), B: Payload Length (16)
+            socket.inet_pton(socket.AF_INET6, src_addr),  # Source Address
+            socket.inet_pton(socket.AF_INET6, sock_addr[0]),  # Destination Address
+            len(template),  # ICMPv6 Length
+            0, 0, 0,  # Zeros
+            IcmpV6Type.ECHO_REQUEST,  # Next Header (ICMPv6 Type)
+        )
+        packet = template.pack(seq, pseudo_header=pseudo_header)  # Checksum covers the pseudo header + icmp_header + icmp_payload.
+    if tracing:
+        _debug("Sent ICMP header:", read_icmp_header(packet))
+        _debug("Sent ICMP payload:", bytes(packet[template.payload_offset:]))
+    return packet
 
 
 @_func_logger
-def send_one_ping(sock: socket.socket, dest_addr: str, icmp_id: int, seq: int, size: int) -> None:
+def send_one_ping(sock: socket.socket, dest_addr: str, icmp_id: int, seq: int, size: int):
     """Sends one ping to the given destination.
 
     ICMP Header (bits): type (8), code (8), checksum (16), id (16), sequence (16)
@@ -201,64 +449,428 @@ def send_one_ping(sock: socket.socket, dest_addr: str, icmp_id: int, seq: int, s
         seq (int): ICMP packet sequence, usually increases from 0 in the same process.
         size (int): The ICMP packet payload size in bytes. Note this is only for the payload part.
 
+    Returns:
+        tuple | None: The send stamp (time.time_ns(), time.perf_counter()) right before sending if `ping3.TIMESTAMPING` is True, otherwise None.
+
     Raises:
         HostUnkown: If destination address is a domain name and cannot resolved.
     """
-    _debug("Destination address:", dest_addr)
-    try:  # Resolve domain name to IP address if needed.
+    tracing = DEBUG or TRACER is not None
+    if tracing:
+        _debug("Destination address:", dest_addr)
+    version = 4 if is_ipv4(sock) else 6
+    sock_addr = _resolve_sock_addr(dest_addr, version) if DNS_CACHE is None else DNS_CACHE.resolve(dest_addr, version)
+    if tracing:
+        _debug("Resolved destination address:", sock_addr[0])
+    packet = _pack_echo_request(sock, sock_addr, icmp_id=icmp_id, seq=seq, size=size)
+    send_stamp = (_time_ns(), time.perf_counter()) if TIMESTAMPING else None
+    try:
+        sock.sendto(packet, sock_addr)  # sock_addr = (ip, port) or (ip, port, flowinfo, scopeid).
+    except OSError:
+        if not is_ipv4(sock) and SRC_ADDR_CACHE is not None:
+            SRC_ADDR_CACHE.pop(sock_addr)  # The route may have changed.
+        raise
+    return send_stamp
+
+
+Capabilities = collections.namedtuple("Capabilities", ["socket_type", "ip_header", "id_rewritten", "bind_to_device"])
+Capabilities.__doc__ = """The ICMP capabilities of the process on this platform, see `ping3.capabilities()`.
+
+Attributes:
+    socket_type (dict): IP version -> `socket.SOCK_RAW` if permitted, otherwise `socket.SOCK_DGRAM`. None if neither can be created, ex. IPv6 not supported.
+    ip_header (dict): IP version -> True if the packets received by a socket of `socket_type` start with the IP header.
+    id_rewritten (dict): IP version -> True if the kernel rewrites the ICMP id to the port of the socket, ex. unprivileged sockets on Linux.
+    bind_to_device (bool): True if sockets can be bound to an interface by `SO_BINDTODEVICE`, Linux only.
+"""
+_capabilities = None  # Probed on first use, see `capabilities()`.
+
+
+def _ipv4_ip_header(sock_type: int) -> bool:
+    """Check if the IPv4 packets received by a socket of the type have an IP header."""
+    return (os.name != "posix") or (platform.system() == "Darwin") or (sock_type == socket.SOCK_RAW)  # No IP Header when unprivileged on Linux.
+
+
+def capabilities(refresh: bool = False) -> Capabilities:
+    """
+    Probe the ICMP sockets the process can use once, and cache the result for every later socket and packet.
+
+    Sockets are created as SOCK_DGRAM directly if SOCK_RAW is not permitted, instead of catching PermissionError for every ping. Whether received packets have an IP header is looked up instead of checking the platform for every packet.
+
+    Example:
+        >>> ping3.capabilities()  # As root on Linux.
+        Capabilities(socket_type={4: <SocketKind.SOCK_RAW: 3>, 6: <SocketKind.SOCK_RAW: 3>}, ip_header={4: True, 6: False}, id_rewritten={4: False, 6: False}, bind_to_device=True)
+
+    Args:
+        refresh (bool): Probe again, ex. after the privileges of the process changed. (default False)
+
+    Returns:
+        Capabilities: The capabilities.
+    """
+    global _capabilities
+    if _capabilities is not None and not refresh:
+        return _capabilities
+    socket_type, ip_header, id_rewritten = {}, {}, {}
+    bind_to_device = False
+    for version, socket_family, socket_protocol in ((4, socket.AF_INET, socket.IPPROTO_ICMP), (6, socket.AF_INET6, socket.IPPROTO_ICMPV6)):
+        sock = None
+        socket_type[version] = None
+        try:
+            try:
+                sock = socket.socket(socket_family, socket.SOCK_RAW, socket_protocol)
+                socket_type[version] = socket.SOCK_RAW
+            except PermissionError as err:
+                if err.errno != errno.EPERM:
+                    raise
+                sock = socket.socket(socket_family, socket.SOCK_DGRAM, socket_protocol)
+                socket_type[version] = socket.SOCK_DGRAM
+            if version == 4 and platform.system() == "Linux":
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, SOCKET_SO_BINDTODEVICE, b"")  # Unbound, nothing changed if permitted.
+                    bind_to_device = True
+                except OSError as err:
+                    _debug("Probe Socket Option `SO_BINDTODEVICE` Failed: {}".format(err))
+        except OSError as err:
+            _debug("Probe IPv{} socket failed: {}".format(version, err))
+        finally:
+            if sock is not None:
+                sock.close()
+        ip_header[version] = _ipv4_ip_header(socket_type[version]) if version == 4 else False  # Raw ICMPv6 sockets never receive the IPv6 header, RFC 3542.
+        id_rewritten[version] = socket_type[version] == socket.SOCK_DGRAM and not ip_header[version]
+    _capabilities = Capabilities(socket_type, ip_header, id_rewritten, bind_to_device)
+    _debug("Capabilities:", _capabilities)
+    return _capabilities
+
+
+def _detect_ip_header(sock: socket.socket, recv_data: bytes) -> bool:
+    """Detect if the received data has an IP header.
+
+    IPv4 header first 4 bits is 4 (0b0100). ICMPv4 Type starts with 4 (64~79) is unassigned. See https://en.wikipedia.org/wiki/Internet_Control_Message_Protocol#Control_messages
+    IPv6 header first 4 bits is 6 (0b0110). ICMPv6 Type starts with 6 (96~111) is unassigned. See https://en.wikipedia.org/wiki/ICMPv6#Types
+
+    Args:
+        sock (socket.socket): The socket used to receive the data.
+        recv_data (bytes): The received data.
+
+    Returns:
+        bool: True if the received data has an IP header, False otherwise.
+    """
+    if is_ipv4(sock):
+        caps = _capabilities or capabilities()
+        sock_type = _SOCKET_TYPE.__get__(sock)
+        return caps.ip_header[4] if sock_type == caps.socket_type[4] else _ipv4_ip_header(sock_type)  # Differs if the privileges changed since probed.
+    first_field = recv_data[0] >> 4  # The first 4 bits of the first byte is the version field of IP Header.
+    if DEBUG or TRACER is not None:
+        _debug("Detecting if received data has IP header. First 4 bits: {}".format(first_field))
+    return first_field == 6
+
+
+def _id_rewritten(sock: socket.socket, ipv4: bool) -> bool:
+    """Check if the kernel rewrites the ICMP id of the socket to the port of the socket, by the cached `capabilities()`.
+
+    Args:
+        sock (socket.socket): The socket used to receive the data.
+        ipv4 (bool): True if the socket is IPv4.
+
+    Returns:
+        bool: True if the ICMP id is rewritten, ex. unprivileged sockets on Linux.
+    """
+    version = 4 if ipv4 else 6
+    caps = _capabilities or capabilities()
+    sock_type = _SOCKET_TYPE.__get__(sock)
+    if sock_type == caps.socket_type[version]:
+        return caps.id_rewritten[version]
+    return sock_type == socket.SOCK_DGRAM and not (ipv4 and _ipv4_ip_header(sock_type))  # Differs if the privileges changed since probed.
+
+
+def _get_receive_buffer() -> bytearray:
+    """Get the receive buffer of the current thread, which is reused for every received packet.
+
+    Returns:
+        bytearray: The receive buffer of `RECEIVE_BUFFER_SIZE` bytes.
+    """
+    buffer = getattr(_local, "receive_buffer", None)
+    if buffer is None:
+        buffer = _local.receive_buffer = bytearray(RECEIVE_BUFFER_SIZE)
+    return buffer
+
+
+class Delay(float):
+    """The delay measured with `ping3.TIMESTAMPING`, which is a float with the timing source.
+
+    Attributes:
+        timing (str): "kernel" if received at the kernel receive timestamp (SO_TIMESTAMPNS) and sent at `time.time_ns()`. "monotonic" if both are `time.perf_counter()` in Python.
+    """
+
+    __slots__ = ("timing",)
+
+    def __new__(cls, value: float, timing: str):
+        delay = super().__new__(cls, value)
+        delay.timing = timing
+        return delay
+
+    def __reduce__(self):
+        return (Delay, (float(self), self.timing))
+
+
+def _to_unit(delay, unit: str):
+    """Convert the delay in seconds to the unit, keep the timing source of `Delay`."""
+    if unit != "ms":
+        return delay
+    if type(delay) is Delay:
+        return Delay(delay * 1000, delay.timing)
+    return delay * 1000  # in milliseconds
+
+
+def _enable_timestamps(sock: socket.socket) -> None:
+    """Ask the kernel to timestamp every received packet, Linux only. Delays fall back to the monotonic clock if not supported.
+
+    Args:
+        sock (socket.socket): The socket.
+    """
+    if platform.system() != "Linux":
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SOCKET_SO_TIMESTAMPNS, 1)
+    except OSError as err:
+        _debug("Set Socket Option `SO_TIMESTAMPNS` in `SOL_SOCKET` Failed: {}".format(err))
+
+
+def _build_icmp_filter(version: int, first_id: int, last_id: int) -> list:
+    """Build a classic BPF program which accepts the replies to ICMP ids in first_id~last_id of a raw socket.
+
+    Echo replies are matched by their ICMP id. Time Exceeded and Destination Unreachable are matched by the id of the original ICMP header they embed, which is after a 20-byte IPv4 or 40-byte IPv6 header, same as `_parse_reply()`.
+    IPv4 raw sockets receive the IP header, whose length is read from its IHL field. IPv6 raw sockets receive the ICMPv6 header only.
+
+    Args:
+        version (int): The IP version. 4 for IPv4, 6 for IPv6.
+        first_id (int): The first accepted ICMP id.
+        last_id (int): The last accepted ICMP id.
+
+    Returns:
+        list[tuple]: The instructions, each is (code, jump if true, jump if false, constant).
+    """
+    icmp_type = IcmpV4Type if version == 4 else IcmpV6Type
+    inner_ip_header_size = IPV4_HEADER_STRUCT.size if version == 4 else IPV6_HEADER_STRUCT.size
+    embedded_id = ICMP_HEADER_STRUCT.size + inner_ip_header_size + 4  # ICMP header + original IP header + original type, code and checksum.
+    if version == 4:
+        load_header = [(0xb1, 0, 0, 0)]  # ldxb 4*([0]&0xf): X = IPv4 header length.
+        load_type, load_id, load_embedded_id = 0x50, 0x48, 0x48  # ldb [x+k], ldh [x+k], ldh [x+k]
+    else:
+        load_header = []  # X is not used, the ICMPv6 header is at 0.
+        load_type, load_id, load_embedded_id = 0x30, 0x28, 0x28  # ldb [k], ldh [k], ldh [k]
+    return load_header + [
+        (load_type, 0, 0, 0),  # A = ICMP type.
+        (0x15, 2, 0, icmp_type.ECHO_REPLY),  # jeq: to load id.
+        (0x15, 3, 0, icmp_type.DESTINATION_UNREACHABLE),  # jeq: to load embedded id.
+        (0x15, 2, 6, icmp_type.TIME_EXCEEDED),  # jeq: to load embedded id, otherwise drop.
+        (load_id, 0, 0, 4),  # A = ICMP id.
+        (0x05, 0, 0, 1),  # ja: to check id.
+        (load_embedded_id, 0, 0, embedded_id),  # A = ICMP id of the original ICMP header.
+        (0x35, 0, 2, first_id),  # jge: otherwise drop.
+        (0x25, 1, 0, last_id),  # jgt: drop, otherwise accept.
+        (0x06, 0, 0, 0xffffffff),  # ret: accept the whole packet.
+        (0x06, 0, 0, 0),  # ret: drop.
+    ]
+
+
+def _attach_filter(sock: socket.socket, first_id: int, last_id=None) -> bool:
+    """Attach a kernel filter to the raw socket which drops the ICMP packets not for ICMP ids in first_id~last_id, Linux only.
+
+    A raw ICMP socket receives every ICMP packet of the host. Without the filter, each one wakes up the receiver and is parsed then dropped by `_parse_reply()`.
+    Unprivileged SOCK_DGRAM sockets are already filtered by the kernel, nothing is attached.
+
+    Args:
+        sock (socket.socket): The socket.
+        first_id (int): The first accepted ICMP id.
+        last_id (int | None): The last accepted ICMP id. None for `first_id` only. (default None)
+
+    Returns:
+        bool: True if the filter is attached.
+    """
+    if platform.system() != "Linux" or sock.type != socket.SOCK_RAW:
+        return False
+    instructions = _build_icmp_filter(4 if is_ipv4(sock) else 6, first_id, first_id if last_id is None else last_id)
+    program = ctypes.create_string_buffer(b"".join(BPF_INSTRUCTION_STRUCT.pack(*instruction) for instruction in instructions))
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SOCKET_SO_ATTACH_FILTER, struct.pack(BPF_PROGRAM_FORMAT, len(instructions), ctypes.addressof(program)))  # The kernel copies the program.
+    except OSError as err:
+        _debug("Set Socket Option `SO_ATTACH_FILTER` in `SOL_SOCKET` Failed: {}".format(err))
+        return False
+    return True
+
+
+def _recv_timestamped(sock: socket.socket, recv_buffer: bytearray) -> tuple:
+    """Receive one packet into the buffer with its kernel receive timestamp.
+
+    Args:
+        sock (socket.socket): The socket, see `_enable_timestamps()`.
+        recv_buffer (bytearray): The receive buffer.
+
+    Returns:
+        tuple: (recv_size, kernel_recv, address). kernel_recv is the kernel receive timestamp in `time.time_ns()` nanoseconds, None if not available. address is the socket address of the sender.
+    """
+    if not TIMESTAMP_ANCILLARY_SIZE:  # No recvmsg() on Windows.
+        recv_size, address = sock.recvfrom_into(recv_buffer)
+        return recv_size, None, address
+    recv_size, ancdata, _, address = sock.recvmsg_into([recv_buffer], TIMESTAMP_ANCILLARY_SIZE)
+    for level, data_type, data in ancdata:
+        if level == socket.SOL_SOCKET and data_type == SOCKET_SO_TIMESTAMPNS and len(data) >= TIMESPEC_STRUCT.size:
+            seconds, nanoseconds = TIMESPEC_STRUCT.unpack_from(data)
+            return recv_size, seconds * 1000000000 + nanoseconds, address
+    return recv_size, None, address
+
+
+def _stamped_delay(send_stamp: tuple, perf_recv: float, kernel_recv=None) -> Delay:
+    """Measure the delay from the send stamp, by the kernel receive timestamp if available.
+
+    Args:
+        send_stamp (tuple): (time.time_ns(), time.perf_counter()) right before sending, returned by `send_one_ping()`.
+        perf_recv (float): `time.perf_counter()` right after receiving.
+        kernel_recv (int | None): The kernel receive timestamp in `time.time_ns()` nanoseconds. (default None)
+
+    Returns:
+        Delay: The delay in seconds.
+    """
+    if kernel_recv is not None:
+        delay_ns = kernel_recv - send_stamp[0]  # In integers, float seconds since epoch lose sub-microsecond precision.
+        if delay_ns >= 0:  # Otherwise the wall clock is stepped in between.
+            return Delay(delay_ns / 1e9, "kernel")
+    return Delay(perf_recv - send_stamp[1], "monotonic")
+
+
+def _parse_reply(sock: socket.socket, recv_data: bytes, icmp_id: int, length=None, seqs=None):
+    """Parse a received packet and check if it is a reply to the ICMP id and sequences.
+
+    Fields are unpacked at fixed offsets of `recv_data` without slicing, so the receive buffer can be reused.
+    ICMP id and sequence are checked from the raw data first, headers are only built for matched error replies.
+
+    Args:
+        sock (socket.socket): The socket used to receive the data.
+        recv_data (bytes): The received data, or the receive buffer filled by `sock.recv_into()`.
+        icmp_id (int): ICMP packet id. Sent packet id should be identical with received packet id.
+        length (int | None): Number of received bytes in `recv_data`. None for the whole `recv_data`. (default None)
+        seqs (container[int] | None): Expected ICMP packet sequences, ex. a tuple or a dict keyed by sequence. None for any sequence. (default None)
+
+    Returns:
+        tuple | None: (seq, time_sent, error) if the packet is a reply to the ICMP id and sequences, None if the packet should be filtered out.
+            `time_sent` is the time packed in the ECHO_REPLY payload. `error` is a PingError for TIME_EXCEEDED and DESTINATION_UNREACHABLE, otherwise None.
+    """
+    tracing = DEBUG or TRACER is not None
+    length = len(recv_data) if length is None else length
+    ipv4 = is_ipv4(sock)
+    icmp_type = IcmpV4Type if ipv4 else IcmpV6Type
+    ip_header_size = IPV4_HEADER_STRUCT.size if ipv4 else IPV6_HEADER_STRUCT.size  # 20 or 40
+    has_ip_header = _detect_ip_header(sock, recv_data)
+    icmp_header_offset = ip_header_size if has_ip_header else 0  # [20:28] or [0:8]
+    icmp_payload_offset = icmp_header_offset + ICMP_HEADER_STRUCT.size
+    if length < icmp_payload_offset:
+        if tracing:
+            _debug("Packet too short. Packet filtered out.")
+        return None
+    reply_type, reply_code, _, reply_id, reply_seq = ICMP_HEADER_STRUCT.unpack_from(recv_data, icmp_header_offset)
+    if tracing:
+        _debug("Has IP header:", has_ip_header)
+        if has_ip_header:
+            _debug("Received IP header:", read_ipv4_header(recv_data) if ipv4 else read_ipv6_header(recv_data))
+        _debug("Received ICMP header:", read_icmp_header(recv_data, icmp_header_offset))
+        _debug("Received ICMP payload:", bytes(recv_data[icmp_payload_offset:length]))
+    if reply_type in (icmp_type.TIME_EXCEEDED, icmp_type.DESTINATION_UNREACHABLE):  # TIME_EXCEEDED and DESTINATION_UNREACHABLE have no icmp_id and icmp_seq. Usually they are 0.
+        # According to RFC 792, both Time Exceeded and Destination Unreachable
+        # messages include the IP Header and the first 64 bits of the Datagram
+        # which is the original ICMP Header. Thus we can extract the icmp_id
+        # and seq from the returned Datagram ICMP Header to match the packet.
+        original_icmp_header_offset = icmp_payload_offset + ip_header_size
+        if length < original_icmp_header_offset + ICMP_HEADER_STRUCT.size:
+            if tracing:
+                _debug("Packet too short. Packet filtered out.")
+            return None
+        _, _, _, original_id, original_seq = ICMP_HEADER_STRUCT.unpack_from(recv_data, original_icmp_header_offset)
+        is_icmp_id_matched = original_id == icmp_id  # ECHO_REPLY should match the ICMP ID
+        if not is_icmp_id_matched and _id_rewritten(sock, ipv4):  # When unprivileged on Linux, the ICMP id is rewritten by the kernel.
+            icmp_id = sock.getsockname()[1]  # According to https://stackoverflow.com/a/14023878/4528364, icmp_id is the port number of the socket.
+            is_icmp_id_matched = original_id == icmp_id
+            if is_icmp_id_matched:
+                if tracing:
+                    _debug("ICMP ID rewritten by kernel: {}".format(icmp_id))
+        if not is_icmp_id_matched:
+            if tracing:
+                _debug("ICMP ID dismatch. Packet filtered out.")
+            return None
+        if seqs is not None and original_seq not in seqs:  # ECHO_REPLY should match the ICMP SEQ field.
+            if tracing:
+                _debug("IMCP SEQ dismatch. Packet filtered out.")
+            return None
+        ip_header = (read_ipv4_header(recv_data) if ipv4 else read_ipv6_header(recv_data)) if has_ip_header else None
+        icmp_header = read_icmp_header(recv_data, icmp_header_offset)
+        if reply_type == icmp_type.TIME_EXCEEDED:
+            if reply_code == IcmpTimeExceededCode.TTL_EXPIRED:  # Windows raw socket cannot get TTL_EXPIRED. See https://stackoverflow.com/questions/43239862/socket-sock-raw-ipproto-icmp-cant-read-ttl-response.
+                return original_seq, None, errors.TimeToLiveExpired(ip_header=ip_header, icmp_header=icmp_header)  # Some router does not report TTL expired and then timeout shows.
+            return original_seq, None, errors.TimeExceeded()
+        if ipv4:
+            if reply_code == IcmpV4DestinationUnreachableCode.DESTINATION_HOST_UNREACHABLE:
+                return original_seq, None, errors.DestinationHostUnreachable(ip_header=ip_header, icmp_header=icmp_header)
+        else:
+            if reply_code == IcmpV6DestinationUnreachableCode.ADDRESS_UNREACHABLE:
+                return original_seq, None, errors.AddressUnreachable(ip_header=ip_header, icmp_header=icmp_header)
+            elif reply_code == IcmpV6DestinationUnreachableCode.PORT_UNREACHABLE:
+                return original_seq, None, errors.PortUnreachable(ip_header=ip_header, icmp_header=icmp_header)
+        return original_seq, None, errors.DestinationUnreachable(ip_header=ip_header, icmp_header=icmp_header)
+    if reply_id:
+        if reply_type == icmp_type.ECHO_REQUEST:  # filters out the ECHO_REQUEST itself.
+            if tracing:
+                _debug("ECHO_REQUEST received. Packet filtered out.")
+            return None
+        if tracing:
+            _debug("ICMP ID:", reply_id, ",", "Expected:", icmp_id)
+        is_icmp_id_matched = reply_id == icmp_id  # ECHO_REPLY should match the ICMP ID
+        if not is_icmp_id_matched and _id_rewritten(sock, ipv4):  # When unprivileged on Linux, the ICMP id is rewritten by the kernel.
+            icmp_id = sock.getsockname()[1]  # According to https://stackoverflow.com/a/14023878/4528364, icmp_id is the port number of the socket.
+            is_icmp_id_matched = reply_id == icmp_id
+            if is_icmp_id_matched:
+                if tracing:
+                    _debug("ICMP ID rewritten by kernel: {}".format(icmp_id))
+        if not is_icmp_id_matched:
+            if tracing:
+                _debug("ICMP ID dismatch. Packet filtered out.")
+            return None
+        if seqs is not None and reply_seq not in seqs:  # ECHO_REPLY should match the ICMP SEQ field.
+            if tracing:
+                _debug("IMCP SEQ dismatch. Packet filtered out.")
+            return None
+        if reply_type == icmp_type.ECHO_REPLY and length >= icmp_payload_offset + ICMP_TIME_STRUCT.size:
+            time_sent = ICMP_TIME_STRUCT.unpack_from(recv_data, icmp_payload_offset)[0]
+            return reply_seq, time_sent, None
+    if tracing:
+        _debug("Uncatched ICMP packet:", reply_type, reply_code)
+    return None
+
+
+def _read_reply_info(sock: socket.socket, recv_data: bytes, length: int, address) -> dict:
+    """Read the details of a received reply for `PingResult`.
+
+    Args:
+        sock (socket.socket): The socket used to receive the data.
+        recv_data (bytes): The received data, or the receive buffer.
+        length (int): Number of received bytes in `recv_data`.
+        address (tuple | None): The socket address of the sender.
+
+    Returns:
+        dict: "ttl" is the Time-To-Live (Hop Limit for IPv6) in the IP header, None if the packet has no IP header. "src" is the sender address. "size" is the ICMP payload size in bytes.
+    """
+    ttl = None
+    icmp_header_offset = 0
+    if _detect_ip_header(sock, recv_data):
         if is_ipv4(sock):
-            dest_addr = socket.gethostbyname(dest_addr)  # Domain name will translated into IP address, and IP address leaves unchanged.
-            sock_addr = (dest_addr, 0)  # For IPv4, sock_addr is (dest_addr, port). Port is 0 respectively the OS default behavior will be used.
+            ttl = recv_data[8]  # B: TTL at [8], see IPV4_HEADER_FORMAT.
+            icmp_header_offset = IPV4_HEADER_STRUCT.size
         else:
-            sock_addr = socket.getaddrinfo(dest_addr, None, socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_ICMPV6)[0][4]  # For IPv6, sock_addr is (dest_addr, port, flowinfo, scopeid)
-    except socket.gaierror as err:
-        raise errors.HostUnknown(dest_addr=dest_addr) from err
-    _debug("Resolved destination address:", sock_addr[0])
-
-    pseudo_checksum = 0  # Pseudo checksum is used to calculate the real checksum.
-
-    icmp_header = struct.pack(
-        ICMP_HEADER_FORMAT,
-        IcmpV4Type.ECHO_REQUEST if is_ipv4(sock) else IcmpV6Type.ECHO_REQUEST,
-        ICMP_DEFAULT_CODE,
-        pseudo_checksum,
-        icmp_id,
-        seq,
-    )
-    padding = (size - struct.calcsize(ICMP_TIME_FORMAT)) * "Q"  # Using double to store current time.
-    icmp_payload = struct.pack(ICMP_TIME_FORMAT, time.time()) + padding.encode()
-    if is_ipv4(sock):
-        real_checksum = checksum(icmp_header + icmp_payload)  # Calculates the checksum on the dummy header and the icmp_payload.
-    else:  # ICMPv6 requires a pseudo header for checksum calculation.
-        with socket.socket(socket.AF_INET6, sock.type, sock.proto) as dummy_sock:  # Create a dummy socket to get the source address.
-            dummy_sock.connect(sock_addr)  # Set default dest_addr so the OS can select the correct source address. No real data is sent.
-            src_addr = dummy_sock.getsockname()[0]  # Get the source address.
-        _debug("Source Address: {}".format(src_addr))
-        pseudo_header = struct.pack(  # https://en.wikipedia.org/wiki/ICMPv6#Checksum
-            ICMPV6_PSEUDO_HEADER_FORMAT,  # 16s: Source Address (128), 16s: Destination Address (128), B: Next Header (8), B: Payload Length (16)
-            socket.inet_pton(socket.AF_INET6, src_addr),  # Source Address
-            socket.inet_pton(socket.AF_INET6, sock_addr[0]),  # Destination Address
-            len(icmp_header) + len(icmp_payload),  # ICMPv6 Length
-            0, 0, 0,  # Zeros
-            IcmpV6Type.ECHO_REQUEST,  # Next Header (ICMPv6 Type)
-        )
-        real_checksum = checksum(pseudo_header + icmp_header + icmp_payload)  # Calculates the checksum on the pseudo header + icmp_header + icmp_payload.
-    icmp_header = struct.pack(
-        ICMP_HEADER_FORMAT,
-        IcmpV4Type.ECHO_REQUEST if is_ipv4(sock) else IcmpV6Type.ECHO_REQUEST,
-        ICMP_DEFAULT_CODE,
-        socket.htons(real_checksum),  # Don't know why I need socket.htons() on real_checksum since ICMP_HEADER_FORMAT already in Network Bytes Order (big-endian)
-        icmp_id,
-        seq,
-    )  # Put real checksum into ICMP header.
-    _debug("Sent ICMP header:", read_icmp_header(icmp_header))
-    _debug("Sent ICMP payload:", icmp_payload)
-    packet = icmp_header + icmp_payload
-    sock.sendto(packet, sock_addr)  # sock_addr = (ip, port) or (ip, port, flowinfo, scopeid).
+            ttl = recv_data[7]  # B: Hop Limit at [7], see IPV6_HEADER_FORMAT.
+            icmp_header_offset = IPV6_HEADER_STRUCT.size
+    return {"ttl": ttl, "src": address[0] if address else None, "size": max(length - icmp_header_offset - ICMP_HEADER_STRUCT.size, 0)}
 
 
 @_func_logger
-def receive_one_ping(sock: socket.socket, icmp_id: int, seq: int, timeout: int):
+def receive_one_ping(sock: socket.socket, icmp_id: int, seq: int, timeout: int, send_stamp=None, reply=None):
     """Receives the ping from the socket.
 
     IP Header (bits): version (8), type of service (8), length (16), id (16), flags (16), time to live (8), protocol (8), checksum (16), source ip (32), destination ip (32).
@@ -271,9 +883,11 @@ def receive_one_ping(sock: socket.socket, icmp_id: int, seq: int, timeout: int):
         icmp_id (int): ICMP packet id. Sent packet id should be identical with received packet id.
         seq (int): ICMP packet sequence. Sent packet sequence should be identical with received packet sequence.
         timeout (int): Timeout in seconds.
+        send_stamp (tuple | None): The send stamp returned by `send_one_ping()`. If given, the delay is measured from it instead of the time echoed in the payload. (default None)
+        reply (dict | None): If given, filled with "ttl", "src" and "size" of the reply, also when an error is raised for it. See `_read_reply_info()`. (default None)
 
     Returns:
-        float | None: The delay in seconds or None on timeout.
+        float | Delay: The delay in seconds. `Delay` if `send_stamp` is given.
 
     Raises:
         TimeToLiveExpired: If the Time-To-Live in IP Header is not large enough for destination.
@@ -281,146 +895,127 @@ def receive_one_ping(sock: socket.socket, icmp_id: int, seq: int, timeout: int):
         DestinationHostUnreachable: If the destination host is unreachable.
         DestinationUnreachable: If the destination is unreachable.
     """
-    def detect_ip_header(sock, recv_data):
-        """Detect if the received data has an IP header.
+    tracing = DEBUG or TRACER is not None
+    recv_buffer = _get_receive_buffer()
+    replies = []  # [(time_recv, kernel_recv, parsed)]. time_recv is `time.perf_counter()` if `send_stamp` is given, otherwise `time.time()`.
+
+    def on_readable(sock):
+        if send_stamp is None:
+            recv_size, address = sock.recvfrom_into(recv_buffer)  # Reuse the buffer instead of allocating for every packet.
+            time_recv, kernel_recv = time.time(), None
+        else:
+            recv_size, kernel_recv, address = _recv_timestamped(sock, recv_buffer)
+            time_recv = time.perf_counter()
+        if tracing:
+            _debug("Received time: {} (kernel {})".format(time_recv, kernel_recv))
+        parsed = _parse_reply(sock, recv_buffer, icmp_id, recv_size, seqs=(seq,))
+        if parsed is not None:
+            replies.append((time_recv, kernel_recv, parsed))
+            if reply is not None and len(replies) == 1:  # Only the first reply counts. Read before the buffer is reused.
+                reply.update(_read_reply_info(sock, recv_buffer, recv_size, address))
+
+    deadline = time.monotonic() + timeout  # Computed once, the reactor waits until the deadline.
+    if tracing:
+        _debug("Timeout in: {:.2f}s".format(timeout))
+    reactor = get_reactor()
+    reactor.register(sock, on_readable)
+    try:
+        if not reactor.run_until(lambda: replies, deadline=deadline):
+            raise errors.Timeout(timeout=timeout)
+    finally:
+        reactor.unregister(sock)
+    time_recv, kernel_recv, (_, time_sent, err) = replies[0]
+    if err is not None:
+        raise err
+    if send_stamp is not None:
+        return _stamped_delay(send_stamp, time_recv, kernel_recv)  # Matched by seq, the echoed payload is not trusted.
+    if tracing:
+        _debug("Received sent time: {} ({})".format(time.ctime(time_sent), time_sent))
+    return time_recv - time_sent
 
-        IPv4 header first 4 bits is 4 (0b0100). ICMPv4 Type starts with 4 (64~79) is unassigned. See https://en.wikipedia.org/wiki/Internet_Control_Message_Protocol#Control_messages
-        IPv6 header first 4 bits is 6 (0b0110). ICMPv6 Type starts with 6 (96~111) is unassigned. See https://en.wikipedia.org/wiki/ICMPv6#Types
 
-        Args:
-            sock (socket.socket): The socket used to receive the data.
-            recv_data (bytes): The received data.
+def _detect_version(dest_addr: str) -> int:
+    """Detect the IP version from the destination address.
 
-        Returns:
-            bool: True if the received data has an IP header, False otherwise.
-        """
-        first_field = recv_data[0] >> 4  # The first 4 bits of the first byte is the version field of IP Header.
-        _debug("Detecting if received data has IP header. First 4 bits: {}".format(first_field))
-        return first_field == (4 if is_ipv4(sock) else 6)
-
-    icmp_type = IcmpV4Type if is_ipv4(sock) else IcmpV6Type
-    timeout_time = time.time() + timeout  # Exactly time when timeout.
-    _debug("Timeout time: {} ({})".format(time.ctime(timeout_time), timeout_time))
-    while True:
-        timeout_left = timeout_time - time.time()  # How many seconds left until timeout.
-        timeout_left = timeout_left if timeout_left > 0 else 0  # Timeout must be non-negative
-        _debug("Timeout left: {:.2f}s".format(timeout_left))
-
-        selected = select.select([sock], [], [], timeout_left)  # Wait until sock is ready to read or time is out.
-        if selected[0] == []:  # Timeout
-            raise errors.Timeout(timeout=timeout)
-        time_recv = time.time()
-        _debug("Received time: {} ({}))".format(time.ctime(time_recv), time_recv))
-        recv_data, addr = sock.recvfrom(1500)  # Single packet size limit is 65535 bytes, but usually the network packet limit is 1500 bytes.
+    Args:
+        dest_addr (str): The destination address. Ex. "192.168.1.1"/"example.com"/"fd00::1"
 
-        if is_ipv4(sock):
-            has_ip_header = (os.name != "posix") or (platform.system() == "Darwin") or (sock.type == socket.SOCK_RAW)  # No IP Header when unprivileged on Linux.
-        else:
-            has_ip_header = detect_ip_header(sock, recv_data)
-        if has_ip_header:
-            _debug("Has IP header: True")
-            ip_header_slice = slice(0, struct.calcsize(IPV4_HEADER_FORMAT if is_ipv4(sock) else IPV6_HEADER_FORMAT))  # [0:20]
-            icmp_header_slice = slice(ip_header_slice.stop, ip_header_slice.stop + struct.calcsize(ICMP_HEADER_FORMAT))  # [20:28]
-            ip_header_raw = recv_data[ip_header_slice]
-            ip_header = read_ipv4_header(ip_header_raw) if is_ipv4(sock) else read_ipv6_header(ip_header_raw)
-            _debug("Received IP header:", ip_header)
-        else:
-            _debug("Has IP header: False")
-            ip_header = None
-            icmp_header_slice = slice(0, struct.calcsize(ICMP_HEADER_FORMAT))  # [0:8]
-        icmp_header_raw, icmp_payload_raw = recv_data[icmp_header_slice], recv_data[icmp_header_slice.stop:]
-        icmp_header = read_icmp_header(icmp_header_raw)
-        _debug("Received ICMP header:", icmp_header)
-        _debug("Received ICMP payload:", icmp_payload_raw)
-        if icmp_header["type"] in (icmp_type.TIME_EXCEEDED, icmp_type.DESTINATION_UNREACHABLE):  # TIME_EXCEEDED and DESTINATION_UNREACHABLE have no icmp_id and icmp_seq. Usually they are 0.
-            # According to RFC 792, both Time Exceeded and Destination Unreachable
-            # messages include the IP Header and the first 64 bits of the Datagram
-            # which is the original ICMP Header. Thus we can extract the icmp_id
-            # and seq from the returned Datagram ICMP Header to match the packet.
-            original_icmp_header_offset = struct.calcsize(IPV4_HEADER_FORMAT if is_ipv4(sock) else IPV6_HEADER_FORMAT)
-            original_icmp_header_slice = slice(original_icmp_header_offset, original_icmp_header_offset + struct.calcsize(ICMP_HEADER_FORMAT))
-            original_icmp_header = read_icmp_header(icmp_payload_raw[original_icmp_header_slice])
-            is_icmp_id_matched = original_icmp_header["id"] == icmp_id  # ECHO_REPLY should match the ICMP ID
-            if not is_icmp_id_matched and not has_ip_header:  # When unprivileged on Linux, ICMP ID is rewrited by kernel.field.
-                icmp_id = sock.getsockname()[1]  # According to https://stackoverflow.com/a/14023878/4528364, icmp_id is the port number of the socket.
-                is_icmp_id_matched = original_icmp_header["id"] == icmp_id
-                if is_icmp_id_matched:
-                    _debug("ICMP ID rewrited by kernel: {}".format(icmp_id))
-            if not is_icmp_id_matched:
-                _debug("ICMP ID dismatch. Packet filtered out.")
-                continue
-            if original_icmp_header["seq"] != seq:  # ECHO_REPLY should match the ICMP SEQ field.
-                _debug("IMCP SEQ dismatch. Packet filtered out.")
-                continue
-            if icmp_header["type"] == icmp_type.TIME_EXCEEDED:
-                if icmp_header["code"] == IcmpTimeExceededCode.TTL_EXPIRED:  # Windows raw socket cannot get TTL_EXPIRED. See https://stackoverflow.com/questions/43239862/socket-sock-raw-ipproto-icmp-cant-read-ttl-response.
-                    raise errors.TimeToLiveExpired(ip_header=ip_header, icmp_header=icmp_header)  # Some router does not report TTL expired and then timeout shows.
-                raise errors.TimeExceeded()
-            if icmp_header["type"] == icmp_type.DESTINATION_UNREACHABLE:
-                if is_ipv4(sock):
-                    if icmp_header["code"] == IcmpV4DestinationUnreachableCode.DESTINATION_HOST_UNREACHABLE:
-                        raise errors.DestinationHostUnreachable(ip_header=ip_header, icmp_header=icmp_header)
-                else:
-                    if icmp_header["code"] == IcmpV6DestinationUnreachableCode.ADDRESS_UNREACHABLE:
-                        raise errors.AddressUnreachable(ip_header=ip_header, icmp_header=icmp_header)
-                    elif icmp_header["code"] == IcmpV6DestinationUnreachableCode.PORT_UNREACHABLE:
-                        raise errors.PortUnreachable(ip_header=ip_header, icmp_header=icmp_header)
-                raise errors.DestinationUnreachable(
-                    ip_header=ip_header, icmp_header=icmp_header
-                )
-        if icmp_header["id"]:
-            if icmp_header["type"] == icmp_type.ECHO_REQUEST:  # filters out the ECHO_REQUEST itself.
-                _debug("ECHO_REQUEST received. Packet filtered out.")
-                continue
-            _debug("ICMP ID:", icmp_header["id"], ",", "Expected:", icmp_id)
-            is_icmp_id_matched = icmp_header["id"] == icmp_id  # ECHO_REPLY should match the ICMP ID
-            if not is_icmp_id_matched and not has_ip_header:  # When unprivileged on Linux, ICMP ID is rewrited by kernel.field.
-                icmp_id = sock.getsockname()[1]  # According to https://stackoverflow.com/a/14023878/4528364, icmp_id is the port number of the socket.
-                is_icmp_id_matched = icmp_header["id"] == icmp_id
-                if is_icmp_id_matched:
-                    _debug("ICMP ID rewrited by kernel: {}".format(icmp_id))
-            if not is_icmp_id_matched:
-                _debug("ICMP ID dismatch. Packet filtered out.")
-                continue
-            if icmp_header["seq"] != seq:  # ECHO_REPLY should match the ICMP SEQ field.
-                _debug("IMCP SEQ dismatch. Packet filtered out.")
-                continue
-            if icmp_header["type"] == icmp_type.ECHO_REPLY:
-                time_sent = struct.unpack(ICMP_TIME_FORMAT, icmp_payload_raw[0 : struct.calcsize(ICMP_TIME_FORMAT)])[0]
-                _debug("Received sent time: {} ({})".format(time.ctime(time_sent), time_sent))
-                return time_recv - time_sent
-        _debug("Uncatched ICMP packet:", icmp_header)
+    Returns:
+        int: 4 for IPv4, 6 for IPv6. Domain names are treated as IPv4.
+    """
+    try:
+        return ipaddress.ip_address(dest_addr).version
+    except ValueError:
+        return 4  # Default to IPv4 if the address is not a valid IP address.
 
 
-@_func_logger
-def ping(dest_addr: str, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, seq: int = 0, size: int = 56, interface: str = "", version=None):
+def _gen_icmp_id() -> int:
+    """Generate an ICMP id from the current Process ID and Thread ID.
+
+    Returns:
+        int: A 16-bit ICMP id.
     """
-    Send one ping to destination address with the given timeout.
+    thread_id = (threading.get_native_id() if hasattr(threading, "get_native_id") else threading.current_thread().ident)  # threading.get_native_id() is supported >= python3.8.
+    process_id = os.getpid()  # If ping() run under different process, thread_id may be identical.
+    return zlib.crc32("{}{}".format(process_id, thread_id).encode()) & 0xffff  # to avoid icmp_id collision.
+
+
+_icmp_id_offsets = itertools.count()  # Process-wide, so every call of `_new_icmp_id()` gets another id.
+
+
+def _new_icmp_id() -> int:
+    """Generate an ICMP id for a socket of its own, ex. of a sweep or a stream, which differs from the id of the current thread and from the last 65534 generated ids.
+
+    A raw socket receives the replies to every ICMP socket of the host, so sockets pinging at the same time must not share the id, otherwise a reply of the same seq is credited to both.
+
+    Returns:
+        int: A 16-bit ICMP id.
+    """
+    return (_gen_icmp_id() + 1 + next(_icmp_id_offsets) % 0xffff) & 0xffff
+
+
+def _set_ttl(sock: socket.socket, ttl: int) -> None:
+    """Set the Time-To-Live (Hop Limit for IPv6) of the outgoing packets.
 
     Args:
-        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/“fd00::1“
-        timeout (int): Time to wait for a response, in seconds. Default is 4s, same as Windows CMD. (default 4)
-        unit (str): The unit of returned value. "s" for seconds, "ms" for milliseconds. (default "s")
-        src_addr (str): The IP address to ping from. This is for multiple network interfaces. Ex. "192.168.1.20". (default "")
-        ttl (int | None): The Time-To-Live of the outgoing packet. Default is None, which means using OS default ttl -- 64 onLinux and macOS, and 128 on Windows. (default None)
-        seq (int): ICMP packet sequence, usually increases from 0 in the same process. (default 0)
-        size (int): The ICMP packet payload size in bytes. If the input of this is less than the bytes of a double format (usually 8), the size of ICMP packet payload is 8 bytes to hold a time. The max should be the router_MTU(Usually 1480) - IP_Header(20) - ICMP_Header(8). Default is 56, same as in macOS. (default 56)
+        sock (socket.socket): The socket.
+        ttl (int): The Time-To-Live.
+    """
+    if is_ipv4(sock):  # socket.IP_TTL and socket.SOL_IP are for IPv4.
+        try:  # IPPROTO_IP is for Windows and BSD Linux.
+            if sock.getsockopt(socket.IPPROTO_IP, socket.IP_TTL):  # TTL is a IPPROTO_IP option, not IPPROTO_ICMP. See: https://datatracker.ietf.org/doc/html/rfc1122#page-34
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+        except OSError as err:
+            _debug("Set Socket Option `IP_TTL` in `IPPROTO_IP` Failed: {}".format(err))
+        try:
+            if sock.getsockopt(socket.SOL_IP, socket.IP_TTL):
+                sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
+        except OSError as err:
+            _debug("Set Socket Option `IP_TTL` in `SOL_IP` Failed: {}".format(err))
+    else:  # IPv6
+        try:  # socket.IPV6_UNICAST_HOPS is for IPv6.
+            if sock.getsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS):  # Unicast Hop Limit should be used at the IPPROTO_IPV6 Layer, not the IPPROTO_ICMPV6 Layer. See: https://datatracker.ietf.org/doc/html/rfc3493#section-5.1
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, ttl)
+        except OSError as err:
+            _debug("Set Socket Option `IPV6_UNICAST_HOPS` in `IPPROTO_IPV6` Failed: {}".format(err))
+
+
+def _create_socket(version: int, ttl=None, interface: str = "", src_addr: str = "", icmp_id=None) -> socket.socket:
+    """Create and configure an ICMP socket.
+
+    Args:
+        version (int): The IP version to use. 4 for IPv4, 6 for IPv6.
+        ttl (int | None): The Time-To-Live of the outgoing packet. None for OS default. (default None)
         interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
-        ip_v (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, the function will try to determine the IP version from `dest_addr`. (default None)
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        icmp_id (int | None): The ICMP id of the pings. If `ping3.BPF_FILTER` is True, replies to other ids are dropped by the kernel. (default None)
 
     Returns:
-        float | None | False: The delay in seconds/milliseconds, False on error and None on timeout.
+        socket.socket: The configured socket. SOCK_RAW if permitted, otherwise SOCK_DGRAM.
 
     Raises:
-        PingError: Any PingError will raise again if `ping3.EXCEPTIONS` is True.
+        ValueError: If the IP version is not supported.
     """
-    if version is None:  # Auto detect IP version if not specified.
-        try:
-            ip = ipaddress.ip_address(dest_addr)
-            version = ip.version
-        except ValueError:
-            version = 4  # Default to IPv4 if the address is not a valid IP address.
-    _debug("Ping IPv{}:".format(version), dest_addr)
     if version == 4:
         socket_family = socket.AF_INET
         socket_protocol = socket.IPPROTO_ICMP
@@ -429,33 +1024,18 @@ def ping(dest_addr: str, timeout: int = 4, unit: str = "s", src_addr: str = "",
         socket_protocol = socket.IPPROTO_ICMPV6
     else:
         raise ValueError("Unsupported IP version: {}".format(version))
+    socket_type = capabilities().socket_type[version] or socket.SOCK_RAW  # Raise the error of SOCK_RAW if neither works.
     try:
-        sock = socket.socket(socket_family, socket.SOCK_RAW, socket_protocol)
+        sock = socket.socket(socket_family, socket_type, socket_protocol)
     except PermissionError as err:
-        if err.errno == errno.EPERM:  # [Errno 1] Operation not permitted
+        if socket_type == socket.SOCK_RAW and err.errno == errno.EPERM:  # [Errno 1] Operation not permitted
             _debug("`{}` when create socket.SOCK_RAW, using socket.SOCK_DGRAM instead.".format(err))
             sock = socket.socket(socket_family, socket.SOCK_DGRAM, socket_protocol)  # TBC: On Linux, using SOCK_DGRAM with IPPROTO_ICMPV6 will not work as expected. It will not send ICMP packets, but will send UDP packets instead.
         else:
             raise err
-    with sock:
+    try:
         if ttl:
-            if is_ipv4(sock):  # socket.IP_TTL and socket.SOL_IP are for IPv4.
-                try:  # IPPROTO_IP is for Windows and BSD Linux.
-                    if sock.getsockopt(socket.IPPROTO_IP, socket.IP_TTL):  # TTL is a IPPROTO_IP option, not IPPROTO_ICMP. See: https://datatracker.ietf.org/doc/html/rfc1122#page-34
-                        sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
-                except OSError as err:
-                    _debug("Set Socket Option `IP_TTL` in `IPPROTO_IP` Failed: {}".format(err))
-                try:
-                    if sock.getsockopt(socket.SOL_IP, socket.IP_TTL):
-                        sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
-                except OSError as err:
-                    _debug("Set Socket Option `IP_TTL` in `SOL_IP` Failed: {}".format(err))
-            else:  # IPv6
-                try:  # socket.IPV6_UNICAST_HOPS is for IPv6.
-                    if sock.getsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS):  # Unicast Hop Limit should be used at the IPPROTO_IPV6 Layer, not the IPPROTO_ICMPV6 Layer. See: https://datatracker.ietf.org/doc/html/rfc3493#section-5.1
-                        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, ttl)
-                except OSError as err:
-                    _debug("Set Socket Option `IPV6_UNICAST_HOPS` in `IPPROTO_IPV6` Failed: {}".format(err))
+            _set_ttl(sock, ttl)
         if interface:  # Packets will be sent from specified interface.
             sock.setsockopt(socket.SOL_SOCKET, SOCKET_SO_BINDTODEVICE, interface.encode())  # Linux only. Requires root.
             _debug("Socket Interface Binded:", interface)
@@ -464,29 +1044,405 @@ def ping(dest_addr: str, timeout: int = 4, unit: str = "s", src_addr: str = "",
                 sock.bind((src_addr, 0))  # only packets send to src_addr are received.
                 _debug("Socket Source Address Binded:", src_addr)
             # TODO: Support src_addr for IPv6. Currently, the source address is determined by the OS when sending packets.
-        thread_id = (threading.get_native_id() if hasattr(threading, "get_native_id") else threading.current_thread().ident)  # threading.get_native_id() is supported >= python3.8.
-        process_id = os.getpid()  # If ping() run under different process, thread_id may be identical.
-        icmp_id = zlib.crc32("{}{}".format(process_id, thread_id).encode()) & 0xffff  # to avoid icmp_id collision.
+        if TIMESTAMPING:
+            _enable_timestamps(sock)
+        if BPF_FILTER and icmp_id is not None:
+            _attach_filter(sock, icmp_id)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def _enlarge_receive_buffer(sock: socket.socket, size: int = BATCH_RECEIVE_BUFFER_SIZE) -> None:
+    """Enlarge the socket receive buffer for batch pings.
+
+    Args:
+        sock (socket.socket): The socket.
+        size (int): The receive buffer size in bytes. (default BATCH_RECEIVE_BUFFER_SIZE)
+    """
+    try:
+        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < size:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    except OSError as err:
+        _debug("Set Socket Option `SO_RCVBUF` in `SOL_SOCKET` Failed: {}".format(err))
+
+
+def _ping_with_socket(sock: socket.socket, dest_addr: str, icmp_id: int, seq: int, size: int, timeout: int, unit: str):
+    """Send one ping through an opened socket and wait for the reply.
+
+    Args:
+        sock (socket.socket): The configured ICMP socket.
+        dest_addr (str): The destination address.
+        icmp_id (int): ICMP packet id.
+        seq (int): ICMP packet sequence.
+        size (int): The ICMP packet payload size in bytes.
+        timeout (int): Time to wait for a response, in seconds.
+        unit (str): The unit of returned value. "s" for seconds, "ms" for milliseconds.
+
+    Returns:
+        float | None | False | PingResult: The delay in seconds/milliseconds, False on error and None on timeout. `PingResult` if `ping3.PING_RESULT` is True.
+
+    Raises:
+        PingError: Any PingError will raise again if `ping3.EXCEPTIONS` is True.
+    """
+    estimator = ADAPTIVE_TIMEOUT
+    if estimator is not None:
+        timeout = estimator.timeout(dest_addr, max_timeout=timeout)
+    reply = {} if PING_RESULT else None
+    try:
+        send_stamp = send_one_ping(sock=sock, dest_addr=dest_addr, icmp_id=icmp_id, seq=seq, size=size)
+        delay = receive_one_ping(sock=sock, icmp_id=icmp_id, seq=seq, timeout=timeout, send_stamp=send_stamp, reply=reply)  # in seconds
+    except errors.Timeout as err:
+        if estimator is not None:
+            estimator.timed_out(dest_addr)
+        _debug(err)
+        _raise(err)
+        return None if reply is None else PingResult(seq=seq, status=PingStatus.TIMEOUT)
+    except errors.PingError as err:
+        _debug(err)
+        _raise(err)
+        return False if reply is None else PingResult(seq=seq, status=PingStatus.from_error(err), **reply)
+    if delay is None:
+        return None if reply is None else PingResult(seq=seq, status=PingStatus.TIMEOUT)
+    if estimator is not None:
+        estimator.update(dest_addr, delay)
+    if reply is None:
+        return _to_unit(delay, unit)
+    return PingResult(rtt=_to_unit(delay, unit), seq=seq, status=PingStatus.REPLIED, **reply)
+
+
+@_func_logger
+def ping(dest_addr: str, timeout: int = DEFAULT_TIMEOUT, unit: str = "s", src_addr: str = "", ttl=None, seq: int = 0, size: int = 56, interface: str = "", version=None):
+    """
+    Send one ping to destination address with the given timeout.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/“fd00::1“
+        timeout (int): Time to wait for a response, in seconds. Default is 4s, same as Windows CMD. (default 4)
+        unit (str): The unit of returned value. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. This is for multiple network interfaces. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packet. Default is None, which means using OS default ttl -- 64 onLinux and macOS, and 128 on Windows. (default None)
+        seq (int): ICMP packet sequence, usually increases from 0 in the same process. (default 0)
+        size (int): The ICMP packet payload size in bytes. If the input of this is less than the bytes of a double format (usually 8), the size of ICMP packet payload is 8 bytes to hold a time. The max should be the router_MTU(Usually 1480) - IP_Header(20) - ICMP_Header(8). Default is 56, same as in macOS. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        ip_v (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, the function will try to determine the IP version from `dest_addr`. (default None)
+
+    Returns:
+        float | None | False | PingResult: The delay in seconds/milliseconds, False on error and None on timeout. `PingResult` with the details of the reply if `ping3.PING_RESULT` is True.
+
+    Raises:
+        PingError: Any PingError will raise again if `ping3.EXCEPTIONS` is True.
+    """
+    if version is None:  # Auto detect IP version if not specified.
+        version = _detect_version(dest_addr)
+    if DEBUG or TRACER is not None:
+        _debug("Ping IPv{}:".format(version), dest_addr)
+    icmp_id = _gen_icmp_id()
+    with _create_socket(version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=icmp_id) as sock:
+        return _ping_with_socket(sock, dest_addr=dest_addr, icmp_id=icmp_id, seq=seq, size=size, timeout=timeout, unit=unit)
+
+
+@_func_logger
+def is_alive(dest_addr: str, probes: int = 3, timeout: float = 4, src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None) -> bool:
+    """
+    Check if the destination is up. All the probes are sent at once, and it returns on the first reply.
+
+    Pinging up to N times in a row tolerates lost packets but takes up to N timeouts. The probes here are sent back-to-back with different sequences over one socket, so the same loss is tolerated within one timeout.
+    Late replies of the other probes are dropped with the socket.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+        probes (int): How many probes to send, in 1~65536. (default 3)
+        timeout (float): Time to wait for any reply, in seconds. (default 4)
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from `dest_addr`. (default None)
+
+    Returns:
+        bool: True if any probe is replied. False on timeout, if the host is unknown, or if every probe is reported unreachable. `ping3.EXCEPTIONS` does not apply.
+
+    Raises:
+        ValueError: If the probes are not in 1~65536.
+    """
+    if not 0 < probes <= 0x10000:
+        raise ValueError("Probes must be in 1~65536: {}".format(probes))
+    if version is None:
+        version = _detect_version(dest_addr)
+    try:
+        sock_addr = _resolve_sock_addr(dest_addr, version) if DNS_CACHE is None else DNS_CACHE.resolve(dest_addr, version)
+    except errors.HostUnknown as err:
+        _debug(err)
+        return False
+    dest_ip = sock_addr[0]  # Resolve once, not for every probe.
+    icmp_id = _gen_icmp_id()
+    recv_buffer = _get_receive_buffer()
+    reactor = get_reactor()
+    pending = set()  # Sequences of the probes not replied yet.
+    state = {"replied": False, "failed": 0}  # Failed probes, by send errors or ICMP error replies.
+
+    def on_readable(sock):
+        recv_size = sock.recv_into(recv_buffer)
+        reply = _parse_reply(sock, recv_buffer, icmp_id, recv_size, seqs=pending)
+        if reply is None:
+            return
+        seq, _, err = reply
+        pending.discard(seq)
+        if err is None:
+            state["replied"] = True
+        else:
+            _debug(err)
+            state["failed"] += 1
+
+    def done():
+        return state["replied"] or state["failed"] == probes
+
+    with _create_socket(version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=icmp_id) as sock:
+        reactor.register(sock, on_readable)
+        try:
+            for seq in range(probes):
+                try:
+                    send_one_ping(sock=sock, dest_addr=dest_ip, icmp_id=icmp_id, seq=seq, size=size)
+                except (errors.PingError, OSError) as err:
+                    _debug(err)
+                    state["failed"] += 1
+                else:
+                    pending.add(seq)
+            reactor.run_until(done, deadline=time.monotonic() + timeout)
+        finally:
+            reactor.unregister(sock)
+    return state["replied"]
+
+
+class Pinger:
+    """Reusable pinger which keeps its ICMP sockets open across pings.
+
+    `ping()` creates, configures and closes a socket for every call. A Pinger opens one socket per IP version on first use and reuses it, which is much cheaper when pinging frequently.
+    A Pinger is not thread-safe, use one Pinger per thread.
+
+    Example:
+        >>> with ping3.Pinger(timeout=2, unit="ms") as pinger:
+        ...     pinger.ping("example.com")
+        215.9627876281738
+    """
+
+    def __init__(self, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, seq: int = 0, size: int = 56, interface: str = "", version=None):
+        """
+        Args:
+            timeout (int): Time to wait for a response, in seconds. (default 4)
+            unit (str): The unit of returned value. "s" for seconds, "ms" for milliseconds. (default "s")
+            src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+            ttl (int | None): The Time-To-Live of the outgoing packet. None for OS default. (default None)
+            seq (int): The first ICMP packet sequence. Increases by 1 after every ping. (default 0)
+            size (int): The ICMP packet payload size in bytes. (default 56)
+            interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+            version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from each `dest_addr`. (default None)
+        """
+        self.timeout = timeout
+        self.unit = unit
+        self.src_addr = src_addr
+        self.ttl = ttl
+        self.seq = seq
+        self.size = size
+        self.interface = interface
+        self.version = version
+        self.icmp_id = _gen_icmp_id()
+        self._socks = {}  # IP version -> socket.socket
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def get_socket(self, version: int) -> socket.socket:
+        """Get the socket of the IP version, create it if not opened yet.
+
+        Args:
+            version (int): The IP version. 4 for IPv4, 6 for IPv6.
+
+        Returns:
+            socket.socket: The configured socket.
+        """
+        sock = self._socks.get(version)
+        if sock is None:
+            sock = _create_socket(version, ttl=self.ttl, interface=self.interface, src_addr=self.src_addr, icmp_id=self.icmp_id)
+            self._socks[version] = sock
+        return sock
+
+    def ping(self, dest_addr: str, seq=None):
+        """Send one ping to destination address through the opened socket.
+
+        Args:
+            dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+            seq (int | None): ICMP packet sequence. None for the next sequence of this Pinger. (default None)
+
+        Returns:
+            float | None | False | PingResult: The delay in seconds/milliseconds, False on error and None on timeout. `PingResult` if `ping3.PING_RESULT` is True.
+
+        Raises:
+            PingError: Any PingError will raise again if `ping3.EXCEPTIONS` is True.
+        """
+        if seq is None:
+            seq = self.seq
+        self.seq = (seq + 1) & 0xffff  # ICMP sequence is 16-bit.
+        version = self.version if self.version is not None else _detect_version(dest_addr)
+        if DEBUG or TRACER is not None:
+            _debug("Pinger ping IPv{}:".format(version), dest_addr)
+        return _ping_with_socket(self.get_socket(version), dest_addr=dest_addr, icmp_id=self.icmp_id, seq=seq, size=self.size, timeout=self.timeout, unit=self.unit)
+
+    def close(self) -> None:
+        """Close all the opened sockets. The Pinger reopens sockets if ping again."""
+        socks = getattr(self, "_socks", {})
+        while socks:
+            socks.popitem()[1].close()
+
+
+@_func_logger
+def ping_many(dest_addrs, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None) -> dict:
+    """
+    Send one ping to each destination address at once and wait for all the replies together.
+
+    All the echo requests of the same IP version are sent from one socket, each destination has its own ICMP sequence.
+    The replies are collected in a single receive loop until every destination has answered or the shared timeout is reached, so the total time is about one `timeout` instead of one per destination.
+
+    Args:
+        dest_addrs (iterable[str]): The destination addresses, can be IP addresses or domain names. Ex. ["192.168.1.1", "example.com", "fd00::1"]
+        timeout (int): Time to wait for all the responses, in seconds. (default 4)
+        unit (str): The unit of returned values. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from each destination address. (default None)
+
+    Returns:
+        dict: A map of destination address to the delay in seconds/milliseconds, False on error and None on timeout.
+            Errors are reported per destination, `ping3.EXCEPTIONS` does not apply.
+    """
+    return _ping_many(dest_addrs, _gen_icmp_id(), timeout=timeout, unit=unit, src_addr=src_addr, ttl=ttl, size=size, interface=interface, version=version)
+
+
+def _send_batch(sock: socket.socket, group: list, start: int, batch_size: int, icmp_id: int, size: int, seqs: dict, results: dict) -> None:
+    """Send echo requests to group[start:start + batch_size] by one sendmmsg(), the sequence of each is its index in the group.
+
+    Sent sequences are added to `seqs`, and destinations which fail to resolve or send are marked False in `results`.
+    """
+    version = 4 if is_ipv4(sock) else 6
+    packets, sock_addrs, sent = [], [], []
+    for seq, dest_addr in enumerate(group[start:start + batch_size], start):
         try:
-            send_one_ping(sock=sock, dest_addr=dest_addr, icmp_id=icmp_id, seq=seq, size=size)
-            delay = receive_one_ping(sock=sock, icmp_id=icmp_id, seq=seq, timeout=timeout)  # in seconds
-        except errors.Timeout as err:
+            sock_addr = _resolve_sock_addr(dest_addr, version) if DNS_CACHE is None else DNS_CACHE.resolve(dest_addr, version)
+            packets.append(bytes(_pack_echo_request(sock, sock_addr, icmp_id=icmp_id, seq=seq, size=size)))  # Copied, the template buffer is reused.
+        except (errors.PingError, OSError) as err:
             _debug(err)
-            _raise(err)
-            return None
-        except errors.PingError as err:
+            results[dest_addr] = False
+            continue
+        sock_addrs.append(sock_addr)
+        sent.append((seq, dest_addr))
+    for (seq, dest_addr), err in zip(sent, mmsg.send_batch(sock, packets, sock_addrs)):
+        if err is not None:
             _debug(err)
-            _raise(err)
-            return False
-        if delay is None:
-            return None
-        if unit == "ms":
-            delay *= 1000  # in milliseconds
-        return delay
+            results[dest_addr] = False
+        else:
+            seqs[seq] = dest_addr
+
+
+def _ping_many(dest_addrs, icmp_id: int, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None) -> dict:
+    """`ping_many()` with the given ICMP id, ex. an id of the range reserved for a worker process of `ping_pool()`."""
+    results = {dest_addr: None for dest_addr in dest_addrs}  # Timeout unless replied.
+    groups = {}  # (IP version, socket index) -> list of destination addresses. Each socket holds up to 65536 sequences.
+    for dest_addr in results:
+        ip_version = version if version is not None else _detect_version(dest_addr)
+        index = 0
+        while len(groups.setdefault((ip_version, index), [])) > 0xffff:
+            index += 1
+        groups[(ip_version, index)].append(dest_addr)
+    pending = {}  # socket -> {seq: dest_addr}
+    icmp_ids = {}  # socket -> ICMP id. Sockets of the same IP version count their sequences from 0 and receive the replies of each other, so each has its own id.
+    send_stamps = {}  # socket -> {seq: send_stamp}, if `TIMESTAMPING` is True.
+    timestamping = TIMESTAMPING
+    batch_size = MMSG_BATCH_SIZE if MMSG and not timestamping and mmsg.available() else 0  # Kernel timestamps are not received by recvmmsg().
+    receive_batch = mmsg._get_receive_batch(batch_size) if batch_size else None
+
+    recv_buffer = _get_receive_buffer()
+    reactor = get_reactor()
+
+    def on_readable(sock):
+        if receive_batch is not None:
+            packets = receive_batch.receive(sock)
+            time_recv = time.time()
+            for buffer, recv_size in packets:
+                on_reply(sock, buffer, recv_size, time_recv)
+            return
+        if timestamping:
+            recv_size, kernel_recv, _ = _recv_timestamped(sock, recv_buffer)
+            on_reply(sock, recv_buffer, recv_size, time.time(), time.perf_counter(), kernel_recv)
+        else:
+            recv_size = sock.recv_into(recv_buffer)
+            on_reply(sock, recv_buffer, recv_size, time.time())
+
+    def on_reply(sock, recv_buffer, recv_size, time_recv, perf_recv=None, kernel_recv=None):
+        seqs = pending[sock]
+        reply = _parse_reply(sock, recv_buffer, icmp_ids[sock], recv_size, seqs=seqs)
+        if reply is None:
+            return
+        reply_seq, time_sent, err = reply
+        dest_addr = seqs.pop(reply_seq)
+        if err is not None:
+            _debug(err)
+            results[dest_addr] = False
+            return
+        send_stamp = send_stamps[sock].pop(reply_seq, None) if timestamping else None
+        delay = time_recv - time_sent if send_stamp is None else _stamped_delay(send_stamp, perf_recv, kernel_recv)
+        results[dest_addr] = _to_unit(delay, unit)
+
+    def done():
+        return not any(pending.values())
+
+    try:
+        for (ip_version, index), group in groups.items():
+            sock_icmp_id = icmp_id if index == 0 else _new_icmp_id()
+            sock = _create_socket(ip_version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=sock_icmp_id)
+            icmp_ids[sock] = sock_icmp_id
+            pending[sock] = seqs = {}
+            send_stamps[sock] = stamps = {}
+            reactor.register(sock, on_readable)
+            _enlarge_receive_buffer(sock)
+            if batch_size:
+                for start in range(0, len(group), batch_size):
+                    _send_batch(sock, group, start, batch_size, sock_icmp_id, size, seqs, results)
+                    while reactor.run_once(deadline=0):  # Drain the replies while sending.
+                        pass
+                continue
+            for seq, dest_addr in enumerate(group):
+                try:
+                    send_stamp = send_one_ping(sock=sock, dest_addr=dest_addr, icmp_id=sock_icmp_id, seq=seq, size=size)
+                except (errors.PingError, OSError) as err:
+                    _debug(err)
+                    results[dest_addr] = False
+                else:
+                    seqs[seq] = dest_addr
+                    if send_stamp is not None:
+                        stamps[seq] = send_stamp
+                while reactor.run_once(deadline=0):  # Drain the replies while sending, otherwise the socket receive buffer may overflow.
+                    pass
+        if not reactor.run_until(done, deadline=time.monotonic() + timeout):
+            _debug("Timeout: {} replies left.".format(sum(len(seqs) for seqs in pending.values())))
+    finally:
+        for sock in pending:
+            reactor.unregister(sock)
+            sock.close()
+    return results
 
 
 @_func_logger
-def verbose_ping(dest_addr: str, count: int = 4, interval: float = 0, *args, **kwargs):
+def verbose_ping(dest_addr: str, count: int = 4, interval: float = 0, *args, stats=None, recorder=None, **kwargs):
     """
     Send pings to destination address with the given timeout and display the result.
 
@@ -494,12 +1450,20 @@ def verbose_ping(dest_addr: str, count: int = 4, interval: float = 0, *args, **k
         dest_addr (str): The destination address. Ex. "192.168.1.1"/"example.com"
         count (int): How many pings should be sent. 0 means infinite loops until manually stopped. Default is 4, same as Windows CMD. (default 4)
         interval (float): How many seconds between two packets. Default is 0, which means send the next packet as soon as the previous one responsed. (default 0)
+        stats (PingStats | None): Count the pings into the given statistics, which are kept even if interrupted. None for new statistics. (default None)
+        recorder (RttRecorder | None): Append every ping to the RTT log. (default None)
         *args and **kwargs (any): And all the other arguments available in ping() except `seq`.
 
     Output:
         Formatted ping results printed.
+
+    Returns:
+        PingStats: The statistics of the pings, in the same unit as the delays.
     """
+    if stats is None:
+        stats = PingStats()
     timeout = kwargs.get("timeout")
+    max_timeout = DEFAULT_TIMEOUT if timeout is None else timeout  # The timeout applied by ping(), bounding the adaptive timeout.
     src = kwargs.get("src_addr")
     unit = kwargs.setdefault("unit", "ms")
     i = 0
@@ -509,12 +1473,18 @@ def verbose_ping(dest_addr: str, count: int = 4, interval: float = 0, *args, **k
         output_text = "ping '{}'".format(dest_addr)
         output_text += " from '{}'".format(src) if src else ""
         output_text += " ... "
-        delay = ping(dest_addr, seq=i, *args, **kwargs)
+        waited = timeout if ADAPTIVE_TIMEOUT is None else round(ADAPTIVE_TIMEOUT.timeout(dest_addr, max_timeout=max_timeout), 3)  # The adaptive timeout, before updated by this ping.
+        result = ping(dest_addr, seq=i, *args, **kwargs)
+        delay = result.delay if type(result) is PingResult else result  # With `ping3.PING_RESULT`.
+        stats.add(delay)
+        if recorder is not None:
+            recorder.record(dest_addr, result, unit=unit)
         print(output_text, end="")
         if delay is None:
-            print("Timeout > {}s".format(timeout) if timeout else "Timeout")
+            print("Timeout > {}s".format(waited) if waited else "Timeout")
         elif delay is False:
             print("Error")
         else:
             print("{value}{unit}".format(value=int(delay), unit=unit))
         i += 1
+    return stats
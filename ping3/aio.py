@@ -0,0 +1,245 @@
+import asyncio
+import ipaddress
+import socket
+import time
+
+import ping3
+from . import errors
+
+
+class _AsyncSocket:
+    """An ICMP socket registered with an asyncio event loop.
+
+    The socket is watched by `loop.add_reader()`. Every received reply is parsed by `ping3._parse_reply()` and resolves the future of its ICMP sequence.
+    Sockets with the same event loop and options are shared by all the in-flight pings, and closed when the last ping finished.
+    """
+
+    def __init__(self, loop, key, version: int, ttl=None, interface: str = "", src_addr: str = ""):
+        self.loop = loop
+        self.key = key
+        self.icmp_id = ping3._new_icmp_id()  # Sockets of other options count their sequences from 0 too, so they must not share the id.
+        self.sock = ping3._create_socket(version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=self.icmp_id)
+        self.sock.setblocking(False)
+        ping3._enlarge_receive_buffer(self.sock)  # Replies may arrive before the event loop reads them.
+        self.timestamping = ping3.TIMESTAMPING  # The socket is created with SO_TIMESTAMPNS if True.
+        self.waiters = {}  # seq -> asyncio.Future
+        self.send_stamps = {}  # seq -> send stamp of `ping3.send_one_ping()`
+        self.next_seq = 0
+        try:
+            loop.add_reader(self.sock.fileno(), self._on_readable)  # Requires a selector event loop, not supported by ProactorEventLoop on Windows.
+        except Exception:
+            self.sock.close()
+            raise
+
+    def _on_readable(self) -> None:
+        recv_buffer = ping3._get_receive_buffer()
+        while True:
+            try:
+                if self.timestamping:
+                    recv_size, kernel_recv, _ = ping3._recv_timestamped(self.sock, recv_buffer)
+                    perf_recv = time.perf_counter()
+                else:
+                    recv_size = self.sock.recv_into(recv_buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            time_recv = time.time()
+            reply = ping3._parse_reply(self.sock, recv_buffer, self.icmp_id, recv_size, seqs=self.waiters)
+            if reply is None:
+                continue
+            reply_seq, time_sent, err = reply
+            future = self.waiters[reply_seq]
+            if future.done():  # Duplicated reply, or cancelled by timeout.
+                continue
+            if err is not None:
+                future.set_exception(err)
+                continue
+            send_stamp = self.send_stamps.get(reply_seq)
+            if send_stamp is None:
+                future.set_result(time_recv - time_sent)
+            else:
+                future.set_result(ping3._stamped_delay(send_stamp, perf_recv, kernel_recv))
+
+    def reserve(self, seq=None) -> tuple:
+        """Reserve an ICMP sequence for a new ping.
+
+        Args:
+            seq (int | None): The ICMP sequence to reserve. None for the next free sequence. (default None)
+
+        Returns:
+            tuple: (seq, asyncio.Future). The future is resolved with the delay in seconds, or the PingError.
+
+        Raises:
+            ValueError: If the sequence is already in flight, or all the 65536 sequences are in flight.
+        """
+        if seq is None:
+            if len(self.waiters) > 0xffff:
+                raise ValueError("All ICMP sequences are in flight.")
+            seq = self.next_seq
+            while seq in self.waiters:
+                seq = (seq + 1) & 0xffff
+            self.next_seq = (seq + 1) & 0xffff
+        elif seq in self.waiters:
+            raise ValueError("ICMP sequence {} is already in flight.".format(seq))
+        future = self.loop.create_future()
+        self.waiters[seq] = future
+        return seq, future
+
+    def release(self, seq: int) -> None:
+        """Release the ICMP sequence, and close the socket if there is no more ping in flight.
+
+        Args:
+            seq (int): The reserved ICMP sequence.
+        """
+        self.waiters.pop(seq, None)
+        self.send_stamps.pop(seq, None)
+        if not self.waiters:
+            _sockets.pop(self.key, None)
+            self.loop.remove_reader(self.sock.fileno())
+            self.sock.close()
+
+
+_sockets = {}  # (loop, version, ttl, interface, src_addr) -> _AsyncSocket
+
+
+def _get_socket(loop, version: int, ttl=None, interface: str = "", src_addr: str = "") -> _AsyncSocket:
+    key = (loop, version, ttl, interface, src_addr)
+    async_sock = _sockets.get(key)
+    if async_sock is None:
+        async_sock = _AsyncSocket(loop, key, version, ttl=ttl, interface=interface, src_addr=src_addr)
+        _sockets[key] = async_sock
+    return async_sock
+
+
+async def _resolve(loop, dest_addr: str, version: int) -> str:
+    """Resolve domain name to IP address without blocking the event loop.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The running event loop.
+        dest_addr (str): The destination address, can be an IP address or a domain name.
+        version (int): The IP version. 4 for IPv4, 6 for IPv6.
+
+    Returns:
+        str: The IP address.
+
+    Raises:
+        HostUnknown: If destination address is a domain name and cannot resolved.
+    """
+    try:
+        ipaddress.ip_address(dest_addr)
+        return dest_addr  # IP address leaves unchanged.
+    except ValueError:
+        pass
+    dns_cache = ping3.DNS_CACHE
+    if dns_cache is not None:
+        sock_addr = dns_cache.lookup(dest_addr, version)
+        if sock_addr is not None:
+            return sock_addr[0]
+    family = socket.AF_INET if version == 4 else socket.AF_INET6
+    try:
+        addr_info = await loop.getaddrinfo(dest_addr, None, family=family)
+    except socket.gaierror as err:
+        if dns_cache is not None:
+            dns_cache.store(dest_addr, version, None)
+        raise errors.HostUnknown(dest_addr=dest_addr) from err
+    if dns_cache is not None:
+        dns_cache.store(dest_addr, version, addr_info[0][4])
+    return addr_info[0][4][0]
+
+
+async def _async_ping(dest_addr: str, timeout: int = 4, src_addr: str = "", ttl=None, seq=None, size: int = 56, interface: str = "", version=None) -> float:
+    """Send one ping and wait for the reply without blocking the event loop.
+
+    Returns:
+        float | ping3.Delay: The delay in seconds. `ping3.Delay` if `ping3.TIMESTAMPING` is True.
+
+    Raises:
+        PingError: Any PingError, including Timeout.
+    """
+    loop = asyncio.get_event_loop()
+    if version is None:
+        version = ping3._detect_version(dest_addr)
+    ip_addr = await _resolve(loop, dest_addr, version)
+    async_sock = _get_socket(loop, version, ttl=ttl, interface=interface, src_addr=src_addr)
+    seq, future = async_sock.reserve(seq)
+    try:
+        send_stamp = ping3.send_one_ping(sock=async_sock.sock, dest_addr=ip_addr, icmp_id=async_sock.icmp_id, seq=seq, size=size)
+        if send_stamp is not None and async_sock.timestamping:
+            async_sock.send_stamps[seq] = send_stamp
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise errors.Timeout(timeout=timeout) from None
+    finally:
+        async_sock.release(seq)
+
+
+async def async_ping(dest_addr: str, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, seq=None, size: int = 56, interface: str = "", version=None):
+    """
+    Send one ping to destination address with the given timeout, without blocking the event loop.
+
+    Concurrent pings with the same options share one ICMP socket registered with the event loop, so thousands of in-flight pings cost coroutines instead of threads.
+    Requires a selector event loop, which is the default on Linux and macOS.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+        timeout (int): Time to wait for a response, in seconds. (default 4)
+        unit (str): The unit of returned value. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packet. None for OS default. (default None)
+        seq (int | None): ICMP packet sequence. None for the next free sequence of the shared socket. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from `dest_addr`. (default None)
+
+    Returns:
+        float | None | False: The delay in seconds/milliseconds, False on error and None on timeout.
+
+    Raises:
+        PingError: Any PingError will raise again if `ping3.EXCEPTIONS` is True.
+    """
+    try:
+        delay = await _async_ping(dest_addr, timeout=timeout, src_addr=src_addr, ttl=ttl, seq=seq, size=size, interface=interface, version=version)
+    except errors.Timeout as err:
+        ping3._debug(err)
+        ping3._raise(err)
+        return None
+    except errors.PingError as err:
+        ping3._debug(err)
+        ping3._raise(err)
+        return False
+    return ping3._to_unit(delay, unit)
+
+
+async def async_ping_many(dest_addrs, timeout: int = 4, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None) -> dict:
+    """
+    Send one ping to each destination address at once and wait for all the replies together, without blocking the event loop.
+
+    Args:
+        dest_addrs (iterable[str]): The destination addresses, can be IP addresses or domain names. Ex. ["192.168.1.1", "example.com", "fd00::1"]
+        timeout (int): Time to wait for each response, in seconds. All the pings are in flight together. (default 4)
+        unit (str): The unit of returned values. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from each destination address. (default None)
+
+    Returns:
+        dict: A map of destination address to the delay in seconds/milliseconds, False on error and None on timeout.
+            Errors are reported per destination, `ping3.EXCEPTIONS` does not apply.
+    """
+    dest_addrs = list(dict.fromkeys(dest_addrs))  # Remove duplicates and keep the order.
+    replies = await asyncio.gather(*(_async_ping(dest_addr, timeout=timeout, src_addr=src_addr, ttl=ttl, size=size, interface=interface, version=version) for dest_addr in dest_addrs), return_exceptions=True)
+    results = {}
+    for dest_addr, reply in zip(dest_addrs, replies):
+        if isinstance(reply, errors.Timeout):
+            ping3._debug(reply)
+            results[dest_addr] = None
+        elif isinstance(reply, (errors.PingError, OSError)):
+            ping3._debug(reply)
+            results[dest_addr] = False
+        elif isinstance(reply, BaseException):
+            raise reply
+        else:
+            results[dest_addr] = ping3._to_unit(reply, unit)
+    return results
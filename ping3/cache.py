@@ -0,0 +1,213 @@
+import collections
+import threading
+import time
+
+import ping3
+from . import errors
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries expire after a time-to-live.
+
+    The least recently used entry is evicted when the cache is full. Expired entries are dropped on access.
+    `hits` and `misses` count the lookups, for verifying the cache works.
+    """
+
+    def __init__(self, ttl: float = 60, maxsize: int = 1024):
+        """
+        Args:
+            ttl (float): Default seconds an entry lives. (default 60)
+            maxsize (int): Max number of entries. (default 1024)
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (expire_time, value)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state["_entries"] = self._entries.copy()
+        del state["_lock"]  # Locks cannot be pickled, ex. sent to the worker processes of `ping_pool()`.
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key, default=None):
+        """Get the value of the key, and mark it as recently used.
+
+        Args:
+            key (hashable): The key.
+            default (any): Returned if the key is not cached or expired. (default None)
+
+        Returns:
+            any: The cached value or `default`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]  # Expired.
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None) -> None:
+        """Cache the value of the key, evict the least recently used entry if full.
+
+        Args:
+            key (hashable): The key.
+            value (any): The value.
+            ttl (float | None): Seconds the entry lives. None for the default `ttl` of the cache. (default None)
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove the key from the cache.
+
+        Args:
+            key (hashable): The key.
+            default (any): Returned if the key is not cached. (default None)
+
+        Returns:
+            any: The removed value or `default`.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove all the entries. The counters are not reset."""
+        with self._lock:
+            self._entries.clear()
+
+
+class DnsCache(TTLCache):
+    """Cache of resolved destination addresses, used by `send_one_ping()` when assigned to `ping3.DNS_CACHE`.
+
+    Unknown hosts are cached too (negative caching), so `HostUnknown` is raised again without asking the resolver.
+
+    Example:
+        >>> ping3.DNS_CACHE = ping3.DnsCache(ttl=300, maxsize=4096)
+        >>> ping3.DNS_CACHE.prefetch(["example.com", "example.org"])
+        >>> ping3.ping("example.com")  # Resolved from the cache.
+        0.215697261510079666
+        >>> ping3.DNS_CACHE.hits, ping3.DNS_CACHE.misses
+        (1, 2)
+    """
+
+    _UNKNOWN = object()  # Cached value for unknown hosts.
+
+    def __init__(self, ttl: float = 60, maxsize: int = 1024, negative_ttl: float = 10):
+        """
+        Args:
+            ttl (float): Seconds a resolved address lives. (default 60)
+            maxsize (int): Max number of cached addresses. (default 1024)
+            negative_ttl (float): Seconds an unknown host lives. 0 to disable negative caching. (default 10)
+        """
+        super().__init__(ttl=ttl, maxsize=maxsize)
+        self.negative_ttl = negative_ttl
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_entries"] = collections.OrderedDict((key, entry) for key, entry in state["_entries"].items() if entry[1] is not self._UNKNOWN)  # The marker of unknown hosts is not kept by pickling.
+        return state
+
+    def lookup(self, dest_addr: str, version: int):
+        """Look up the cached socket address without resolving.
+
+        Args:
+            dest_addr (str): The destination address, can be an IP address or a domain name.
+            version (int): The IP version. 4 for IPv4, 6 for IPv6.
+
+        Returns:
+            tuple | None: The socket address, (ip, port) for IPv4 and (ip, port, flowinfo, scopeid) for IPv6. None if not cached.
+
+        Raises:
+            HostUnknown: If the host is cached as unknown.
+        """
+        sock_addr = self.get((dest_addr, version))
+        if sock_addr is self._UNKNOWN:
+            raise errors.HostUnknown(dest_addr=dest_addr)
+        return sock_addr
+
+    def store(self, dest_addr: str, version: int, sock_addr) -> None:
+        """Cache the socket address of the destination address.
+
+        Args:
+            dest_addr (str): The destination address, can be an IP address or a domain name.
+            version (int): The IP version. 4 for IPv4, 6 for IPv6.
+            sock_addr (tuple | None): The socket address. None to cache the host as unknown.
+        """
+        if sock_addr is not None:
+            self.set((dest_addr, version), sock_addr)
+        elif self.negative_ttl > 0:
+            self.set((dest_addr, version), self._UNKNOWN, ttl=self.negative_ttl)
+
+    def resolve(self, dest_addr: str, version: int) -> tuple:
+        """Resolve the destination address, from the cache if possible.
+
+        Args:
+            dest_addr (str): The destination address, can be an IP address or a domain name.
+            version (int): The IP version. 4 for IPv4, 6 for IPv6.
+
+        Returns:
+            tuple: The socket address, (ip, port) for IPv4 and (ip, port, flowinfo, scopeid) for IPv6.
+
+        Raises:
+            HostUnknown: If destination address is a domain name and cannot resolved.
+        """
+        sock_addr = self.lookup(dest_addr, version)
+        if sock_addr is not None:
+            return sock_addr
+        try:
+            sock_addr = ping3._resolve_sock_addr(dest_addr, version)
+        except errors.HostUnknown:
+            self.store(dest_addr, version, None)
+            raise
+        self.store(dest_addr, version, sock_addr)
+        return sock_addr
+
+    def prefetch(self, dest_addrs, version=None) -> None:
+        """Resolve the destination addresses into the cache ahead of pinging. Unknown hosts are cached as unknown.
+
+        Args:
+            dest_addrs (iterable[str]): The destination addresses.
+            version (int | None): The IP version. 4 for IPv4, 6 for IPv6. If None, detect from each destination address. (default None)
+        """
+        for dest_addr in dest_addrs:
+            ip_version = version if version is not None else ping3._detect_version(dest_addr)
+            try:
+                self.set((dest_addr, ip_version), ping3._resolve_sock_addr(dest_addr, ip_version))
+            except errors.HostUnknown:
+                self.store(dest_addr, ip_version, None)
+
+    def invalidate(self, dest_addr=None) -> None:
+        """Remove the destination address from the cache.
+
+        Args:
+            dest_addr (str | None): The destination address to remove, for all IP versions. None to remove all. (default None)
+        """
+        if dest_addr is None:
+            self.clear()
+            return
+        for version in (4, 6):
+            self.pop((dest_addr, version))
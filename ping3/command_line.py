@@ -27,9 +27,22 @@ def main(assigned_args = None) -> None:
     parser.add_argument("-E", "--exceptions", action="store_true", dest="exceptions", help="Turn on EXCEPTIONS mode.")
     parser.add_argument("-4", "--ipv4", action="store_true", dest="ipv4", help="Force ping an IPv4 address. Default is None for auto-detect.")
     parser.add_argument("-6", "--ipv6", action="store_true", dest="ipv6", help="Force ping an IPv6 address. Default is None for auto-detect.")
+    parser.add_argument("--alive", action="store_true", dest="alive", help="Check if the destination is up by COUNT probes sent at once, and return on the first reply. Prints alive or down.")
+    parser.add_argument("--adaptive-timeout", action="store_true", dest="adaptive_timeout", help="Adapt the timeout of each destination to its round-trip times (SRTT + 4 * RTTVAR), at most TIMEOUT.")
+    parser.add_argument("--rate", dest="rate", metavar="RATE", type=float, default=None, help="Send COUNT pings at RATE pings per second without waiting for replies, and print the statistics. Default is None.")
+    parser.add_argument("--flood", action="store_true", dest="flood", help="Send COUNT pings as fast as possible without waiting for replies, and print the statistics.")
+    parser.add_argument("--duration", dest="duration", metavar="DURATION", type=float, default=None, help="With --rate or --flood, stop sending after DURATION seconds. COUNT 0 means no limit. Default is None.")
+    parser.add_argument("--traceroute", action="store_true", dest="traceroute", help="Trace the route to the destination instead of ping. Probes of all the hops are sent at once.")
+    parser.add_argument("--max-hops", dest="max_hops", metavar="MAX_HOPS", type=int, default=30, help="With --traceroute, the max Time-To-Live to probe. Default is 30.")
+    parser.add_argument("--record", dest="record", metavar="FILE", default=None, help="Append every ping to FILE, a memory-mapped ring file of fixed size. Read it by ping3.RttLog. Default is None.")
+    parser.add_argument("--record-capacity", dest="record_capacity", metavar="CAPACITY", type=int, default=1048576, help="With --record, max pings kept when FILE is created, 20 bytes each. Default is 1048576.")
     args = parser.parse_args(assigned_args)
+    if (args.rate is not None or args.flood) and not args.count and args.duration is None:
+        parser.error("--rate or --flood with COUNT 0 requires --duration.")
     ping3.DEBUG = args.debug
     ping3.EXCEPTIONS = args.exceptions
+    ping3.ADAPTIVE_TIMEOUT = ping3.RttEstimator(max_timeout=args.timeout) if args.adaptive_timeout else None
+    ping3.PING_RESULT = bool(args.record)  # Record the kind of each error.
     if args.ipv4:
         args.version = 4
     elif args.ipv6:
@@ -37,8 +50,43 @@ def main(assigned_args = None) -> None:
     else:
         args.version = None
 
-    for addr in args.dest_addr:
-        ping3.verbose_ping(addr, count=args.count, ttl=args.ttl, timeout=args.timeout, size=args.size, interval=args.interval, interface=args.interface, src_addr=args.src_addr, version=args.version)
+    if args.alive:
+        for addr in args.dest_addr:
+            alive = ping3.is_alive(addr, probes=args.count or 1, timeout=args.timeout, src_addr=args.src_addr, ttl=args.ttl, size=args.size, interface=args.interface, version=args.version)
+            print("{} is {}".format(addr, "alive" if alive else "down"))
+        return
+
+    if args.traceroute:
+        for addr in args.dest_addr:
+            print("traceroute to {}, {} hops max".format(addr, args.max_hops))
+            for hop in ping3.traceroute(addr, max_hops=args.max_hops, timeout=args.timeout, unit="ms", src_addr=args.src_addr, size=args.size, interface=args.interface, version=args.version):
+                delays = "  ".join("*" if delay is None else "!" if delay is False else "{:.3f} ms".format(delay) for delay in hop.delays)  # "*" on timeout and "!" if unreachable, like `traceroute`.
+                print("{:2d}  {}".format(hop.ttl, delays) if hop.addr is None else "{:2d}  {}  {}".format(hop.ttl, hop.addr, delays))
+        return
+
+    if args.rate is not None or args.flood:
+        for addr in args.dest_addr:
+            result = ping3.flood(addr, count=args.count or None, rate=None if args.flood else args.rate, duration=args.duration, timeout=args.timeout, unit="ms", src_addr=args.src_addr, ttl=args.ttl, size=args.size, interface=args.interface, version=args.version)
+            print("--- {} flood statistics ---".format(addr))
+            print(result["stats"].summary(unit="ms"))
+            print("time {}ms, {:.1f} pps".format(int(result["duration"] * 1000), result["pps"]))
+        return
+
+    recorder = ping3.RttRecorder(args.record, capacity=args.record_capacity) if args.record else None
+    try:
+        for addr in args.dest_addr:
+            stats = ping3.PingStats()
+            try:
+                ping3.verbose_ping(addr, count=args.count, ttl=args.ttl, timeout=args.timeout, size=args.size, interval=args.interval, interface=args.interface, src_addr=args.src_addr, version=args.version, stats=stats, recorder=recorder)
+            except KeyboardInterrupt:  # Stopped manually, ex. `--count 0`. Still print the statistics like `ping`.
+                print("\n--- {} ping statistics ---".format(addr))
+                print(stats.summary(unit="ms"))
+                return
+            print("--- {} ping statistics ---".format(addr))
+            print(stats.summary(unit="ms"))
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == "__main__":
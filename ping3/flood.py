@@ -0,0 +1,155 @@
+import time
+
+import ping3
+from . import errors
+
+
+class TokenBucket:
+    """Paces events at `rate` per second with bursts up to `burst`, by a monotonic clock.
+
+    Tokens are refilled from the time elapsed since the last refill instead of counting fixed sleeps, so a late wakeup is compensated by the tokens accrued meanwhile and the average rate holds (up to `burst` tokens of catch-up).
+    Whole tokens above `burst` are dropped, but the partial token being accrued is kept, so the next event stays on the original schedule.
+    """
+
+    def __init__(self, rate: float, burst=None, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Tokens per second. Must be positive.
+            burst (int | None): Max whole tokens in the bucket, plus the partial one being accrued. None for 10ms of tokens, at least 1, which covers the millisecond resolution of the selectors. (default None)
+            clock (callable): The monotonic clock in seconds. (default time.monotonic)
+
+        Raises:
+            ValueError: If the rate is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive: {}".format(rate))
+        self.rate = rate
+        self.burst = max(1, int(rate / 100)) if burst is None else burst
+        self.clock = clock
+        self.tokens = 1  # Start with one token, so the first event is not delayed and there is no initial burst.
+        self.updated = clock()
+
+    def consume(self, tokens: int = 1) -> float:
+        """Take tokens from the bucket if available.
+
+        Args:
+            tokens (int): The number of tokens to take. (default 1)
+
+        Returns:
+            float: 0 if taken, otherwise seconds to wait until the tokens are available.
+        """
+        now = self.clock()
+        self.tokens += (now - self.updated) * self.rate
+        if self.tokens > self.burst:  # Whole tokens above the burst are dropped, the partial token is kept so the schedule does not slip.
+            self.tokens = self.burst + (self.tokens - self.burst) % 1
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+def flood(dest_addr: str, count=100, rate=None, duration=None, timeout: float = 1, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None) -> dict:
+    """
+    Send pings to destination address at the given rate, or as fast as possible, with many pings in flight. For load testing firewalls and ICMP rate limiters.
+
+    Sends are paced by a `TokenBucket`. Replies are received while sending, and each ping expires by a timer of the reactor.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+        count (int | None): How many pings should be sent. None for no limit, `duration` must be given. (default 100)
+        rate (float | None): Pings per second. None to flood, send as fast as possible. (default None)
+        duration (float | None): Stop sending after the seconds. None for no limit, `count` must be given. (default None)
+        timeout (float): Time to wait for each response, in seconds. (default 1)
+        unit (str): The unit of the delays in the statistics. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from `dest_addr`. (default None)
+
+    Returns:
+        dict: {"sent": int, "received": int, "errors": int, "lost": int, "duration": float, "pps": float, "stats": PingStats}.
+            "errors" counts ICMP error replies and failed sends, "lost" counts pings without reply in `timeout`. "duration" is the seconds spent sending and "pps" is the achieved sending rate. "stats" has the delays of all the pings.
+
+    Raises:
+        ValueError: If both `count` and `duration` are None, or the rate is not positive.
+        HostUnknown: If destination address is a domain name and cannot resolved.
+    """
+    if count is None and duration is None:
+        raise ValueError("Either count or duration must be given.")
+    bucket = None if rate is None else TokenBucket(rate)
+    if version is None:
+        version = ping3._detect_version(dest_addr)
+    ping3._debug("Flood IPv{}:".format(version), dest_addr)
+    sock_addr = ping3._resolve_sock_addr(dest_addr, version) if ping3.DNS_CACHE is None else ping3.DNS_CACHE.resolve(dest_addr, version)
+    dest_ip = sock_addr[0]  # Resolve once, not for every ping.
+    ping_stats = ping3.PingStats()
+    stats = {"sent": 0, "received": 0, "errors": 0, "lost": 0, "duration": 0.0, "pps": 0.0, "stats": ping_stats}
+    in_flight = {}  # seq -> timer
+    icmp_id = ping3._gen_icmp_id()
+    recv_buffer = ping3._get_receive_buffer()
+    reactor = ping3.get_reactor()
+
+    def on_readable(sock):
+        recv_size = sock.recv_into(recv_buffer)
+        time_recv = time.time()
+        reply = ping3._parse_reply(sock, recv_buffer, icmp_id, recv_size, seqs=in_flight)
+        if reply is None:
+            return
+        reply_seq, time_sent, err = reply
+        reactor.cancel(in_flight.pop(reply_seq))
+        if err is not None:
+            stats["errors"] += 1
+            ping_stats.add(False)
+            return
+        stats["received"] += 1
+        ping_stats.add(ping3._to_unit(time_recv - time_sent, unit))
+
+    def expire(seq):
+        del in_flight[seq]
+        stats["lost"] += 1
+        ping_stats.add(None)
+
+    with ping3._create_socket(version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=icmp_id) as sock:
+        ping3._enlarge_receive_buffer(sock)
+        reactor.register(sock, on_readable)
+        try:
+            start_time = time.monotonic()
+            stop_time = None if duration is None else start_time + duration
+            seq = 0
+            while count is None or seq < count:
+                now = time.monotonic()
+                if stop_time is not None and now >= stop_time:
+                    break
+                wait = 0.0 if bucket is None else bucket.consume()
+                if wait > 0:
+                    reactor.run_once(deadline=now + wait)  # Receive replies while waiting for the next token.
+                    continue
+                icmp_seq = seq & 0xffff
+                timer = in_flight.pop(icmp_seq, None)
+                if timer is not None:  # All the sequences are in flight, the oldest one is lost.
+                    reactor.cancel(timer)
+                    stats["lost"] += 1
+                    ping_stats.add(None)
+                try:
+                    ping3.send_one_ping(sock=sock, dest_addr=dest_ip, icmp_id=icmp_id, seq=icmp_seq, size=size)
+                except (errors.PingError, OSError) as err:  # Ex. ENOBUFS when flooding.
+                    ping3._debug(err)
+                    stats["errors"] += 1
+                    ping_stats.add(False)
+                else:
+                    in_flight[icmp_seq] = reactor.call_at(time.monotonic() + timeout, lambda icmp_seq=icmp_seq: expire(icmp_seq))
+                    stats["sent"] += 1
+                seq += 1
+                while reactor.run_once(deadline=0):  # Drain the replies, otherwise the socket receive buffer may overflow.
+                    pass
+            stats["duration"] = time.monotonic() - start_time
+            reactor.run_until(lambda: not in_flight)  # Every ping is replied or expired by its timer.
+        finally:
+            reactor.unregister(sock)
+            for timer in in_flight.values():
+                reactor.cancel(timer)
+    if stats["duration"] > 0:
+        stats["pps"] = stats["sent"] / stats["duration"]
+    return stats
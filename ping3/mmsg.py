@@ -0,0 +1,164 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import platform
+import socket
+import struct
+
+import ping3
+
+
+class _IoVec(ctypes.Structure):
+    """struct iovec"""
+    _fields_ = [("base", ctypes.c_void_p), ("len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    """struct msghdr"""
+    _fields_ = [("name", ctypes.c_void_p), ("namelen", ctypes.c_uint32), ("iov", ctypes.POINTER(_IoVec)), ("iovlen", ctypes.c_size_t), ("control", ctypes.c_void_p), ("controllen", ctypes.c_size_t), ("flags", ctypes.c_int)]
+
+
+class _MMsgHdr(ctypes.Structure):
+    """struct mmsghdr"""
+    _fields_ = [("hdr", _MsgHdr), ("len", ctypes.c_uint)]
+
+
+_libc = None  # The C library with sendmmsg() and recvmmsg(), loaded on first use. False if not supported.
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = False
+        if platform.system() == "Linux":
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]  # The messages by address, to start from any message of an array.
+                libc.sendmmsg.restype = ctypes.c_int
+                libc.recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+                libc.recvmmsg.restype = ctypes.c_int
+                _libc = libc
+            except (OSError, AttributeError) as err:  # No sendmmsg() before glibc 2.14, or not glibc.
+                ping3._debug("sendmmsg/recvmmsg not available: {}".format(err))
+    return _libc or None
+
+
+def available() -> bool:
+    """Check if sendmmsg() and recvmmsg() are available, Linux only.
+
+    Returns:
+        bool: True if available.
+    """
+    return _load_libc() is not None
+
+
+def _pack_sock_addr(family: int, sock_addr: tuple) -> bytes:
+    """Pack the socket address into struct sockaddr_in or struct sockaddr_in6."""
+    if family == socket.AF_INET:
+        return struct.pack("=H", family) + struct.pack("!H", sock_addr[1]) + socket.inet_aton(sock_addr[0]) + bytes(8)
+    _, port, flowinfo, scope_id = sock_addr
+    return struct.pack("=H", family) + struct.pack("!HI", port, flowinfo) + socket.inet_pton(socket.AF_INET6, sock_addr[0]) + struct.pack("=I", scope_id)
+
+
+def send_batch(sock: socket.socket, packets: list, sock_addrs: list) -> list:
+    """Send the packets to their socket addresses by sendmmsg(), as few syscalls as possible.
+
+    A packet which fails to send is skipped, and the rest are sent by the next syscall.
+
+    Args:
+        sock (socket.socket): The blocking socket.
+        packets (list[bytes]): The packets.
+        sock_addrs (list[tuple]): The socket address of each packet, see `ping3._resolve_sock_addr()`.
+
+    Returns:
+        list[OSError | None]: The error of each packet, None if sent.
+    """
+    libc = _load_libc()
+    count = len(packets)
+    results = [None] * count
+    if not count:
+        return results
+    data = bytearray(b"".join(packets))
+    names = b"".join(_pack_sock_addr(sock.family, sock_addr) for sock_addr in sock_addrs)
+    name_size = len(names) // count  # All the addresses are of the socket family.
+    data_buffer = (ctypes.c_char * len(data)).from_buffer(data)
+    name_buffer = ctypes.create_string_buffer(names)
+    messages = (_MMsgHdr * count)()
+    iovecs = (_IoVec * count)()
+    offset = 0
+    for index, packet in enumerate(packets):
+        iovecs[index].base = ctypes.addressof(data_buffer) + offset
+        iovecs[index].len = len(packet)
+        offset += len(packet)
+        header = messages[index].hdr
+        header.name = ctypes.addressof(name_buffer) + index * name_size
+        header.namelen = name_size
+        header.iov = ctypes.pointer(iovecs[index])
+        header.iovlen = 1
+    sent = 0
+    while sent < count:
+        result = libc.sendmmsg(sock.fileno(), ctypes.addressof(messages) + sent * ctypes.sizeof(_MMsgHdr), count - sent, 0)
+        if result >= 0:
+            sent += result
+            continue
+        err = ctypes.get_errno()
+        if err == errno.EINTR:
+            continue
+        results[sent] = OSError(err, os.strerror(err))  # The first message of the call failed, ex. not routable.
+        sent += 1
+    return results
+
+
+class ReceiveBatch:
+    """Preallocated buffers for receiving many packets by one recvmmsg().
+
+    Attributes:
+        buffers (list[bytearray]): The receive buffer of each packet.
+    """
+
+    def __init__(self, size: int, buffer_size: int = 1500):
+        """
+        Args:
+            size (int): Max packets received by one syscall.
+            buffer_size (int): The size of each buffer in bytes. (default 1500)
+        """
+        self.size = size
+        self.buffers = [bytearray(buffer_size) for _ in range(size)]
+        self._messages = (_MMsgHdr * size)()
+        self._iovecs = (_IoVec * size)()
+        self._views = [(ctypes.c_char * buffer_size).from_buffer(buffer) for buffer in self.buffers]  # Keep the buffers exported, so they are never moved.
+        for index, view in enumerate(self._views):
+            self._iovecs[index].base = ctypes.addressof(view)
+            self._iovecs[index].len = buffer_size
+            header = self._messages[index].hdr
+            header.iov = ctypes.pointer(self._iovecs[index])
+            header.iovlen = 1
+
+    def receive(self, sock: socket.socket) -> list:
+        """Receive the ready packets without blocking.
+
+        Args:
+            sock (socket.socket): The socket.
+
+        Returns:
+            list[tuple]: (buffer, length) of each received packet. Empty if none is ready. The buffers are overwritten by the next call.
+
+        Raises:
+            OSError: If recvmmsg() fails.
+        """
+        result = _load_libc().recvmmsg(sock.fileno(), ctypes.addressof(self._messages), self.size, socket.MSG_DONTWAIT, None)
+        if result < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
+        return [(self.buffers[index], self._messages[index].len) for index in range(result)]
+
+
+def _get_receive_batch(size: int) -> ReceiveBatch:
+    """Get the receive batch of the current thread, which is reused for every call."""
+    batch = getattr(ping3._local, "receive_batch", None)
+    if batch is None or batch.size != size:
+        batch = ping3._local.receive_batch = ReceiveBatch(size, ping3.RECEIVE_BUFFER_SIZE)
+    return batch
@@ -0,0 +1,144 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import struct
+import warnings
+
+import ping3
+
+OPTIONS = ("DEBUG", "TRACER", "LOGGER", "TIMESTAMPING", "BPF_FILTER", "MMSG", "MMSG_BATCH_SIZE", "DNS_CACHE", "SRC_ADDR_CACHE", "RECEIVE_BUFFER_SIZE")  # Module options read by `ping_many()`, forwarded to the workers. `EXCEPTIONS`, `ADAPTIVE_TIMEOUT` and `PING_RESULT` do not apply to `ping_many()`.
+RECORD_FORMAT = "=IBd"  # A result sent from a worker to the parent. I: Index of the destination in the shard (32). B: Status (8). d: Delay (64).
+RECORD_STRUCT = struct.Struct(RECORD_FORMAT)
+STATUS_REPLIED, STATUS_TIMEOUT, STATUS_ERROR = 0, 1, 2
+
+
+def _worker(conn, dest_addrs: list, icmp_id: int, chunk_size: int, config: dict, options: dict) -> None:
+    """Ping a shard of the destinations in a worker process, and send the results to the parent in packed records.
+
+    Each chunk is sent as one message of `RECORD_STRUCT` records as soon as it is done. An empty message ends the results, followed by the `PingStats` of the shard.
+    """
+    for name, value in config.items():  # Module options are not inherited by spawned processes.
+        setattr(ping3, name, value)
+    stats = ping3.PingStats()
+    try:
+        for start in range(0, len(dest_addrs), chunk_size):
+            chunk = dest_addrs[start:start + chunk_size]
+            results = ping3._ping_many(chunk, icmp_id, **options)
+            records = bytearray()
+            for index, dest_addr in enumerate(chunk, start):
+                delay = results[dest_addr]
+                stats.add(delay)
+                if delay is None:
+                    records += RECORD_STRUCT.pack(index, STATUS_TIMEOUT, 0.0)
+                elif delay is False:
+                    records += RECORD_STRUCT.pack(index, STATUS_ERROR, 0.0)
+                else:
+                    records += RECORD_STRUCT.pack(index, STATUS_REPLIED, delay)
+            conn.send_bytes(records)
+        conn.send_bytes(b"")
+        conn.send(stats)
+    finally:
+        conn.close()
+
+
+def _get_config() -> dict:
+    """Get the module options for the workers, see `OPTIONS`.
+
+    Processes started by "spawn" or "forkserver" (default on macOS and Windows) do not inherit the options, so they are pickled to the workers. An option which cannot be pickled, ex. a lambda as `ping3.TRACER`, is left default in the workers with a warning.
+    """
+    config = {}
+    pickled = multiprocessing.get_start_method() != "fork"
+    for name in OPTIONS:
+        value = getattr(ping3, name)
+        if name == "LOGGER" and value is not None and value.name == ping3.__name__:
+            continue  # The default logger of ping3 is created again by each worker, with its handler.
+        if pickled and value is not None:
+            try:
+                pickle.dumps(value)
+            except Exception as err:
+                warnings.warn("ping3.{} is ignored by the worker processes of ping_pool(), cannot be pickled: {}".format(name, err), RuntimeWarning)
+                continue
+        config[name] = value
+    return config
+
+
+def ping_pool(dest_addrs, processes=None, chunk_size: int = 1024, timeout: float = 4, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None, stats=None) -> dict:
+    """
+    Ping many destination addresses by a pool of worker processes, one shard of the destinations for each.
+
+    Parsing replies in Python is bound to one core, so `ping_many()` tops out at a few thousand replies per second. The destinations are split across processes, each pings its shard by `ping_many()` in chunks.
+    Every worker has its own ICMP id from a range reserved by the parent, so the replies of a worker are not consumed by the others. With `ping3.BPF_FILTER`, each worker only wakes up for its own replies.
+    Results are sent back over pipes as packed structs, not pickled objects, and the statistics of the workers are merged.
+    The module options read by `ping_many()` are forwarded to the workers, see `OPTIONS`. Caches are copied, so entries added by a worker are not seen by the parent.
+
+    Example:
+        >>> stats = ping3.PingStats()
+        >>> results = ping3.ping_pool(["10.0.{}.{}".format(i // 256, i % 256) for i in range(65536)], processes=4, timeout=1, stats=stats)
+        >>> stats.received
+        253
+
+    Args:
+        dest_addrs (iterable[str]): The destination addresses, can be IP addresses or domain names. Ex. ["192.168.1.1", "example.com", "fd00::1"]
+        processes (int | None): Number of worker processes. None for the number of CPUs. At most one per destination. (default None)
+        chunk_size (int): Destinations pinged together by a worker, and sent back in one message. (default 1024)
+        timeout (float): Time to wait for the responses of a chunk, in seconds. (default 4)
+        unit (str): The unit of returned values. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from each destination address. (default None)
+        stats (PingStats | None): The statistics of the workers are merged into it. (default None)
+
+    Returns:
+        dict: A map of destination address to the delay in seconds/milliseconds, False on error and None on timeout.
+            Errors are reported per destination, `ping3.EXCEPTIONS` does not apply. Destinations of a crashed worker are None.
+
+    Raises:
+        ValueError: If the number of processes is not in 1~65536, or the chunk size is not positive.
+    """
+    targets = list(dict.fromkeys(dest_addrs))  # Unique, in order.
+    results = dict.fromkeys(targets)  # Timeout unless replied.
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if not 0 < processes <= 0x10000:
+        raise ValueError("Processes must be in 1~65536: {}".format(processes))
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive: {}".format(chunk_size))
+    processes = min(processes, len(targets))
+    base_id = ping3._gen_icmp_id()  # Worker i uses the ICMP id base_id + i.
+    config = _get_config()
+    options = {"timeout": timeout, "unit": unit, "src_addr": src_addr, "ttl": ttl, "size": size, "interface": interface, "version": version}
+    workers = {}  # connection -> (shard index, process)
+    try:
+        for shard in range(processes):
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_worker, args=(writer, targets[shard::processes], (base_id + shard) & 0xffff, chunk_size, config, options), daemon=True)
+            process.start()
+            writer.close()  # Only the worker writes, so the reader gets EOF if the worker dies.
+            workers[reader] = (shard, process)
+        while workers:
+            for conn in multiprocessing.connection.wait(list(workers)):
+                shard, process = workers[conn]
+                try:
+                    records = conn.recv_bytes()
+                    if records:
+                        for index, status, delay in RECORD_STRUCT.iter_unpack(records):
+                            results[targets[shard + index * processes]] = delay if status == STATUS_REPLIED else (None if status == STATUS_TIMEOUT else False)
+                        continue
+                    worker_stats = conn.recv()
+                    if stats is not None:
+                        stats.merge(worker_stats)
+                except EOFError:
+                    process.join()
+                    ping3._debug("Worker {} exited with code {}.".format(shard, process.exitcode))
+                del workers[conn]
+                conn.close()
+                process.join()
+    finally:
+        for conn, (_, process) in workers.items():  # Interrupted, stop the remaining workers.
+            conn.close()
+            process.terminate()
+            process.join()
+    return results
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import selectors
+import threading
+import time
+
+
+class Reactor:
+    """Event loop for the blocking APIs, which waits for many ICMP sockets with one selector and handles timeouts with one deadline heap.
+
+    Sockets are watched by `selectors.DefaultSelector` (epoll on Linux, kqueue on BSD and macOS), which is not limited by FD_SETSIZE and scales with the number of sockets unlike `select.select()`.
+    Timers are kept in a heap, so adding a timer and firing the earliest one are O(log n). Deadlines are in `time.monotonic()` seconds.
+    Each thread has its own reactor, see `get_reactor()`. A reactor is not thread-safe.
+    """
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self._timers = []  # Heap of [deadline, timer_id, callback]. Cancelled timers have callback None.
+        self._timer_ids = itertools.count()  # Tie breaker, so callbacks are never compared.
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def register(self, sock, callback) -> None:
+        """Watch the socket, `callback(sock)` is called when the socket is ready to read.
+
+        Args:
+            sock (socket.socket): The socket to watch.
+            callback (callable): Called with the socket. Should read at least one packet, otherwise it is called again.
+        """
+        self.selector.register(sock, selectors.EVENT_READ, callback)
+
+    def unregister(self, sock) -> None:
+        """Stop watching the socket. Must be called before the socket is closed.
+
+        Args:
+            sock (socket.socket): The watched socket.
+        """
+        self.selector.unregister(sock)
+
+    def call_at(self, deadline: float, callback) -> list:
+        """Call `callback()` when the deadline passes.
+
+        Args:
+            deadline (float): When to call, in `time.monotonic()` seconds.
+            callback (callable): Called without arguments.
+
+        Returns:
+            list: The timer, which can be cancelled by `cancel()`.
+        """
+        timer = [deadline, next(self._timer_ids), callback]
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def cancel(self, timer: list) -> None:
+        """Cancel the timer. Cancelled timers are dropped from the heap lazily.
+
+        Args:
+            timer (list): The timer returned by `call_at()`.
+        """
+        timer[2] = None
+
+    def next_deadline(self):
+        """Get the deadline of the earliest timer.
+
+        Returns:
+            float | None: The deadline in `time.monotonic()` seconds, None if there is no timer.
+        """
+        timers = self._timers
+        while timers and timers[0][2] is None:
+            heapq.heappop(timers)
+        return timers[0][0] if timers else None
+
+    def run_once(self, deadline=None) -> int:
+        """Wait until any socket is ready, the earliest timer or the deadline, then run the callbacks of the ready sockets and the expired timers.
+
+        Args:
+            deadline (float | None): Wait at most until the deadline in `time.monotonic()` seconds. None to wait for sockets or timers only. (default None)
+
+        Returns:
+            int: The number of ready sockets.
+        """
+        timer_deadline = self.next_deadline()
+        if timer_deadline is not None and (deadline is None or timer_deadline < deadline):
+            deadline = timer_deadline
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        events = self.selector.select(timeout)
+        for key, _ in events:
+            key.data(key.fileobj)
+        timers = self._timers
+        now = time.monotonic()
+        while timers and timers[0][0] <= now:
+            callback = heapq.heappop(timers)[2]
+            if callback is not None:
+                callback()
+        return len(events)
+
+    def run_until(self, done, deadline=None) -> bool:
+        """Run until `done()` returns True or the deadline passes. Sockets are polled at least once.
+
+        Args:
+            done (callable): Returns True when finished.
+            deadline (float | None): When to stop, in `time.monotonic()` seconds. None for no deadline. (default None)
+
+        Returns:
+            bool: True if finished, False if the deadline passed.
+        """
+        if done():
+            return True
+        while True:
+            self.run_once(deadline)
+            if done():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self) -> None:
+        """Close the selector. The sockets are not closed."""
+        self._timers.clear()
+        self.selector.close()
+
+
+_local = threading.local()
+
+
+def get_reactor() -> Reactor:
+    """Get the reactor of the current thread, create it if not exists.
+
+    Returns:
+        Reactor: The reactor used by the blocking APIs in the current thread.
+    """
+    reactor = getattr(_local, "reactor", None)
+    if reactor is None:
+        reactor = _local.reactor = Reactor()
+    return reactor
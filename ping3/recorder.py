@@ -0,0 +1,252 @@
+import collections
+import math
+import mmap
+import os
+import struct
+import time
+
+from .result import PingResult, PingStatus
+
+MAGIC = b"PING3RTT"
+FILE_VERSION = 1
+HEADER_FORMAT = "<8sHHIQQ"  # Little-endian, same file on any host. 8s: Magic. H: File version (16). H: Record size (16). I: Target table size in bytes (32). Q: Capacity in records (64). Q: Records written, the next one is at slot (count % capacity) (64).
+RECORD_FORMAT = "<ddHBx"  # d: Unix timestamp in seconds (64). d: RTT in seconds, NaN if not replied (64). H: Target index (16). B: PingStatus (8). x: Padding (8).
+HEADER_STRUCT = struct.Struct(HEADER_FORMAT)
+RECORD_STRUCT = struct.Struct(RECORD_FORMAT)
+COUNT_STRUCT = struct.Struct("<Q")
+COUNT_OFFSET = HEADER_STRUCT.size - COUNT_STRUCT.size  # The count is the last field of the header.
+TIMESTAMP_STRUCT = struct.Struct("<d")  # The first field of a record.
+
+RttRecord = collections.namedtuple("RttRecord", ["timestamp", "target", "rtt", "status"])
+RttRecord.__doc__ = """A ping read from an RTT log by `ping3.RttLog`.
+
+Attributes:
+    timestamp (float): When the ping was recorded, in seconds since the epoch.
+    target (str): The destination address.
+    rtt (float | None): The delay in seconds, None if not replied.
+    status (PingStatus): REPLIED, TIMEOUT or the kind of error.
+"""
+
+
+def _read_header(buffer) -> tuple:
+    """Read and check the header of an RTT log.
+
+    Returns:
+        tuple: (target_table_size, capacity, count).
+
+    Raises:
+        ValueError: If the file is not an RTT log of this version.
+    """
+    if len(buffer) < HEADER_STRUCT.size:
+        raise ValueError("Not an RTT log: file too short.")
+    magic, version, record_size, table_size, capacity, count = HEADER_STRUCT.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not an RTT log: bad magic {!r}.".format(magic))
+    if version != FILE_VERSION or record_size != RECORD_STRUCT.size:
+        raise ValueError("Unsupported RTT log version {} with record size {}.".format(version, record_size))
+    if len(buffer) < HEADER_STRUCT.size + table_size + capacity * record_size:
+        raise ValueError("RTT log truncated.")
+    return table_size, capacity, count
+
+
+def _read_targets(buffer, table_size: int) -> list:
+    """Read the target table, which is the newline-joined targets padded with zeros."""
+    table = bytes(buffer[HEADER_STRUCT.size:HEADER_STRUCT.size + table_size]).rstrip(b"\0")
+    return table.decode().split("\n") if table else []
+
+
+class RttRecorder:
+    """Append pings to an RTT log, which is a memory-mapped ring file of fixed-width records.
+
+    The file size is fixed when created: a header, a table of the targets, and `capacity` records. The oldest record is overwritten when full, so the history is bounded.
+    Each record is written into the mapped pages without a syscall, the OS writes them back to the file. Records survive a crash of the process, `flush()` also survives a crash of the OS.
+    One process records into a file at a time, other processes can read it by `RttLog` meanwhile.
+
+    Example:
+        >>> with ping3.RttRecorder("rtt.log") as recorder:
+        ...     for seq in range(86400):
+        ...         recorder.record("example.com", ping3.ping("example.com", seq=seq))
+        ...         time.sleep(1)
+    """
+
+    def __init__(self, path: str, capacity: int = 1048576, target_table_size: int = 4096):
+        """
+        Args:
+            path (str): The file path. Created if not exists, otherwise appended with its own capacity.
+            capacity (int): Max records kept when created. 20 bytes each. (default 1048576)
+            target_table_size (int): Bytes reserved for the targets when created. (default 4096)
+
+        Raises:
+            ValueError: If the capacity is not positive, or the existing file is not an RTT log.
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive: {}".format(capacity))
+        self.path = path
+        self._file = open(path, "a+b")  # Created if not exists, never truncated.
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self._file.write(HEADER_STRUCT.pack(MAGIC, FILE_VERSION, RECORD_STRUCT.size, target_table_size, capacity, 0))
+                self._file.truncate(HEADER_STRUCT.size + target_table_size + capacity * RECORD_STRUCT.size)  # Sparse if supported, zeros otherwise.
+                self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+            self._table_size, self.capacity, self._count = _read_header(self._mmap)
+        except Exception:
+            self._file.close()
+            raise
+        self._records_offset = HEADER_STRUCT.size + self._table_size
+        self.targets = _read_targets(self._mmap, self._table_size)
+        self._target_index = {target: index for index, target in enumerate(self.targets)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def _get_target_index(self, target: str) -> int:
+        index = self._target_index.get(target)
+        if index is not None:
+            return index
+        if "\n" in target or len(self.targets) > 0xffff:
+            raise ValueError("Cannot record target: {!r}".format(target))
+        table = "\n".join(self.targets + [target]).encode()
+        if len(table) > self._table_size:
+            raise ValueError("Target table of {} bytes is full: {!r}".format(self._table_size, target))
+        self._mmap[HEADER_STRUCT.size:HEADER_STRUCT.size + len(table)] = table
+        index = self._target_index[target] = len(self.targets)
+        self.targets.append(target)
+        return index
+
+    def record(self, target: str, delay, unit: str = "s", timestamp=None) -> None:
+        """Append a ping. The oldest record is overwritten when full.
+
+        Args:
+            target (str): The destination address.
+            delay (float | None | False | PingResult): The result of `ping()`.
+            unit (str): The unit of `delay`. "s" for seconds, "ms" for milliseconds. Records are always in seconds. (default "s")
+            timestamp (float | None): When the ping was done, in seconds since the epoch. None for now. (default None)
+
+        Raises:
+            ValueError: If the target cannot be added to the target table.
+        """
+        if type(delay) is PingResult:
+            rtt, status = delay.rtt, delay.status
+        elif delay is None:
+            rtt, status = None, PingStatus.TIMEOUT
+        elif delay is False:
+            rtt, status = None, PingStatus.ERROR
+        else:
+            rtt, status = delay, PingStatus.REPLIED
+        if rtt is None:
+            rtt = math.nan
+        elif unit == "ms":
+            rtt /= 1000
+        offset = self._records_offset + (self._count % self.capacity) * RECORD_STRUCT.size
+        RECORD_STRUCT.pack_into(self._mmap, offset, time.time() if timestamp is None else timestamp, rtt, self._get_target_index(target), status)
+        self._count += 1
+        COUNT_STRUCT.pack_into(self._mmap, COUNT_OFFSET, self._count)  # After the record, so readers never see an unwritten one.
+
+    def flush(self) -> None:
+        """Write the mapped pages back to the file now."""
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        if not self._file.closed:
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+
+
+class RttLog:
+    """Read the pings of an RTT log written by `RttRecorder`, also while it is being written.
+
+    The file is memory-mapped read-only, only the pages of the records read are loaded. Records are in time order unless the wall clock is stepped back, so a time window is found by binary search.
+    A record being overwritten by the recorder while read may be torn.
+
+    Example:
+        >>> with ping3.RttLog("rtt.log") as log:
+        ...     rtts = [record.rtt for record in log.window(start=time.time() - 3600, target="example.com")]
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The file path.
+
+        Raises:
+            ValueError: If the file is not an RTT log.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._table_size, self.capacity, _ = _read_header(self._mmap)
+        except Exception:
+            self._file.close()
+            raise
+        self._records_offset = HEADER_STRUCT.size + self._table_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return min(COUNT_STRUCT.unpack_from(self._mmap, COUNT_OFFSET)[0], self.capacity)
+
+    def __iter__(self):
+        return self.window()
+
+    @property
+    def targets(self) -> list:
+        """list[str]: The targets recorded so far, in the order of their indexes."""
+        return _read_targets(self._mmap, self._table_size)
+
+    def _offset(self, position: int) -> int:
+        return self._records_offset + (position % self.capacity) * RECORD_STRUCT.size
+
+    def window(self, start=None, end=None, target=None):
+        """Read the records in a time window, from old to new.
+
+        Args:
+            start (float | None): The first timestamp included, in seconds since the epoch. None for the oldest record. (default None)
+            end (float | None): The timestamp excluded. None for the newest record. (default None)
+            target (str | None): Only the records of the target. None for all targets. (default None)
+
+        Yields:
+            RttRecord: (timestamp, target, rtt, status) of each record.
+        """
+        count = COUNT_STRUCT.unpack_from(self._mmap, COUNT_OFFSET)[0]
+        first = max(count - self.capacity, 0)  # Positions first ~ count-1 are kept, at slot (position % capacity).
+        targets = self.targets
+        target_index = None
+        if target is not None:
+            if target not in targets:
+                return
+            target_index = targets.index(target)
+        low, high = first, count
+        if start is not None:
+            while low < high:  # The first position not earlier than start.
+                middle = (low + high) // 2
+                if TIMESTAMP_STRUCT.unpack_from(self._mmap, self._offset(middle))[0] < start:
+                    low = middle + 1
+                else:
+                    high = middle
+        for position in range(low, count):
+            timestamp, rtt, index, status = RECORD_STRUCT.unpack_from(self._mmap, self._offset(position))
+            if end is not None and timestamp >= end:
+                return
+            if target_index is not None and index != target_index:
+                continue
+            yield RttRecord(timestamp, targets[index] if index < len(targets) else None, None if math.isnan(rtt) else rtt, PingStatus(status))
+
+    def close(self) -> None:
+        """Close the file."""
+        if not self._file.closed:
+            self._mmap.close()
+            self._file.close()
@@ -0,0 +1,189 @@
+import array
+import enum
+import math
+
+from . import errors
+from .stats import PingStats
+
+
+class PingStatus(enum.IntEnum):
+    """Enum for the status of a `PingResult`."""
+    REPLIED = 0
+    TIMEOUT = 1
+    ERROR = 2  # Other errors, ex. failed to send.
+    HOST_UNKNOWN = 3
+    UNREACHABLE = 4
+    TIME_EXCEEDED = 5
+
+    @classmethod
+    def from_error(cls, err: errors.PingError) -> "PingStatus":
+        """Get the status of a ping which failed by the error.
+
+        Args:
+            err (PingError): The error.
+
+        Returns:
+            PingStatus: The status.
+        """
+        if isinstance(err, errors.Timeout):
+            return cls.TIMEOUT
+        if isinstance(err, errors.HostUnknown):
+            return cls.HOST_UNKNOWN
+        if isinstance(err, errors.DestinationUnreachable):
+            return cls.UNREACHABLE
+        if isinstance(err, errors.TimeExceeded):
+            return cls.TIME_EXCEEDED
+        return cls.ERROR
+
+
+class PingResult:
+    """A ping with the details of its reply. Returned by `ping()` and `Pinger.ping()` if `ping3.PING_RESULT` is True.
+
+    A PingResult is true only if replied, so `if ping3.ping(...):` works as before.
+
+    Attributes:
+        rtt (float | None): The delay in seconds/milliseconds, None if not replied.
+        seq (int): The ICMP packet sequence.
+        ttl (int | None): The Time-To-Live of the reply. None on timeout, or if the reply has no IP header, ex. IPv6 or unprivileged ICMP sockets on Linux.
+        src (str | None): The address which sent the reply, ex. the router reporting an error. None on timeout.
+        size (int | None): The ICMP payload size of the reply in bytes. None on timeout.
+        status (PingStatus): REPLIED, TIMEOUT or the kind of error.
+    """
+
+    __slots__ = ("rtt", "seq", "ttl", "src", "size", "status")
+
+    def __init__(self, rtt=None, seq: int = 0, ttl=None, src=None, size=None, status: PingStatus = PingStatus.TIMEOUT):
+        self.rtt = rtt
+        self.seq = seq
+        self.ttl = ttl
+        self.src = src
+        self.size = size
+        self.status = PingStatus(status)
+
+    def __repr__(self):
+        return "PingResult(rtt={}, seq={}, ttl={}, src={!r}, size={}, status={})".format(self.rtt, self.seq, self.ttl, self.src, self.size, self.status.name)
+
+    def __eq__(self, other):
+        if not isinstance(other, PingResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __bool__(self):
+        return self.status == PingStatus.REPLIED
+
+    @property
+    def delay(self):
+        """float | None | False: The delay as returned by `ping()` without `ping3.PING_RESULT`, False on error and None on timeout."""
+        if self.status == PingStatus.REPLIED:
+            return self.rtt
+        return None if self.status == PingStatus.TIMEOUT else False
+
+
+class PingResults:
+    """Results of many pings stored in columns of typed arrays, about 24 bytes per ping instead of a Python object per ping.
+
+    Each field is a column, `rtts` is an `array("d")` of NaN if not replied and `statuses` is an `array("B")`. Other columns use 0 for unknown TTL and -1 for unknown size.
+    Results are rebuilt one at a time when read, so iterating takes constant memory. The columns can be handed to numpy without copying, ex. `numpy.frombuffer(results.rtts)`.
+
+    Example:
+        >>> ping3.PING_RESULT = True
+        >>> results = ping3.PingResults()
+        >>> with ping3.Pinger() as pinger:
+        ...     for _ in range(1000):
+        ...         results.append(pinger.ping("example.com"))
+        >>> results.stats().loss
+        0.0
+    """
+
+    def __init__(self, results=()):
+        """
+        Args:
+            results (iterable[PingResult]): The initial results. (default ())
+        """
+        self.rtts = array.array("d")
+        self.seqs = array.array("H")
+        self.ttls = array.array("B")
+        self.sizes = array.array("l")
+        self.statuses = array.array("B")
+        self._src_indexes = array.array("I")  # Index of the source address in `_srcs`, 0 for None.
+        self._srcs = [None]
+        self._src_index = {None: 0}
+        self.extend(results)
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def __repr__(self):
+        return "PingResults(count={}, received={})".format(len(self), self.count(PingStatus.REPLIED))
+
+    def append(self, result: PingResult) -> None:
+        """Add a ping result.
+
+        Args:
+            result (PingResult): The result.
+        """
+        src_index = self._src_index.get(result.src)
+        if src_index is None:
+            src_index = self._src_index[result.src] = len(self._srcs)
+            self._srcs.append(result.src)
+        self.rtts.append(math.nan if result.rtt is None else result.rtt)
+        self.seqs.append(result.seq)
+        self.ttls.append(result.ttl or 0)
+        self.sizes.append(-1 if result.size is None else result.size)
+        self.statuses.append(result.status)
+        self._src_indexes.append(src_index)
+
+    def extend(self, results) -> None:
+        """Add many ping results.
+
+        Args:
+            results (iterable[PingResult]): The results.
+        """
+        for result in results:
+            self.append(result)
+
+    def __getitem__(self, index: int) -> PingResult:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PingResults index out of range: {}".format(index))
+        status = self.statuses[index]
+        size = self.sizes[index]
+        return PingResult(rtt=self.rtts[index] if status == PingStatus.REPLIED else None, seq=self.seqs[index], ttl=self.ttls[index] or None, src=self._srcs[self._src_indexes[index]], size=None if size < 0 else size, status=status)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def count(self, status: PingStatus = PingStatus.REPLIED) -> int:
+        """Count the pings of the status.
+
+        Args:
+            status (PingStatus): The status. (default PingStatus.REPLIED)
+
+        Returns:
+            int: Number of pings of the status.
+        """
+        return self.statuses.count(status)
+
+    def stats(self) -> PingStats:
+        """Get the statistics of all the pings, read from the columns.
+
+        Returns:
+            PingStats: The statistics.
+        """
+        stats = PingStats()
+        for rtt, status in zip(self.rtts, self.statuses):
+            stats.add(rtt if status == PingStatus.REPLIED else (None if status == PingStatus.TIMEOUT else False))
+        return stats
+
+    def summary(self, unit: str = "ms") -> str:
+        """Format the statistics like `ping`, see `PingStats.summary()`.
+
+        Args:
+            unit (str): The unit of the delays, only for display. (default "ms")
+
+        Returns:
+            str: The packets line, and the delay lines if any received.
+        """
+        return self.stats().summary(unit)
@@ -0,0 +1,123 @@
+import collections
+import threading
+
+
+class RttEstimator:
+    """A thread-safe LRU of round-trip time estimators per destination, which give adaptive timeouts. Used by `ping()` when assigned to `ping3.ADAPTIVE_TIMEOUT`.
+
+    Each destination keeps a smoothed RTT (SRTT) and its variation (RTTVAR) as in RFC 6298, its timeout is SRTT + k * RTTVAR clamped to `min_timeout`~`max_timeout`.
+    The timeout of a destination is doubled after each timeout, and reset by the next reply.
+    A destination without replies starts from the estimate of all the destinations, so a sweep of dead hosts does not wait a full timeout for each. The initial timeout is used until any reply.
+    RFC 6298: https://datatracker.ietf.org/doc/html/rfc6298
+
+    Example:
+        >>> ping3.ADAPTIVE_TIMEOUT = ping3.RttEstimator(min_timeout=0.05, max_timeout=2)
+        >>> ping3.ping("192.168.1.1")
+        0.000215697261510079666
+        >>> ping3.ADAPTIVE_TIMEOUT.timeout("192.168.1.1")
+        0.05
+    """
+
+    MAX_BACKOFF = 64  # The timeout is doubled at most 6 times.
+
+    def __init__(self, maxsize: int = 1024, k: float = 4, min_timeout: float = 0.1, max_timeout: float = 4, initial_timeout: float = 1, alpha: float = 1 / 8, beta: float = 1 / 4):
+        """
+        Args:
+            maxsize (int): Max number of destinations. The least recently used one is evicted when full. (default 1024)
+            k (float): Weight of RTTVAR in the timeout. (default 4)
+            min_timeout (float): Lower bound of the timeouts, in seconds. (default 0.1)
+            max_timeout (float): Upper bound of the timeouts, in seconds. (default 4)
+            initial_timeout (float): Timeout before any reply, in seconds. (default 1)
+            alpha (float): Gain of SRTT. (default 1/8)
+            beta (float): Gain of RTTVAR. (default 1/4)
+        """
+        self.maxsize = maxsize
+        self.k = k
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.initial_timeout = initial_timeout
+        self.alpha = alpha
+        self.beta = beta
+        self._entries = collections.OrderedDict()  # dest_addr -> [srtt, rttvar, backoff]. srtt and rttvar are None before any reply.
+        self._overall = [None, None, 1]  # The estimate of all the destinations, for cold start.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, dest_addr: str):
+        """Get the estimate of the destination.
+
+        Args:
+            dest_addr (str): The destination address.
+
+        Returns:
+            tuple | None: (srtt, rttvar) in seconds. None if not replied yet.
+        """
+        with self._lock:
+            entry = self._entries.get(dest_addr)
+            return None if entry is None or entry[0] is None else (entry[0], entry[1])
+
+    def _update_entry(self, entry: list, rtt: float) -> None:
+        if entry[0] is None:  # The first measurement. RFC 6298 (2.2).
+            entry[0], entry[1] = rtt, rtt / 2
+        else:  # RFC 6298 (2.3), RTTVAR first with the old SRTT.
+            entry[1] = (1 - self.beta) * entry[1] + self.beta * abs(entry[0] - rtt)
+            entry[0] = (1 - self.alpha) * entry[0] + self.alpha * rtt
+        entry[2] = 1
+
+    def _entry(self, dest_addr: str) -> list:
+        entry = self._entries.get(dest_addr)
+        if entry is None:
+            entry = self._entries[dest_addr] = [None, None, 1]
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(dest_addr)
+        return entry
+
+    def update(self, dest_addr: str, rtt: float) -> None:
+        """Add a measured round-trip time of the destination, and reset its backoff.
+
+        Args:
+            dest_addr (str): The destination address.
+            rtt (float): The round-trip time in seconds.
+        """
+        with self._lock:
+            self._update_entry(self._entry(dest_addr), rtt)
+            self._update_entry(self._overall, rtt)
+
+    def timed_out(self, dest_addr: str) -> None:
+        """Double the timeout of the destination after a timeout, RFC 6298 (5.5).
+
+        Args:
+            dest_addr (str): The destination address.
+        """
+        with self._lock:
+            entry = self._entry(dest_addr)
+            entry[2] = min(entry[2] * 2, self.MAX_BACKOFF)
+
+    def timeout(self, dest_addr: str, max_timeout=None) -> float:
+        """Get the timeout of the destination.
+
+        Args:
+            dest_addr (str): The destination address.
+            max_timeout (float | None): A further upper bound, ex. the timeout given to `ping()`. (default None)
+
+        Returns:
+            float: The timeout in seconds.
+        """
+        with self._lock:
+            entry = self._entries.get(dest_addr)
+            backoff = 1 if entry is None else entry[2]
+            if entry is None or entry[0] is None:
+                entry = self._overall  # Cold start.
+            timeout = self.initial_timeout if entry[0] is None else entry[0] + self.k * entry[1]
+        timeout = min(max(timeout * backoff, self.min_timeout), self.max_timeout)
+        return timeout if max_timeout is None else min(timeout, max_timeout)
+
+    def clear(self) -> None:
+        """Remove all the estimates."""
+        with self._lock:
+            self._entries.clear()
+            self._overall = [None, None, 1]
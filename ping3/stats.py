@@ -0,0 +1,142 @@
+import math
+
+
+class PingStats:
+    """Streaming statistics of pings in constant memory, no delay is kept.
+
+    Min, max, mean and mdev are updated by Welford's algorithm. Percentiles are read from a log-bucketed histogram like HdrHistogram: each power of 2 is split into `SUB_BUCKETS` linear buckets, so percentiles have a relative error below 1/SUB_BUCKETS and only the buckets in use are stored.
+    Statistics of different hosts, threads or processes can be merged by `merge()`, and are picklable.
+
+    Example:
+        >>> stats = ping3.PingStats()
+        >>> for delay in (0.5, 0.7, None, 0.6):
+        ...     stats.add(delay)
+        >>> stats.received, stats.loss, stats.mean
+        (3, 25.0, 0.6)
+    """
+
+    SUB_BUCKETS = 128  # Linear buckets in each power of 2. Relative error of percentiles is below 1/128.
+
+    def __init__(self):
+        self.transmitted = 0
+        self.received = 0
+        self.errors = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared differences from the mean, by Welford's algorithm.
+        self._buckets = {}  # Bucket index -> count.
+
+    def __repr__(self):
+        return "PingStats(transmitted={}, received={}, errors={}, min={}, mean={}, max={}, mdev={})".format(self.transmitted, self.received, self.errors, self.min, self.mean, self.max, self.mdev)
+
+    def add(self, delay) -> None:
+        """Count a ping.
+
+        Args:
+            delay (float | None | False): The delay, None on timeout and False on error, as returned by `ping()`.
+        """
+        self.transmitted += 1
+        if delay is None:
+            return
+        if delay is False:
+            self.errors += 1
+            return
+        self.received += 1
+        if self.min is None or delay < self.min:
+            self.min = delay
+        if self.max is None or delay > self.max:
+            self.max = delay
+        diff = delay - self.mean
+        self.mean += diff / self.received
+        self._m2 += diff * (delay - self.mean)
+        index = self._bucket_index(delay)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def update(self, delays) -> None:
+        """Count many pings, ex. the values of `ping_many()`.
+
+        Args:
+            delays (iterable[float | None | False]): The delays.
+        """
+        for delay in delays:
+            self.add(delay)
+
+    def merge(self, other: "PingStats") -> "PingStats":
+        """Merge the statistics of other pings into this one, ex. of other hosts or processes.
+
+        Args:
+            other (PingStats): The other statistics.
+
+        Returns:
+            PingStats: This statistics.
+        """
+        received = self.received + other.received
+        if other.received:
+            diff = other.mean - self.mean
+            self._m2 += other._m2 + diff * diff * self.received * other.received / received  # Chan's parallel algorithm.
+            self.mean += diff * other.received / received
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            for index, count in other._buckets.items():
+                self._buckets[index] = self._buckets.get(index, 0) + count
+        self.transmitted += other.transmitted
+        self.received = received
+        self.errors += other.errors
+        return self
+
+    @property
+    def mdev(self) -> float:
+        """The mean deviation (population standard deviation) of the delays, same as `ping` on Linux. 0 if none received."""
+        return math.sqrt(self._m2 / self.received) if self.received else 0.0
+
+    @property
+    def loss(self) -> float:
+        """The packet loss in percentage, including errors. 0 if none transmitted."""
+        return (self.transmitted - self.received) / self.transmitted * 100 if self.transmitted else 0.0
+
+    def _bucket_index(self, delay: float) -> int:
+        if delay <= 0:
+            return -(1 << 30)  # All non-positive delays share the lowest bucket.
+        mantissa, exponent = math.frexp(delay)  # delay = mantissa * 2 ** exponent, 0.5 <= mantissa < 1.
+        return exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+
+    def _bucket_value(self, index: int) -> float:
+        if index == -(1 << 30):
+            return 0.0
+        exponent, sub_bucket = divmod(index, self.SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * self.SUB_BUCKETS), exponent)  # The middle of the bucket.
+
+    def percentile(self, percent: float):
+        """Get the delay at the percentile.
+
+        Args:
+            percent (float): The percentile in 0~100. Ex. 99.9
+
+        Returns:
+            float | None: The delay, within the relative error of the histogram and the range of min and max. None if none received.
+        """
+        if not self.received:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.received))  # Nearest-rank method.
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def summary(self, unit: str = "ms") -> str:
+        """Format the statistics like `ping`.
+
+        Args:
+            unit (str): The unit of the delays, only for display. (default "ms")
+
+        Returns:
+            str: The packets line, and the delay lines if any received.
+        """
+        lines = ["{} packets transmitted, {} received, {}{:.1f}% packet loss".format(self.transmitted, self.received, "+{} errors, ".format(self.errors) if self.errors else "", self.loss)]
+        if self.received:
+            lines.append("rtt min/avg/max/mdev = {:.3f}/{:.3f}/{:.3f}/{:.3f} {}".format(self.min, self.mean, self.max, self.mdev, unit))
+            lines.append("rtt p50/p90/p99/p99.9 = {:.3f}/{:.3f}/{:.3f}/{:.3f} {}".format(*(self.percentile(percent) for percent in (50, 90, 99, 99.9)), unit))
+        return "\n".join(lines)
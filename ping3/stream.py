@@ -0,0 +1,133 @@
+import collections
+import time
+
+import ping3
+from . import errors
+
+StreamReply = collections.namedtuple("StreamReply", ["seq", "delay", "duplicate", "reordered"])
+StreamReply.__doc__ = """A result of `ping3.stream()`.
+
+Attributes:
+    seq (int): The ping number in sending order, from 0. The ICMP sequence is `seq & 0xffff`.
+    delay (float | None | False): The delay in seconds/milliseconds, False on error and None on timeout.
+    duplicate (bool): True if the ping is already replied, the delay is of the duplicated reply.
+    reordered (bool): True if a later ping is replied before this one.
+"""
+
+
+def stream(dest_addr: str, count=4, interval: float = 1, timeout: float = 4, window: int = 1024, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "", version=None):
+    """
+    Send pings to destination address on schedule without waiting for the replies, and yield the results as they arrive.
+
+    Many pings are in flight at once, so replies later than `interval` are matched to their ping instead of lost. Out-of-order replies are marked as reordered and repeated replies as duplicate.
+    Sends are scheduled at fixed times from the start, so the interval does not drift.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+        count (int | None): How many pings should be sent. None for infinite, until the generator is closed. (default 4)
+        interval (float): How many seconds between two pings, regardless of the replies. (default 1)
+        timeout (float): Time to wait for each response, in seconds. (default 4)
+        window (int): Max pings in flight. Sending waits for a free slot when full. At most 65536. (default 1024)
+        unit (str): The unit of the delays. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from `dest_addr`. (default None)
+
+    Yields:
+        StreamReply: (seq, delay, duplicate, reordered) in arrival order. Every ping yields once, and once more for each duplicated reply.
+            Errors are reported per ping, `ping3.EXCEPTIONS` does not apply.
+
+    Raises:
+        ValueError: If the window is not in 1~65536.
+        HostUnknown: If destination address is a domain name and cannot resolved.
+    """
+    if not 0 < window <= 0x10000:
+        raise ValueError("Window must be in 1~65536: {}".format(window))
+    if version is None:
+        version = ping3._detect_version(dest_addr)
+    ping3._debug("Stream IPv{}:".format(version), dest_addr)
+    sock_addr = ping3._resolve_sock_addr(dest_addr, version) if ping3.DNS_CACHE is None else ping3.DNS_CACHE.resolve(dest_addr, version)
+    dest_ip = sock_addr[0]  # Resolve once, not for every ping.
+    outstanding = {}  # ICMP seq -> (seq, timer, send_stamp)
+    answered = {}  # ICMP seq -> seq, for detecting duplicates. Entries are replaced when the ICMP seq wraps around.
+    results = collections.deque()
+    state = {"next_seq": 0, "max_replied": -1, "send_timer": None}
+    icmp_id = ping3._new_icmp_id()  # Not the id of the thread, so pings in the loop consuming the stream are not credited to it.
+    recv_buffer = ping3._get_receive_buffer()
+    timestamping = ping3.TIMESTAMPING
+
+    def on_readable(sock):
+        if timestamping:
+            recv_size, kernel_recv, _ = ping3._recv_timestamped(sock, recv_buffer)
+            perf_recv = time.perf_counter()
+        else:
+            recv_size = sock.recv_into(recv_buffer)
+        time_recv = time.time()
+        reply = ping3._parse_reply(sock, recv_buffer, icmp_id, recv_size)
+        if reply is None:
+            return
+        icmp_seq, time_sent, err = reply
+        entry = outstanding.pop(icmp_seq, None)
+        if entry is None:
+            if err is None and icmp_seq in answered:
+                results.append(StreamReply(answered[icmp_seq], ping3._to_unit(time_recv - time_sent, unit), True, False))
+            return  # Otherwise a reply of an expired ping, or of another process.
+        seq, timer, send_stamp = entry
+        reactor.cancel(timer)
+        answered[icmp_seq] = seq
+        reordered = seq < state["max_replied"]
+        state["max_replied"] = max(state["max_replied"], seq)
+        if err is not None:
+            ping3._debug(err)
+            results.append(StreamReply(seq, False, False, reordered))
+        else:
+            delay = time_recv - time_sent if send_stamp is None else ping3._stamped_delay(send_stamp, perf_recv, kernel_recv)
+            results.append(StreamReply(seq, ping3._to_unit(delay, unit), False, reordered))
+        schedule()  # A slot of the window is freed.
+
+    def expire(icmp_seq):
+        seq = outstanding.pop(icmp_seq)[0]
+        ping3._debug(errors.Timeout(timeout=timeout))
+        results.append(StreamReply(seq, None, False, False))
+        schedule()
+
+    def schedule():
+        """Send the pings which are due as the window allows, and set a timer for the next one."""
+        if state["send_timer"] is not None:
+            reactor.cancel(state["send_timer"])
+            state["send_timer"] = None
+        now = time.monotonic()
+        while (count is None or state["next_seq"] < count) and len(outstanding) < window:
+            seq = state["next_seq"]
+            due = start_time + seq * interval  # From the start, so the schedule does not drift.
+            if due > now:
+                state["send_timer"] = reactor.call_at(due, schedule)
+                return
+            icmp_seq = seq & 0xffff
+            answered.pop(icmp_seq, None)
+            try:
+                send_stamp = ping3.send_one_ping(sock=sock, dest_addr=dest_ip, icmp_id=icmp_id, seq=icmp_seq, size=size)
+            except (errors.PingError, OSError) as err:
+                ping3._debug(err)
+                results.append(StreamReply(seq, False, False, False))
+            else:
+                timer = reactor.call_at(time.monotonic() + timeout, lambda icmp_seq=icmp_seq: expire(icmp_seq))
+                outstanding[icmp_seq] = (seq, timer, send_stamp if timestamping else None)
+            state["next_seq"] = seq + 1
+
+    def finished():
+        return results or (not outstanding and count is not None and state["next_seq"] >= count)
+
+    with ping3._create_socket(version, ttl=ttl, interface=interface, src_addr=src_addr, icmp_id=icmp_id) as sock, ping3.Reactor() as reactor:  # A private reactor, not of the thread, so pings in the loop consuming the stream do not run its callbacks and timers while it is suspended.
+        ping3._enlarge_receive_buffer(sock)
+        reactor.register(sock, on_readable)
+        start_time = time.monotonic()
+        schedule()
+        while True:
+            reactor.run_until(finished)
+            if not results:  # All sent and none in flight.
+                return
+            while results:
+                yield results.popleft()
@@ -0,0 +1,241 @@
+import collections
+import ipaddress
+import time
+
+import ping3
+from . import errors
+
+SEND_BURST = 64  # Max pings sent at once before receiving, otherwise a large window overflows the socket receive buffer.
+
+
+class Sweep:
+    """Iterate over the live hosts of an IP network, with a bounded window of pings in flight.
+
+    Addresses are enumerated as integers, so the network is never held in memory and a sweep resumes from its checkpoint without replaying the skipped addresses.
+    Usually created by `ping3.sweep()`.
+
+    Attributes:
+        checkpoint (str | None): The lowest address which is not yet answered or timed out. Every lower address is done, so a new sweep resumes from here by `resume=checkpoint`. None if all done.
+        sent (int): How many pings are sent.
+    """
+
+    def __init__(self, network, concurrency: int = 1024, timeout: float = 1, exclude=(), resume=None, rate=None, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = ""):
+        """
+        Args:
+            network (str | ipaddress.IPv4Network | ipaddress.IPv6Network): The IP network to sweep. Ex. "10.0.0.0/16"/"fd00::/112"
+            concurrency (int): Max pings in flight, in 1~65536. (default 1024)
+            timeout (float): Time to wait for each response, in seconds. (default 1)
+            exclude (iterable[str]): Networks or addresses to skip. Ex. ["10.0.0.0/24", "10.0.1.1"] (default ())
+            resume (str | None): Start from the address, ex. the `checkpoint` of an interrupted sweep. None to start from the first host. (default None)
+            rate (float | None): Max pings per second, paced by `ping3.TokenBucket`. None for no limit. (default None)
+            unit (str): The unit of the delays. "s" for seconds, "ms" for milliseconds. (default "s")
+            src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+            ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+            size (int): The ICMP packet payload size in bytes. (default 56)
+            interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+
+        Raises:
+            ValueError: If the network, the exclusions or the resume address are invalid, or the concurrency is not in 1~65536.
+        """
+        if not 0 < concurrency <= 0x10000:
+            raise ValueError("Concurrency must be in 1~65536: {}".format(concurrency))
+        self.network = ipaddress.ip_network(network, strict=False)
+        self._address_type = type(self.network.network_address)  # IPv4Address or IPv6Address, for converting integers back.
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate = rate
+        self.unit = unit
+        self.options = {"src_addr": src_addr, "ttl": ttl, "interface": interface}
+        self.size = size
+        first, last = int(self.network.network_address), int(self.network.broadcast_address)
+        if self.network.num_addresses > 2:  # Same hosts as `ipaddress` hosts(): without the network address (Subnet-Router anycast for IPv6), and the broadcast address for IPv4.
+            first += 1
+            if self.network.version == 4:
+                last -= 1
+        if resume is not None:
+            first = max(first, int(ipaddress.ip_address(resume)))
+        self._next = first  # The next address to ping, as an integer.
+        self._last = last
+        self._exclude = tuple(exclude)
+        self._excluded = self._merge_ranges(self._exclude)  # Sorted [(first, last)] of the exclusions, as integers.
+        self._in_flight = collections.OrderedDict()  # seq -> (address, timer, time.perf_counter() when sent), in sending order, so also in address order.
+        self._results = collections.deque()  # (address, delay) of the live hosts not yet yielded.
+        self.sent = 0
+
+    def _merge_ranges(self, exclude) -> list:
+        ranges = []
+        for excluded in exclude:
+            excluded = ipaddress.ip_network(excluded, strict=False)
+            if excluded.version == self.network.version:
+                ranges.append((int(excluded.network_address), int(excluded.broadcast_address)))
+        ranges.sort()
+        merged = []
+        for first, last in ranges:
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        merged.reverse()  # Popped from the end as the sweep goes up.
+        return merged
+
+    def _next_address(self):
+        """Get the next address to ping as an integer, skip the exclusions. None if the network is done."""
+        excluded = self._excluded
+        while excluded and excluded[-1][1] < self._next:
+            excluded.pop()
+        if excluded and excluded[-1][0] <= self._next:
+            self._next = excluded.pop()[1] + 1  # Jump over the whole excluded range.
+        if self._next > self._last:
+            return None
+        address = self._next
+        self._next += 1
+        return address
+
+    def _lowest_pending(self) -> int:
+        """The lowest address which is not yielded or timed out yet, as an integer."""
+        lowest = self._next
+        if self._in_flight:
+            lowest = min(lowest, next(iter(self._in_flight.values()))[0])
+        if self._results:
+            lowest = min(lowest, min(address for address, _ in self._results))
+        return lowest
+
+    @property
+    def checkpoint(self):
+        lowest = self._lowest_pending()
+        return None if lowest > self._last else str(self._address_type(lowest))
+
+    def __iter__(self):
+        """Ping the network and yield the live hosts as they respond.
+
+        Yields:
+            tuple: (address, delay) of each live host, in the order of response. Delay is in seconds/milliseconds.
+        """
+        in_flight = self._in_flight
+        results = self._results
+        state = {"send_timer": None, "exhausted": False, "seq": 0}
+        bucket = None if self.rate is None else ping3.TokenBucket(self.rate)
+        icmp_id = ping3._new_icmp_id()  # Not the id of the thread, so pings in the loop consuming the sweep are not credited to it.
+        recv_buffer = ping3._get_receive_buffer()
+
+        def on_readable(sock):
+            while True:  # Drain all the ready replies before sending more.
+                try:
+                    recv_size, src = sock.recvfrom_into(recv_buffer)
+                except (BlockingIOError, InterruptedError):
+                    break
+                time_recv = time.perf_counter()
+                reply = ping3._parse_reply(sock, recv_buffer, icmp_id, recv_size, seqs=in_flight)
+                if reply is None:
+                    continue
+                seq, _, err = reply
+                address, timer, time_sent = in_flight[seq]
+                if err is None and int(ipaddress.ip_address(src[0].partition("%")[0])) != address:  # An echo reply of another host, ex. of a ping by another process with the same id.
+                    continue
+                del in_flight[seq]
+                reactor.cancel(timer)
+                if err is None:
+                    results.append((address, ping3._to_unit(time_recv - time_sent, self.unit)))
+            if state["send_timer"] is None:
+                schedule()  # Slots of the window are freed.
+
+        def expire(seq, address):
+            entry = in_flight.get(seq)
+            if entry is None or entry[0] != address:  # Not the ping the timer was set for.
+                return
+            del in_flight[seq]
+            if state["send_timer"] is None:
+                schedule()
+
+        def schedule():
+            """Send pings as the window and the rate allow."""
+            if state["send_timer"] is not None:
+                reactor.cancel(state["send_timer"])
+                state["send_timer"] = None
+            burst = SEND_BURST
+            while not state["exhausted"] and len(in_flight) < self.concurrency:
+                if burst == 0:  # Receive the ready replies first, then continue sending.
+                    state["send_timer"] = reactor.call_at(time.monotonic(), schedule)
+                    return
+                burst -= 1
+                wait = 0.0 if bucket is None else bucket.consume()
+                if wait > 0:
+                    state["send_timer"] = reactor.call_at(time.monotonic() + wait, schedule)
+                    return
+                address = self._next_address()
+                if address is None:
+                    state["exhausted"] = True
+                    return
+                seq = state["seq"]
+                while seq in in_flight:  # A ping of the seq is still waiting for its timeout after the sequences wrapped around. A free seq exists, since the window is not larger than the sequences.
+                    seq = (seq + 1) & 0xffff
+                state["seq"] = (seq + 1) & 0xffff
+                time_sent = time.perf_counter()
+                try:
+                    ping3.send_one_ping(sock=sock, dest_addr=str(self._address_type(address)), icmp_id=icmp_id, seq=seq, size=self.size)
+                except BlockingIOError:  # The socket send buffer is full, retry after a while.
+                    self._next = address
+                    state["send_timer"] = reactor.call_at(time.monotonic() + 0.001, schedule)
+                    return
+                except (errors.PingError, OSError) as err:  # Ex. the address is not routable.
+                    ping3._debug(err)
+                    self.sent += 1
+                    continue
+                self.sent += 1
+                in_flight[seq] = (address, reactor.call_at(time.monotonic() + self.timeout, lambda seq=seq, address=address: expire(seq, address)), time_sent)
+
+        def ready():
+            return results or (state["exhausted"] and not in_flight)
+
+        with ping3._create_socket(self.network.version, icmp_id=icmp_id, **self.options) as sock, ping3.Reactor() as reactor:  # A private reactor, not of the thread, so pings in the loop consuming the sweep do not run its callbacks and timers while it is suspended.
+            sock.setblocking(False)
+            ping3._enlarge_receive_buffer(sock)
+            reactor.register(sock, on_readable)
+            try:
+                schedule()
+                while True:
+                    reactor.run_until(ready)
+                    if not results:  # All sent and none in flight.
+                        return
+                    while results:
+                        address, delay = results[0]
+                        yield str(self._address_type(address)), delay
+                        results.popleft()  # Only after yielded, so the checkpoint covers it if stopped at the yield.
+            finally:
+                if in_flight or results:  # Stopped early, the pending addresses are pinged again by the next iteration.
+                    self._next = self._lowest_pending()
+                    self._excluded = self._merge_ranges(self._exclude)
+                in_flight.clear()
+                results.clear()
+
+
+def sweep(network, concurrency: int = 1024, timeout: float = 1, exclude=(), resume=None, rate=None, unit: str = "s", src_addr: str = "", ttl=None, size: int = 56, interface: str = "") -> Sweep:
+    """
+    Ping all the hosts of an IP network and yield the live ones as they respond.
+
+    Hosts are enumerated lazily and at most `concurrency` pings are in flight, so a /16 or an IPv6 range costs constant memory.
+    Keep the returned `Sweep` to read its `checkpoint`, which resumes an interrupted sweep.
+
+    Example:
+        >>> hosts = ping3.sweep("10.0.0.0/16", concurrency=4096, timeout=1, exclude=["10.0.255.0/24"])
+        >>> for addr, delay in hosts:
+        ...     print(addr, delay)
+        >>> checkpoint = hosts.checkpoint  # Save it if interrupted, then `ping3.sweep("10.0.0.0/16", resume=checkpoint)`.
+
+    Args:
+        network (str | ipaddress.IPv4Network | ipaddress.IPv6Network): The IP network to sweep. Ex. "10.0.0.0/16"/"fd00::/112"
+        concurrency (int): Max pings in flight, in 1~65536. (default 1024)
+        timeout (float): Time to wait for each response, in seconds. (default 1)
+        exclude (iterable[str]): Networks or addresses to skip. Ex. ["10.0.0.0/24", "10.0.1.1"] (default ())
+        resume (str | None): Start from the address, ex. the `checkpoint` of an interrupted sweep. None to start from the first host. (default None)
+        rate (float | None): Max pings per second. None for no limit. (default None)
+        unit (str): The unit of the delays. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        ttl (int | None): The Time-To-Live of the outgoing packets. None for OS default. (default None)
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+
+    Returns:
+        Sweep: Iterable of (address, delay) of the live hosts. Errors and timeouts are skipped, `ping3.EXCEPTIONS` does not apply.
+    """
+    return Sweep(network, concurrency=concurrency, timeout=timeout, exclude=exclude, resume=resume, rate=rate, unit=unit, src_addr=src_addr, ttl=ttl, size=size, interface=interface)
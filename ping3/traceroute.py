@@ -0,0 +1,99 @@
+import collections
+import time
+
+import ping3
+from . import errors
+
+TracerouteHop = collections.namedtuple("TracerouteHop", ["ttl", "addr", "delays"])
+TracerouteHop.__doc__ = """A hop of `ping3.traceroute()`.
+
+Attributes:
+    ttl (int): The Time-To-Live of the probes, from 1.
+    addr (str | None): The IP address of the router or the destination which replied first. None if no probe is replied.
+    delays (list[float | None | False]): The delay of each probe in seconds/milliseconds, None on timeout and False if the destination is unreachable.
+"""
+
+
+def traceroute(dest_addr: str, max_hops: int = 30, probes: int = 3, timeout: float = 2, unit: str = "s", src_addr: str = "", size: int = 56, interface: str = "", version=None) -> list:
+    """
+    Trace the route to destination address by pinging with increasing Time-To-Live.
+
+    Probes of all the TTLs are sent at once over one socket, so the route is traced in about one `timeout` instead of one per hop.
+    Time Exceeded replies are matched to their probe by the original ICMP header embedded in the reply. Note some routers limit the rate of Time Exceeded replies, then their probes show as timeout.
+
+    Args:
+        dest_addr (str): The destination address, can be an IP address or a domain name. Ex. "192.168.1.1"/"example.com"/"fd00::1"
+        max_hops (int): The max Time-To-Live to probe. (default 30)
+        probes (int): How many probes for each hop. (default 3)
+        timeout (float): Time to wait for the replies, in seconds. All the probes are in flight together. (default 2)
+        unit (str): The unit of the delays. "s" for seconds, "ms" for milliseconds. (default "s")
+        src_addr (str): The IP address to ping from. Ex. "192.168.1.20". (default "")
+        size (int): The ICMP packet payload size in bytes. (default 56)
+        interface (str): LINUX ONLY. The gateway network interface to ping from. Ex. "wlan0". (default "")
+        version (int | None): The IP version to use. 4 for IPv4, 6 for IPv6. If None, detect from `dest_addr`. (default None)
+
+    Returns:
+        list[TracerouteHop]: The hops from TTL 1 to the destination, or to `max_hops` if the destination is not reached.
+            Errors are reported per probe, `ping3.EXCEPTIONS` does not apply.
+
+    Raises:
+        ValueError: If `max_hops * probes` is not in 1~65536.
+        HostUnknown: If destination address is a domain name and cannot resolved.
+    """
+    if not 0 < max_hops * probes <= 0x10000:
+        raise ValueError("Number of probes must be in 1~65536: {}".format(max_hops * probes))
+    if version is None:
+        version = ping3._detect_version(dest_addr)
+    ping3._debug("Traceroute IPv{}:".format(version), dest_addr)
+    sock_addr = ping3._resolve_sock_addr(dest_addr, version) if ping3.DNS_CACHE is None else ping3.DNS_CACHE.resolve(dest_addr, version)
+    dest_ip = sock_addr[0]
+    hops = [TracerouteHop(ttl, None, [None] * probes) for ttl in range(1, max_hops + 1)]
+    in_flight = {}  # seq -> (ttl, probe, time.perf_counter() when sent). seq = (ttl - 1) * probes + probe.
+    state = {"reached": max_hops}  # The lowest TTL replied by the destination.
+    icmp_id = ping3._gen_icmp_id()
+    recv_buffer = ping3._get_receive_buffer()
+    reactor = ping3.get_reactor()
+
+    def on_readable(sock):
+        recv_size, recv_addr = sock.recvfrom_into(recv_buffer)
+        time_recv = time.perf_counter()
+        reply = ping3._parse_reply(sock, recv_buffer, icmp_id, recv_size, seqs=in_flight)
+        if reply is None:
+            return
+        seq, _, err = reply
+        ttl, probe, time_sent = in_flight.pop(seq)  # Time Exceeded has no echoed payload, the send time is kept locally.
+        hop = hops[ttl - 1]
+        if hop.addr is None and recv_addr:
+            hops[ttl - 1] = hop = hop._replace(addr=recv_addr[0])  # The router or the destination which sent the reply.
+        if isinstance(err, (errors.TimeToLiveExpired, errors.TimeExceeded)):
+            hop.delays[probe] = ping3._to_unit(time_recv - time_sent, unit)
+            return
+        if err is not None:
+            ping3._debug(err)
+        hop.delays[probe] = False if err is not None else ping3._to_unit(time_recv - time_sent, unit)
+        state["reached"] = min(state["reached"], ttl)  # Replied or rejected by the destination, the route ends here.
+
+    def done():
+        return not any(ttl <= state["reached"] for ttl, _, _ in in_flight.values())
+
+    with ping3._create_socket(version, interface=interface, src_addr=src_addr, icmp_id=icmp_id) as sock:
+        reactor.register(sock, on_readable)
+        try:
+            for ttl in range(1, max_hops + 1):
+                ping3._set_ttl(sock, ttl)
+                for probe in range(probes):
+                    seq = (ttl - 1) * probes + probe
+                    time_sent = time.perf_counter()
+                    try:
+                        ping3.send_one_ping(sock=sock, dest_addr=dest_ip, icmp_id=icmp_id, seq=seq, size=size)
+                    except (errors.PingError, OSError) as err:
+                        ping3._debug(err)
+                        hops[ttl - 1].delays[probe] = False
+                    else:
+                        in_flight[seq] = (ttl, probe, time_sent)
+                while reactor.run_once(deadline=0):  # Replies of the lower hops may arrive while sending.
+                    pass
+            reactor.run_until(done, deadline=time.monotonic() + timeout)
+        finally:
+            reactor.unregister(sock)
+    return hops[:state["reached"]]
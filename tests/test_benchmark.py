@@ -1,15 +1,156 @@
 import os
 import sys
 import timeit
+import tracemalloc
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import ping3  # noqa: linter (pycodestyle) should not lint this line.
 
 dev_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-stmt = "ping3.ping('127.0.0.1')"
-setup = "import sys; sys.path.insert(0, '{}'); import ping3; print('ping3 version:', ping3.__version__)".format(dev_dir)
-for count in (1, 10, 100, 1000, 5000):
-    print("Testing `{stmt}` {num} times...".format(stmt=stmt, num=count))
-    duration = timeit.timeit(stmt, setup=setup, number=count)
-    print("Duration: {drtn:.3f} seconds. {d:.1f} ms/ping".format(drtn=duration, d=duration * 1000 / count))
+setup = "import sys; sys.path.insert(0, '{}'); import ping3".format(dev_dir)
+
+
+def benchmark(stmt, setup=setup, counts=(1, 10, 100, 1000, 5000)):
+    for count in counts:
+        print("Testing `{stmt}` {num} times...".format(stmt=stmt, num=count))
+        duration = timeit.timeit(stmt, setup=setup, number=count)
+        print("Duration: {drtn:.3f} seconds. {d:.2f} us/call".format(drtn=duration, d=duration * 1000000 / count))
+        print()
+
+
+def benchmark_ping():
+    benchmark("ping3.ping('127.0.0.1')")
+
+
+def benchmark_pinger():
+    benchmark("pinger.ping('127.0.0.1')", setup=setup + "; pinger = ping3.Pinger()")
+
+
+def benchmark_ping_many():
+    hosts = ["127.0.0.{}".format(i) for i in range(1, 101)]
+    benchmark("[ping3.ping(host) for host in hosts]", setup=setup + "; hosts = {}".format(hosts), counts=(1, 10, 100))
+    benchmark("ping3.ping_many(hosts)", setup=setup + "; hosts = {}".format(hosts), counts=(1, 10, 100))
+
+
+def benchmark_send_one_ping_ipv6():
+    sock_setup = setup + "; sock = ping3._create_socket(6); ping3._enlarge_receive_buffer(sock)"
+    stmt = "ping3.send_one_ping(sock, '::1', icmp_id=1, seq=0, size=56)"
+    print("Without source address cache:")
+    benchmark(stmt, setup=sock_setup + "; ping3.SRC_ADDR_CACHE = None", counts=(1000, 10000))
+    print("With source address cache:")
+    benchmark(stmt, setup=sock_setup, counts=(1000, 10000))
+    print("IPv4 for reference:")
+    benchmark("ping3.send_one_ping(sock, '127.0.0.1', icmp_id=1, seq=0, size=56)", setup=setup + "; sock = ping3._create_socket(4)", counts=(1000, 10000))
+
+
+def benchmark_checksum():
+    legacy = """
+def legacy_checksum(source):
+    result = sum(source[::2]) + (sum(source[1::2]) << 8)
+    while result >= 0x10000:
+        result = sum(divmod(result, 0x10000))
+    return ~result & 0xffff
+"""
+    for size in (8, 64, 512, 1400, 9000, 65536):
+        print("Checksum of {} bytes:".format(size))
+        data_setup = setup + "; data = bytes(range(256)) * {} + bytes({})".format(size // 256, size % 256)
+        benchmark("legacy_checksum(data)", setup=data_setup + "\n" + legacy, counts=(10000,))
+        benchmark("ping3.checksum(data)", setup=data_setup, counts=(10000,))
+
+
+def benchmark_tracing():
+    packet_setup = setup + """
+import struct, logging
+sock = ping3._create_socket(4)
+ip_header = struct.pack(ping3.IPV4_HEADER_FORMAT, 0x45, 0, 84, 1, 0, 64, 1, 0, 0x7f000001, 0x7f000001) if sock.type == ping3.socket.SOCK_RAW else b""
+packet = bytearray(ip_header + ping3.EchoRequestTemplate(ping3.IcmpV4Type.ECHO_REPLY, 1234, 56).pack(7))
+ping3.LOGGER = logging.getLogger("ping3.benchmark")
+ping3.LOGGER.addHandler(logging.NullHandler())
+ping3.LOGGER.propagate = False
+"""
+    stmt = "ping3._parse_reply(sock, packet, 1234, len(packet), seqs=(7,))"
+    print("Tracing disabled:")
+    benchmark(stmt, setup=packet_setup, counts=(100000,))
+    print("Tracing enabled by DEBUG:")
+    benchmark(stmt, setup=packet_setup + "ping3.DEBUG = True", counts=(100000,))
+    print("Tracing enabled by a custom TRACER:")
+    benchmark(stmt, setup=packet_setup + "ping3.TRACER = lambda message: None", counts=(100000,))
+
+
+def benchmark_timestamping():
+    print("Delays echoed in the payload:")
+    benchmark("ping3.ping('127.0.0.1')", counts=(1000,))
+    print("Delays by kernel receive timestamps:")
+    benchmark("ping3.ping('127.0.0.1')", setup=setup + "; ping3.TIMESTAMPING = True", counts=(1000,))
+
+
+def benchmark_sweep():
+    for concurrency in (256, 4096):
+        print("Sweep a /16 with concurrency {}:".format(concurrency))
+        benchmark("sum(1 for _ in ping3.sweep('127.0.0.0/16', concurrency={}))".format(concurrency), counts=(1,))
+
+
+def benchmark_ping_pool():
+    hosts = ["127.0.{}.{}".format(i // 256, i % 256) for i in range(1, 50001)]
+    print("ping_many() in one process:")
+    benchmark("ping3.ping_many(hosts)", setup=setup + "; hosts = {}".format(hosts), counts=(1,))
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        print("ping_pool() with {} processes, {} CPUs:".format(processes, os.cpu_count()))
+        benchmark("ping3.ping_pool(hosts, processes={})".format(processes), setup=setup + "; hosts = {}".format(hosts), counts=(1,))
+
+
+def benchmark_mmsg():
+    hosts = ["127.0.{}.{}".format(i // 256, i % 256) for i in range(1, 20001)]
+    host_setup = setup + "; hosts = {}".format(hosts)
+    print("ping_many() with a syscall per packet:")
+    duration = timeit.timeit("ping3.ping_many(hosts)", setup=host_setup, number=1)
+    print("Duration: {drtn:.3f} seconds. {pps:.0f} pps".format(drtn=duration, pps=len(hosts) / duration))
+    for batch_size in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024):
+        print("ping_many() with sendmmsg/recvmmsg, batch size {}:".format(batch_size))
+        duration = timeit.timeit("ping3.ping_many(hosts)", setup=host_setup + "; ping3.MMSG = True; ping3.MMSG_BATCH_SIZE = {}".format(batch_size), number=1)
+        print("Duration: {drtn:.3f} seconds. {pps:.0f} pps".format(drtn=duration, pps=len(hosts) / duration))
     print()
+
+
+def benchmark_ping_results():
+    count = 1000000
+    for label, stmt in (("list of floats", "results = [0.001 * (i % 1000) for i in range({})]"), ("list of PingResult", "results = [ping3.PingResult(rtt=0.001 * (i % 1000), seq=i & 0xffff, ttl=64, src='127.0.0.1', size=56, status=0) for i in range({})]"), ("PingResults", "results = ping3.PingResults(ping3.PingResult(rtt=0.001 * (i % 1000), seq=i & 0xffff, ttl=64, src='127.0.0.1', size=56, status=0) for i in range({}))")):
+        tracemalloc.start()
+        exec(stmt.format(count), {"ping3": ping3})
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{} pings in {}: peak {:.1f} MB".format(count, label, peak / 1024 / 1024))
+    print()
+
+
+def benchmark_rtt_recorder():
+    log_setup = setup + "; import os, tempfile; path = os.path.join(tempfile.mkdtemp(), 'rtt.log'); recorder = ping3.RttRecorder(path)"
+    print("RttRecorder.record():")
+    benchmark("recorder.record('127.0.0.1', 0.001)", setup=log_setup, counts=(100000,))
+    print("RttLog.window() of the last 1000 records in 1000000:")
+    benchmark("list(log.window(start=1000000 - 1000))", setup=log_setup + "; [recorder.record('127.0.0.1', 0.001, timestamp=i) for i in range(1000000)]; log = ping3.RttLog(path)", counts=(100,))
+
+
+def benchmark_capabilities():
+    sock_setup = setup + "; import os, platform, socket; sock = ping3._create_socket(4); packet = bytes(84)"
+    print("IP header detected by the platform for every packet:")
+    benchmark("sock.family == socket.AF_INET and ((os.name != 'posix') or (platform.system() == 'Darwin') or (sock.type == socket.SOCK_RAW))", setup=sock_setup, counts=(100000,))
+    print("IP header looked up from the cached capabilities:")
+    benchmark("ping3._detect_ip_header(sock, packet)", setup=sock_setup, counts=(100000,))
+
+
+if __name__ == "__main__":
+    print("ping3 version:", ping3.__version__)
+    benchmark_ping()
+    benchmark_pinger()
+    benchmark_ping_many()
+    benchmark_send_one_ping_ipv6()
+    benchmark_checksum()
+    benchmark_tracing()
+    benchmark_timestamping()
+    benchmark_sweep()
+    benchmark_ping_pool()
+    benchmark_mmsg()
+    benchmark_ping_results()
+    benchmark_rtt_recorder()
+    benchmark_capabilities()
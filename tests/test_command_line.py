@@ -4,6 +4,7 @@ import io
 import time
 import unittest
 import socket
+import tempfile
 from unittest.mock import patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -42,7 +43,7 @@ class test_ping3(unittest.TestCase):
     def test_count(self):
         with patch("sys.stdout", new=io.StringIO()) as fake_out:
             command_line.main(["-c", "1", DEST_DOMAIN])
-            self.assertEqual(fake_out.getvalue().count("\n"), 1)
+            self.assertEqual(fake_out.getvalue().count("ping '"), 1)
 
     def test_timeout(self):
         with patch("sys.stdout", new=io.StringIO()) as fake_out:
@@ -105,6 +106,63 @@ class test_ping3(unittest.TestCase):
             command_line.main(["-6", DEST_DOMAIN])
             self.assertRegex(fake_out.getvalue(), r".*[0-9]+ms.*")
 
+    def test_rate(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out:
+            start_time = time.time()
+            command_line.main(["--rate", "100", "-c", "50", "127.0.0.1"])
+            self.assertGreaterEqual(time.time() - start_time, 0.45)  # 49 intervals of 10ms, the first ping is not paced.
+            self.assertIn("50 packets transmitted, 50 received", fake_out.getvalue())
+
+    def test_flood(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out:
+            command_line.main(["--flood", "-c", "0", "--duration", "0.2", "127.0.0.1"])
+            self.assertIn("0.0% packet loss", fake_out.getvalue())
+            self.assertRegex(fake_out.getvalue(), r"time [0-9]+ms, [0-9.]+ pps")
+        with patch("sys.stderr", new=io.StringIO()) as fake_err:
+            with self.assertRaises(SystemExit):
+                command_line.main(["--flood", "-c", "0", "127.0.0.1"])  # Would never stop.
+            self.assertIn("requires --duration", fake_err.getvalue())
+
+    def test_statistics(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out:
+            command_line.main(["-c", "3", "127.0.0.1"])
+            self.assertIn("--- 127.0.0.1 ping statistics ---", fake_out.getvalue())
+            self.assertIn("3 packets transmitted, 3 received, 0.0% packet loss", fake_out.getvalue())
+            self.assertRegex(fake_out.getvalue(), r"rtt min/avg/max/mdev = [0-9.]+/[0-9.]+/[0-9.]+/[0-9.]+ ms")
+            self.assertRegex(fake_out.getvalue(), r"rtt p50/p90/p99/p99\.9 = [0-9./]+ ms")
+
+    def test_alive(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out:
+            command_line.main(["--alive", "-t", "1", "127.0.0.1", UNREACHABLE_IP])
+            self.assertIn("127.0.0.1 is alive", fake_out.getvalue())
+            self.assertIn("{} is down".format(UNREACHABLE_IP), fake_out.getvalue())
+
+    def test_adaptive_timeout(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out, patch("ping3.ADAPTIVE_TIMEOUT"):
+            command_line.main(["--adaptive-timeout", "-c", "2", "-t", "2", "127.0.0.1", UNREACHABLE_IP])
+            self.assertIn("2 packets transmitted, 2 received", fake_out.getvalue())
+            self.assertIsInstance(command_line.ping3.ADAPTIVE_TIMEOUT, command_line.ping3.RttEstimator)
+            self.assertEqual(command_line.ping3.ADAPTIVE_TIMEOUT.max_timeout, 2)
+
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("sys.stdout", new=io.StringIO()), patch("ping3.PING_RESULT"):
+            path = os.path.join(temp_dir, "rtt.log")
+            command_line.main(["--record", path, "--record-capacity", "3", "-c", "2", "-t", "1", "127.0.0.1", UNREACHABLE_IP])
+            with command_line.ping3.RttLog(path) as log:
+                self.assertEqual(log.capacity, 3)
+                self.assertEqual(log.targets, ["127.0.0.1", UNREACHABLE_IP])
+                records = list(log)
+            self.assertEqual([record.target for record in records], ["127.0.0.1", UNREACHABLE_IP, UNREACHABLE_IP])
+            self.assertIsNotNone(records[0].rtt)
+            self.assertLess(records[0].rtt, 1)  # In seconds.
+            self.assertNotEqual(records[1].status, command_line.ping3.PingStatus.REPLIED)
+
+    def test_traceroute(self):
+        with patch("sys.stdout", new=io.StringIO()) as fake_out:
+            command_line.main(["--traceroute", "127.0.0.1"])
+            self.assertIn("traceroute to 127.0.0.1, 30 hops max", fake_out.getvalue())
+            self.assertRegex(fake_out.getvalue(), r" 1  127\.0\.0\.1  [0-9.]+ ms  [0-9.]+ ms  [0-9.]+ ms")
+
     def test_debug(self):
         with patch("sys.stdout", new=io.StringIO()), patch("sys.stderr", new=io.StringIO()) as fake_err:
             command_line.main(["--debug", "-c", "1", DEST_DOMAIN])
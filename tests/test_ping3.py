@@ -5,6 +5,15 @@ import unittest
 import time
 from unittest.mock import patch
 import socket
+import asyncio
+import random
+import struct
+import math
+import threading
+import multiprocessing
+import pickle
+import tempfile
+import contextlib
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import ping3  # noqa: linter (pycodestyle) should not lint this line.
@@ -23,6 +32,20 @@ class test_ping3(unittest.TestCase):
     def tearDown(self):
         pass
 
+    @contextlib.contextmanager
+    def canned_replies(self, replies, after_seq):
+        """Fake the ICMP socket by a socket pair. The replies arrive at once after the ping of `after_seq` is sent, and `_parse_reply()` returns them in order."""
+        sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        parsed = iter(replies)
+
+        def fake_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if seq == after_seq:
+                for _ in replies:
+                    peer.send(b"reply")
+
+        with peer, patch("ping3._create_socket", return_value=sock), patch("ping3._set_ttl"), patch("ping3.send_one_ping", fake_send_one_ping), patch("ping3._parse_reply", lambda *args, **kwargs: next(parsed)):
+            yield
+
     def test_version(self):
         self.assertIsInstance(ping3.__version__, str)
 
@@ -228,11 +251,695 @@ class test_ping3(unittest.TestCase):
             self.assertTrue((end_time - start_time) >= 3)  # time_expect = (count - 1) * interval
             self.assertNotIn("Timeout", fake_out.getvalue())  # Ensure no timeout
 
+    def test_pinger(self):
+        with ping3.Pinger() as pinger:
+            self.assertIsInstance(pinger.ping("127.0.0.1"), float)
+            self.assertIsInstance(pinger.ping("::1"), float)
+
+    def test_pinger_seq(self):
+        with ping3.Pinger(seq=0xfffe) as pinger:
+            pinger.ping("127.0.0.1")
+            self.assertEqual(pinger.seq, 0xffff)
+            pinger.ping("127.0.0.1")
+            self.assertEqual(pinger.seq, 0)  # ICMP sequence wraps around at 16-bit.
+            pinger.ping("127.0.0.1", seq=100)
+            self.assertEqual(pinger.seq, 101)
+
+    def test_pinger_reuse_socket(self):
+        with ping3.Pinger(version=4) as pinger:
+            pinger.ping("127.0.0.1")
+            sock = pinger.get_socket(4)
+            pinger.ping("127.0.0.1")
+            self.assertIs(pinger.get_socket(4), sock)
+        self.assertEqual(sock.fileno(), -1)  # Socket is closed when exiting the context.
+
+    def test_pinger_timeout(self):
+        with ping3.Pinger(timeout=1) as pinger:
+            start_time = time.time()
+            pinger.ping(UNREACHABLE_IP)
+            self.assertLess(time.time() - start_time, 1.1)
+
+    def test_ping_many(self):
+        delays = ping3.ping_many(["127.0.0.1", "::1", NOT_EXIST_DOMAIN])
+        self.assertEqual(list(delays), ["127.0.0.1", "::1", NOT_EXIST_DOMAIN])
+        self.assertIsInstance(delays["127.0.0.1"], float)
+        self.assertIsInstance(delays["::1"], float)
+        self.assertFalse(delays[NOT_EXIST_DOMAIN])
+
+    def test_ping_many_unit(self):
+        delays = ping3.ping_many(["127.0.0.1", "127.0.0.2"], unit="ms")
+        self.assertTrue(all(isinstance(delay, float) for delay in delays.values()))
+
+    def test_ping_many_timeout(self):
+        start_time = time.time()
+        ping3.ping_many([UNREACHABLE_IP, "10.255.255.2", "10.255.255.3"], timeout=1)
+        end_time = time.time()
+        self.assertLess(end_time - start_time, 1.1)  # Shared timeout, not one timeout per destination.
+
+    def test_ping_many_sockets(self):
+        hosts = ["127.{}.{}.{}".format(i >> 16, (i >> 8) & 0xff, i & 0xff) for i in range(1, 0x10000 + 2)]  # One more than the sequences of a socket.
+        create_socket = ping3._create_socket
+        icmp_ids = []
+
+        def recording_create_socket(*args, **kwargs):
+            icmp_ids.append(kwargs["icmp_id"])
+            return create_socket(*args, **kwargs)
+
+        with patch("ping3._create_socket", recording_create_socket):
+            delays = ping3.ping_many(hosts, timeout=2)
+        self.assertEqual(len(set(icmp_ids)), 2)  # The sockets do not share the id.
+        self.assertTrue(all(isinstance(delay, float) for delay in delays.values()))
+
+    def test_async_ping(self):
+        delay = asyncio.run(ping3.async_ping("127.0.0.1"))
+        self.assertIsInstance(delay, float)
+        delay = asyncio.run(ping3.async_ping("::1", unit="ms"))
+        self.assertIsInstance(delay, float)
+
+    def test_async_ping_error(self):
+        delay = asyncio.run(ping3.async_ping(NOT_EXIST_DOMAIN))
+        self.assertFalse(delay)
+
+    def test_async_ping_error_exception(self):
+        with patch("ping3.EXCEPTIONS", True):
+            with self.assertRaises(ping3.errors.HostUnknown):
+                asyncio.run(ping3.async_ping(NOT_EXIST_DOMAIN))
+
+    def test_async_ping_concurrent(self):
+        async def ping_all():
+            return await asyncio.gather(*(ping3.async_ping("127.0.0.{}".format(i)) for i in range(1, 201)))
+
+        delays = asyncio.run(ping_all())
+        self.assertTrue(all(isinstance(delay, float) for delay in delays))
+        self.assertFalse(ping3.aio._sockets)  # Shared sockets are closed when all the pings finished.
+
+    def test_async_ping_many(self):
+        delays = asyncio.run(ping3.async_ping_many(["127.0.0.1", "::1", NOT_EXIST_DOMAIN]))
+        self.assertIsInstance(delays["127.0.0.1"], float)
+        self.assertIsInstance(delays["::1"], float)
+        self.assertFalse(delays[NOT_EXIST_DOMAIN])
+
+    def test_async_ping_sockets(self):
+        send_one_ping = ping3.send_one_ping
+
+        def lossy_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if dest_addr != "127.0.0.2":  # Lost, so its seq 0 stays in flight.
+                return send_one_ping(sock, dest_addr, icmp_id, seq, size)
+
+        async def ping_both():
+            return await asyncio.gather(ping3.async_ping("127.0.0.2", timeout=0.5), ping3.async_ping("127.0.0.1", ttl=64))  # Another socket for the other ttl, also with seq 0.
+
+        with patch("ping3.send_one_ping", lossy_send_one_ping):
+            lost, delay = asyncio.run(ping_both())
+        self.assertIsNone(lost)
+        self.assertIsInstance(delay, float)
+
+    def test_dns_cache(self):
+        with patch("ping3.DNS_CACHE", ping3.DnsCache()) as dns_cache:
+            self.assertIsInstance(ping3.ping("localhost"), float)
+            self.assertIsInstance(ping3.ping("localhost"), float)
+            self.assertEqual((dns_cache.hits, dns_cache.misses), (1, 1))
+            dns_cache.invalidate("localhost")
+            self.assertEqual(len(dns_cache), 0)
+            dns_cache.prefetch(["localhost"])
+            self.assertIsInstance(ping3.ping("localhost"), float)
+            self.assertEqual((dns_cache.hits, dns_cache.misses), (2, 1))  # Prefetch is not a lookup.
+
+    def test_dns_cache_negative(self):
+        with patch("ping3.DNS_CACHE", ping3.DnsCache()) as dns_cache, patch("ping3.EXCEPTIONS", True):
+            for _ in range(2):
+                with self.assertRaises(ping3.errors.HostUnknown):
+                    ping3.ping(NOT_EXIST_DOMAIN)
+            self.assertEqual((dns_cache.hits, dns_cache.misses), (1, 1))
+
+    def test_dns_cache_eviction(self):
+        dns_cache = ping3.DnsCache(ttl=0.1, maxsize=2)
+        dns_cache.prefetch(["127.0.0.1", "127.0.0.2", "127.0.0.3"])
+        self.assertEqual(len(dns_cache), 2)
+        self.assertIsNone(dns_cache.lookup("127.0.0.1", 4))  # Least recently used is evicted.
+        self.assertEqual(dns_cache.lookup("127.0.0.3", 4), ("127.0.0.3", 0))
+        time.sleep(0.1)
+        self.assertIsNone(dns_cache.lookup("127.0.0.3", 4))  # Expired.
+
+    def test_src_addr_cache(self):
+        with patch("ping3.SRC_ADDR_CACHE", ping3.TTLCache()) as src_addr_cache:
+            self.assertIsInstance(ping3.ping("::1"), float)
+            self.assertIsInstance(ping3.ping("::1"), float)
+            self.assertEqual((src_addr_cache.hits, src_addr_cache.misses), (1, 1))
+            self.assertIsInstance(ping3.ping("127.0.0.1"), float)
+            self.assertEqual(len(src_addr_cache), 1)  # IPv6 only.
+        with patch("ping3.SRC_ADDR_CACHE", None):
+            self.assertIsInstance(ping3.ping("::1"), float)
+
+    def test_checksum(self):
+        def legacy_checksum(source):
+            result = sum(source[::2]) + (sum(source[1::2]) << 8)
+            while result >= 0x10000:
+                result = sum(divmod(result, 0x10000))
+            return ~result & 0xffff
+
+        rand = random.Random(0)
+        for size in list(range(20)) + [56, 64, 1399, 1400, 9000, 65535, 65536]:
+            for data in (bytes(size), b"\xff" * size, bytes(rand.randrange(256) for _ in range(size))):
+                self.assertEqual(ping3.checksum(data), legacy_checksum(data))
+                self.assertEqual(ping3.checksum(bytearray(data)), legacy_checksum(data))
+                self.assertEqual(ping3.checksum(memoryview(data)), legacy_checksum(data))
+
+    def test_echo_request_template(self):
+        def legacy_packet(icmp_type, icmp_id, seq, size, time_sent, pseudo_header=b""):  # How `send_one_ping()` built the packet before templates.
+            icmp_header = struct.pack(ping3.ICMP_HEADER_FORMAT, icmp_type, 0, 0, icmp_id, seq)
+            icmp_payload = struct.pack(ping3.ICMP_TIME_FORMAT, time_sent) + ((size - struct.calcsize(ping3.ICMP_TIME_FORMAT)) * "Q").encode()
+            real_checksum = ping3.checksum(pseudo_header + icmp_header + icmp_payload)
+            return struct.pack(ping3.ICMP_HEADER_FORMAT, icmp_type, 0, socket.htons(real_checksum), icmp_id, seq) + icmp_payload
+
+        rand = random.Random(0)
+        for _ in range(2000):
+            icmp_type = rand.choice((ping3.IcmpV4Type.ECHO_REQUEST, ping3.IcmpV6Type.ECHO_REQUEST))
+            icmp_id, seq, size = rand.randrange(0x10000), rand.randrange(0x10000), rand.choice((0, 1, 8, 9, 56, 57, 1400, rand.randrange(2000)))
+            time_sent = rand.choice((0.0, time.time(), rand.uniform(0, 1e10)))
+            pseudo_header = bytes(rand.randrange(256) for _ in range(40)) if icmp_type == ping3.IcmpV6Type.ECHO_REQUEST else b""
+            template = ping3.EchoRequestTemplate(icmp_type, icmp_id, size)
+            for seq in (seq, rand.randrange(0x10000)):  # Reused template.
+                self.assertEqual(template.pack(seq, time_sent, pseudo_header), legacy_packet(icmp_type, icmp_id, seq, size, time_sent, pseudo_header))
+                self.assertEqual(ping3.checksum(pseudo_header + template.pack(seq, time_sent, pseudo_header)), 0)  # Valid checksum.
+
+    def test_read_headers(self):
+        icmp_header = ping3.read_icmp_header(b"\x00" * 20 + struct.pack(ping3.ICMP_HEADER_FORMAT, 0, 0, 1, 2, 3), offset=20)
+        self.assertEqual(icmp_header, {"type": 0, "code": 0, "checksum": 1, "id": 2, "seq": 3})
+        self.assertEqual(icmp_header.seq, 3)
+        ipv4_header = ping3.read_ipv4_header(struct.pack(ping3.IPV4_HEADER_FORMAT, 0x45, 0, 84, 1, 0, 64, 1, 0, 0x7f000001, 0x0a000002))
+        self.assertEqual(ipv4_header["src_addr"], "127.0.0.1")
+        self.assertEqual(ipv4_header.get("dest_addr"), "10.0.0.2")
+        self.assertEqual(dict(ipv4_header)["ttl"], 64)
+        self.assertIsNone(ipv4_header.get("not_exist"))
+        ipv6_header = ping3.read_ipv6_header(struct.pack(ping3.IPV6_HEADER_FORMAT, 0x60000000 | 5 << 20 | 7, 8, 58, 64, socket.inet_pton(socket.AF_INET6, "::1"), socket.inet_pton(socket.AF_INET6, "fe80::1")))
+        self.assertEqual(ipv6_header, {"len": 8, "next_header": 58, "hop_limit": 64, "version": 6, "traffic_class": 5, "flow_label": 7, "src_addr": "::1", "dest_addr": "fe80::1"})
+        err = ping3.errors.DestinationUnreachable(ip_header=ipv4_header, icmp_header=icmp_header)
+        self.assertIn("127.0.0.1", str(err))
+        self.assertEqual(err.icmp_header["seq"], 3)
+
+    def test_parse_reply_buffer(self):
+        with ping3._create_socket(4) as sock:
+            if sock.type != socket.SOCK_RAW:
+                self.skipTest("Received packets have no IP header without privilege.")
+            ip_header = struct.pack(ping3.IPV4_HEADER_FORMAT, 0x45, 0, 84, 1, 0, 64, 1, 0, 0x7f000001, 0x7f000001)
+            packet = ip_header + ping3.EchoRequestTemplate(ping3.IcmpV4Type.ECHO_REPLY, 1234, 56).pack(7, time_sent=1.5)
+            buffer = bytearray(b"\xee" * ping3.RECEIVE_BUFFER_SIZE)  # Garbage after the received bytes.
+            buffer[:len(packet)] = packet
+            self.assertEqual(ping3._parse_reply(sock, buffer, 1234, len(packet)), (7, 1.5, None))
+            self.assertIsNone(ping3._parse_reply(sock, buffer, 1234, len(ip_header) + 4))  # Truncated.
+            self.assertIsNone(ping3._parse_reply(sock, buffer, 4321, len(packet)))  # ICMP ID dismatch.
+
+    def test_reactor(self):
+        with ping3.Reactor() as reactor:
+            fired = []
+            now = time.monotonic()
+            reactor.call_at(now + 0.02, lambda: fired.append(2))
+            reactor.call_at(now + 0.01, lambda: fired.append(1))
+            reactor.cancel(reactor.call_at(now, lambda: fired.append(0)))
+            self.assertTrue(reactor.run_until(lambda: len(fired) == 2, deadline=now + 1))
+            self.assertEqual(fired, [1, 2])  # Fired by deadline, cancelled timer is skipped.
+            self.assertIsNone(reactor.next_deadline())
+            received = []
+            sock, peer = socket.socketpair()
+            with sock, peer:
+                reactor.register(sock, lambda sock: received.append(sock.recv(16)))
+                self.assertFalse(reactor.run_until(lambda: received, deadline=time.monotonic() + 0.01))  # Timeout.
+                peer.send(b"ping")
+                self.assertTrue(reactor.run_until(lambda: received, deadline=time.monotonic() + 1))
+                self.assertEqual(received, [b"ping"])
+                reactor.unregister(sock)
+
+    def test_reactor_per_thread(self):
+        reactor = ping3.get_reactor()
+        self.assertIs(ping3.get_reactor(), reactor)
+        ping3.ping("127.0.0.1")
+        self.assertEqual(len(reactor.selector.get_map()), 0)  # Sockets are unregistered after use.
+        reactors = []
+        thread = threading.Thread(target=lambda: reactors.append(ping3.get_reactor()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(reactors[0], reactor)
+
+    def test_TIMESTAMPING(self):
+        with patch("ping3.TIMESTAMPING", True):
+            delay = ping3.ping("127.0.0.1", unit="ms")
+            self.assertIsInstance(delay, ping3.Delay)
+            self.assertIn(delay.timing, ("kernel", "monotonic"))
+            delays = ping3.ping_many(["127.0.0.1", "::1"])
+            self.assertTrue(all(isinstance(delay, ping3.Delay) for delay in delays.values()))
+            delay = asyncio.run(ping3.async_ping("127.0.0.1"))
+            self.assertIsInstance(delay, ping3.Delay)
+        self.assertIs(type(ping3.ping("127.0.0.1")), float)
+
+    def test_stamped_delay(self):
+        send_stamp = (1000000000, 10.0)
+        self.assertEqual(ping3._stamped_delay(send_stamp, 10.5, 1000001000), 1e-6)
+        self.assertEqual(ping3._stamped_delay(send_stamp, 10.5, 1000001000).timing, "kernel")
+        self.assertEqual(ping3._stamped_delay(send_stamp, 10.5, 999999000).timing, "monotonic")  # Wall clock stepped back.
+        self.assertEqual(ping3._stamped_delay(send_stamp, 10.5), 0.5)
+        self.assertEqual(ping3._to_unit(ping3.Delay(0.5, "monotonic"), "ms").timing, "monotonic")
+
+    def test_flood(self):
+        stats = ping3.flood("127.0.0.1", count=1000)
+        self.assertEqual((stats["sent"], stats["received"], stats["lost"]), (1000, 1000, 0))
+        stats = ping3.flood("127.0.0.1", count=None, rate=1000, duration=0.2)
+        self.assertAlmostEqual(stats["pps"], 1000, delta=100)
+        self.assertEqual(stats["received"], stats["sent"])
+        with self.assertRaises(ValueError):
+            ping3.flood("127.0.0.1", count=None)
+
+    def test_token_bucket(self):
+        now = [0.0]
+        bucket = ping3.TokenBucket(rate=100, burst=2, clock=lambda: now[0])
+        self.assertEqual(bucket.consume(), 0)
+        self.assertAlmostEqual(bucket.consume(), 0.01)  # Wait for the next token.
+        now[0] = 0.025  # Woke up late, the tokens accrued meanwhile are kept up to the burst.
+        self.assertEqual(bucket.consume(), 0)
+        self.assertEqual(bucket.consume(), 0)
+        self.assertAlmostEqual(bucket.consume(), 0.005)
+        with self.assertRaises(ValueError):
+            ping3.TokenBucket(rate=0)
+
+    def test_stream(self):
+        start_time = time.time()
+        replies = list(ping3.stream("127.0.0.1", count=5, interval=0.05))
+        self.assertGreaterEqual(time.time() - start_time, 0.2)  # Sent on schedule.
+        self.assertEqual([reply.seq for reply in replies], [0, 1, 2, 3, 4])
+        self.assertTrue(all(isinstance(reply.delay, float) and not reply.duplicate and not reply.reordered for reply in replies))
+
+    def test_stream_close(self):
+        replies = ping3.stream("127.0.0.1", count=None, interval=0.01)
+        self.assertEqual(next(replies).seq, 0)
+        self.assertIsInstance(ping3.ping("127.0.0.1"), float)
+        self.assertEqual(len(ping3.get_reactor().selector.get_map()), 0)  # The suspended stream is not in the reactor of the thread.
+        self.assertIsNone(ping3.get_reactor().next_deadline())
+        self.assertEqual(next(replies).seq, 1)
+        replies.close()
+
+    def test_stream_reordered_duplicate(self):
+        time_sent = time.time()
+        with self.canned_replies([(2, time_sent, None), (0, time_sent, None), (0, time_sent, None), (1, time_sent, ping3.errors.TimeExceeded())], after_seq=2):  # Replies arrive after all the pings are sent, out of order.
+            replies = list(ping3.stream("127.0.0.1", count=3, interval=0))
+        self.assertEqual([(reply.seq, reply.duplicate, reply.reordered) for reply in replies], [(2, False, False), (0, False, True), (0, True, False), (1, False, True)])
+        self.assertFalse(replies[3].delay)
+
+    def test_stream_foreign_replies(self):
+        send_one_ping = ping3.send_one_ping
+
+        def lossy_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if dest_addr != "127.0.0.2":  # All the pings of the stream are lost.
+                return send_one_ping(sock, dest_addr, icmp_id, seq, size)
+
+        with patch("ping3.send_one_ping", lossy_send_one_ping):
+            replies = []
+            for reply in ping3.stream("127.0.0.2", count=2, interval=0.2, timeout=0.5):
+                if not replies:
+                    self.assertIsInstance(ping3.ping("127.0.0.1", seq=1), float)  # Same seq as the ping of the stream still in flight.
+                replies.append(reply)
+        self.assertEqual([(reply.seq, reply.delay) for reply in replies], [(0, None), (1, None)])
+
+    def test_ping_stats(self):
+        stats = ping3.PingStats()
+        stats.update([0.5, 0.7, None, 0.6, False])
+        self.assertEqual((stats.transmitted, stats.received, stats.errors, stats.loss), (5, 3, 1, 40.0))
+        self.assertEqual((stats.min, stats.max), (0.5, 0.7))
+        self.assertAlmostEqual(stats.mean, 0.6)
+        self.assertAlmostEqual(stats.mdev, math.sqrt(0.02 / 3))
+        self.assertIn("5 packets transmitted, 3 received, +1 errors, 40.0% packet loss", stats.summary())
+        self.assertIsNone(ping3.PingStats().percentile(50))
+
+    def test_ping_stats_percentile(self):
+        delays = [random.expovariate(10) for _ in range(10000)]
+        stats = ping3.PingStats()
+        stats.update(delays)
+        delays.sort()
+        for percent in (50, 90, 99, 99.9):
+            expected = delays[math.ceil(percent / 100 * len(delays)) - 1]
+            self.assertAlmostEqual(stats.percentile(percent), expected, delta=expected / ping3.PingStats.SUB_BUCKETS)
+        self.assertLessEqual(len(stats._buckets), 64 * ping3.PingStats.SUB_BUCKETS)  # Memory is bounded by the range of delays, not the count.
+
+    def test_ping_stats_merge(self):
+        delays = [random.uniform(0.001, 0.1) for _ in range(1000)] + [None] * 10
+        merged = ping3.PingStats()
+        for part in (delays[:300], delays[300:700], delays[700:], []):
+            stats = ping3.PingStats()
+            stats.update(part)
+            merged.merge(stats)
+        total = ping3.PingStats()
+        total.update(delays)
+        self.assertEqual((merged.transmitted, merged.received, merged.min, merged.max), (total.transmitted, total.received, total.min, total.max))
+        self.assertAlmostEqual(merged.mean, total.mean)
+        self.assertAlmostEqual(merged.mdev, total.mdev)
+        self.assertEqual(merged.percentile(99), total.percentile(99))
+
+    def test_verbose_ping_stats(self):
+        with patch("sys.stdout", new=io.StringIO()):
+            stats = ping3.verbose_ping("127.0.0.1", count=3)
+        self.assertEqual((stats.transmitted, stats.received), (3, 3))
+
+    def test_traceroute(self):
+        hops = ping3.traceroute("127.0.0.1")
+        self.assertEqual([(hop.ttl, hop.addr) for hop in hops], [(1, "127.0.0.1")])
+        self.assertTrue(all(isinstance(delay, float) for delay in hops[0].delays))
+
+    def test_traceroute_parallel(self):
+        ttl_expired = ping3.errors.TimeToLiveExpired()
+        with self.canned_replies([(4, None, None), (0, None, ttl_expired), (6, None, None), (5, None, None), (1, None, ttl_expired)], after_seq=5 * 2 - 1):  # seq = (ttl - 1) * probes + probe. Hop 2 is silent, hop 3 is the destination. Replies arrive after the last probe, out of order.
+            start_time = time.time()
+            hops = ping3.traceroute("127.0.0.1", max_hops=5, probes=2, timeout=0.5)
+            self.assertLess(time.time() - start_time, 0.6)  # One timeout for all the hops, waiting for the silent hop 2.
+        self.assertEqual([hop.ttl for hop in hops], [1, 2, 3])
+        self.assertTrue(all(isinstance(delay, float) for delay in hops[0].delays))
+        self.assertEqual(hops[1].delays, [None, None])
+        self.assertTrue(all(isinstance(delay, float) for delay in hops[2].delays))
+
+    def test_sweep(self):
+        hosts = dict(ping3.sweep("127.0.0.0/28", exclude=["127.0.0.4/30", "127.0.0.9", "::1"]))
+        self.assertEqual(sorted(hosts, key=lambda addr: int(addr.split(".")[-1])), ["127.0.0.{}".format(i) for i in (1, 2, 3, 8, 10, 11, 12, 13, 14)])
+        self.assertTrue(all(isinstance(delay, float) for delay in hosts.values()))
+        self.assertEqual([addr for addr, _ in ping3.sweep("::1/128")], ["::1"])
+
+    def test_sweep_window(self):
+        hosts = ping3.sweep("127.0.0.0/22", concurrency=16, timeout=0.5)
+        self.assertEqual(sum(1 for _ in hosts), 1022)  # Every host is replied with a small window.
+        self.assertEqual(hosts.sent, 1022)
+        self.assertIsNone(hosts.checkpoint)
+
+    def test_sweep_resume(self):
+        hosts = ping3.sweep("127.0.0.0/24", concurrency=8)
+        found = set()
+        for addr, _ in hosts:
+            found.add(addr)
+            self.assertEqual(len(ping3.get_reactor().selector.get_map()), 0)  # The suspended sweep is not in the reactor of the thread.
+            self.assertIsNone(ping3.get_reactor().next_deadline())
+            if len(found) == 10:
+                break  # Interrupted.
+        checkpoint = hosts.checkpoint
+        self.assertIsNotNone(checkpoint)
+        found.update(addr for addr, _ in ping3.sweep("127.0.0.0/24", resume=checkpoint))
+        self.assertEqual(len(found), 254)  # Every host is found by the resumed sweep.
+
+    def test_sweep_foreign_replies(self):
+        send_one_ping = ping3.send_one_ping
+
+        def lossy_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if dest_addr != "127.0.0.2":  # Lost, so its seq 1 stays in flight.
+                return send_one_ping(sock, dest_addr, icmp_id, seq, size)
+
+        with patch("ping3.send_one_ping", lossy_send_one_ping):
+            found = []
+            for addr, _ in ping3.sweep("127.0.0.0/29", timeout=0.5):
+                if not found:
+                    ping3.ping("127.0.0.1", seq=1)  # Same seq, not credited to the sweep.
+                found.append(addr)
+        self.assertEqual(sorted(found), ["127.0.0.{}".format(i) for i in (1, 3, 4, 5, 6)])
+
+    def test_sweep_seq_wraparound(self):
+        send_one_ping = ping3.send_one_ping
+        lost = []
+
+        def lossy_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if lost:
+                return send_one_ping(sock, dest_addr, icmp_id, seq, size)
+            lost.append(dest_addr)  # Its seq is still in flight when the sequences wrap around.
+
+        with patch("ping3.send_one_ping", lossy_send_one_ping):
+            hosts = ping3.sweep("127.0.0.0/15", timeout=2)
+            self.assertEqual(sum(1 for _ in hosts), 0x20000 - 3)
+        self.assertEqual(hosts.sent, 0x20000 - 2)
+        self.assertIsNone(hosts.checkpoint)
+
+    @unittest.skipUnless(sys.platform == "linux", "Linux only")
+    def test_BPF_FILTER(self):
+        for version, dest_addr in ((4, "127.0.0.1"), (6, "::1")):
+            with ping3._create_socket(version) as sock, ping3._create_socket(version) as other:
+                if sock.type != socket.SOCK_RAW:
+                    self.skipTest("Unprivileged sockets are filtered by the kernel.")
+                self.assertTrue(ping3._attach_filter(sock, 1234))
+                wakeups = []
+                with ping3.Reactor() as reactor:
+                    reactor.register(sock, lambda sock: wakeups.append(ping3._parse_reply(sock, sock.recv(ping3.RECEIVE_BUFFER_SIZE), 1234)))
+                    for seq in range(10):  # Pings of another process, and their replies.
+                        ping3.send_one_ping(other, dest_addr=dest_addr, icmp_id=4321, seq=seq, size=56)
+                    ping3.send_one_ping(other, dest_addr=dest_addr, icmp_id=1234, seq=7, size=56)
+                    reactor.run_until(lambda: False, deadline=time.monotonic() + 0.2)
+                    reactor.unregister(sock)
+                self.assertEqual([reply[0] for reply in wakeups], [7])  # Only woken up by the reply to our id.
+        with patch("ping3.BPF_FILTER", True):
+            self.assertIsInstance(ping3.ping("127.0.0.1"), float)
+            self.assertTrue(all(isinstance(delay, float) for delay in ping3.ping_many(["127.0.0.1", "::1"]).values()))
+
+    def test_ping_pool(self):
+        hosts = ["127.0.0.{}".format(i) for i in range(1, 255)] + ["::1", UNREACHABLE_IP]
+        stats = ping3.PingStats()
+        results = ping3.ping_pool(hosts + hosts[:10], processes=3, chunk_size=50, timeout=2, unit="ms", stats=stats)
+        self.assertEqual(list(results), hosts)  # Unique, in order.
+        self.assertTrue(all(isinstance(results[host], float) for host in hosts[:-1]))
+        self.assertIn(results[UNREACHABLE_IP], (None, False))
+        self.assertEqual((stats.transmitted, stats.received), (256, 255))  # Statistics of the workers are merged.
+        self.assertEqual(ping3.ping_pool([]), {})
+        with self.assertRaises(ValueError):
+            ping3.ping_pool(hosts, processes=0)
+
+    def test_ping_pool_options(self):
+        dns_cache = ping3.DnsCache()
+        dns_cache.prefetch(["127.0.0.1", NOT_EXIST_DOMAIN])
+        with patch("ping3.MMSG", True), patch("ping3.DNS_CACHE", dns_cache), patch("ping3.TRACER", lambda message: None), patch("multiprocessing.get_start_method", return_value="spawn"):
+            with self.assertWarns(RuntimeWarning):  # A lambda cannot be pickled.
+                config = ping3.pool._get_config()
+            self.assertNotIn("TRACER", config)
+            self.assertIs(config["MMSG"], True)
+            self.assertIs(config["DNS_CACHE"], dns_cache)
+            with patch("multiprocessing.Process", multiprocessing.get_context("spawn").Process), patch("ping3.TRACER", None):
+                results = ping3.ping_pool(["127.0.0.1", "::1", NOT_EXIST_DOMAIN], processes=2, timeout=2)
+        self.assertIsInstance(results["127.0.0.1"], float)
+        self.assertIsInstance(results["::1"], float)
+        self.assertIs(results[NOT_EXIST_DOMAIN], False)
+        copied = pickle.loads(pickle.dumps(dns_cache))
+        self.assertEqual(copied.lookup("127.0.0.1", 4), dns_cache.lookup("127.0.0.1", 4))
+        self.assertIsNone(copied.lookup(NOT_EXIST_DOMAIN, 4))  # Unknown hosts are resolved again.
+        copied.set("key", "value")  # With a new lock.
+
+    @unittest.skipUnless(sys.platform == "linux", "Linux only")
+    def test_MMSG(self):
+        if not ping3.mmsg.available():
+            self.skipTest("sendmmsg/recvmmsg not available.")
+        hosts = ["127.0.0.{}".format(i) for i in range(1, 255)] + ["::1", "255.255.255.255", "not.exist.com"]
+        with patch("ping3.MMSG", True), patch("ping3.MMSG_BATCH_SIZE", 16):
+            results = ping3.ping_many(hosts, timeout=2)
+        self.assertTrue(all(isinstance(results[host], float) for host in hosts[:-2]))
+        self.assertIs(results["255.255.255.255"], False)  # Failed to send, the rest of the batch is still sent.
+        self.assertIs(results["not.exist.com"], False)
+        with ping3._create_socket(4) as sock:
+            self.assertEqual(ping3.mmsg.send_batch(sock, [], []), [])
+            self.assertEqual(ping3.mmsg.ReceiveBatch(4).receive(sock), [])  # Nothing ready, not blocked.
+
+    def test_rtt_estimator(self):
+        estimator = ping3.RttEstimator(maxsize=2, min_timeout=0.01, max_timeout=4, initial_timeout=1)
+        self.assertEqual(estimator.timeout("10.0.0.1"), 1)  # Cold start before any reply.
+        estimator.update("10.0.0.1", 0.1)
+        self.assertEqual(estimator.get("10.0.0.1"), (0.1, 0.05))  # RFC 6298 (2.2).
+        self.assertAlmostEqual(estimator.timeout("10.0.0.1"), 0.3)  # SRTT + 4 * RTTVAR.
+        estimator.update("10.0.0.1", 0.2)
+        srtt, rttvar = estimator.get("10.0.0.1")
+        self.assertAlmostEqual(rttvar, 0.75 * 0.05 + 0.25 * 0.1)  # RFC 6298 (2.3).
+        self.assertAlmostEqual(srtt, 0.875 * 0.1 + 0.125 * 0.2)
+        self.assertAlmostEqual(estimator.timeout("10.0.0.2"), estimator.timeout("10.0.0.1"), delta=0.1)  # Unknown hosts start from the overall estimate.
+        estimator.timed_out("10.0.0.2")
+        self.assertAlmostEqual(estimator.timeout("10.0.0.2"), 2 * estimator.timeout("10.0.0.1"))  # Backed off.
+        for _ in range(10):
+            estimator.timed_out("10.0.0.2")
+        self.assertEqual(estimator.timeout("10.0.0.2"), 4)  # Clamped.
+        self.assertEqual(estimator.timeout("10.0.0.2", max_timeout=2), 2)
+        estimator.update("10.0.0.3", 0.0001)
+        self.assertEqual(len(estimator), 2)  # The least recently used is evicted.
+        self.assertIsNone(estimator.get("10.0.0.1"))
+        self.assertEqual(estimator.timeout("10.0.0.3"), 0.01)
+
+    def test_ADAPTIVE_TIMEOUT(self):
+        latencies = {"10.0.0.{}".format(i): None if i % 4 == 0 else 0.0002 * i for i in range(1, 101)}  # Simulated latency source, every 4th host is down.
+        clock = {"elapsed": 0.0, "dest_addr": None}
+
+        def fake_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            clock["dest_addr"] = dest_addr
+
+        def fake_receive_one_ping(sock, icmp_id, seq, timeout, send_stamp=None, reply=None):
+            latency = latencies[clock["dest_addr"]]
+            if latency is None or latency > timeout:
+                clock["elapsed"] += timeout
+                raise ping3.errors.Timeout(timeout=timeout)
+            clock["elapsed"] += latency
+            return latency
+
+        def sweep():
+            clock["elapsed"] = 0.0
+            delays = [ping3.ping(host, timeout=4) for host in latencies]
+            return clock["elapsed"], sum(delay is not None for delay in delays)
+
+        with patch("ping3.send_one_ping", fake_send_one_ping), patch("ping3.receive_one_ping", fake_receive_one_ping):
+            fixed, replied = sweep()
+            self.assertEqual(replied, 75)
+            self.assertGreater(fixed, 25 * 4)  # Every dead host takes the full timeout.
+            with patch("ping3.ADAPTIVE_TIMEOUT", ping3.RttEstimator()):
+                adaptive, replied = sweep()
+                self.assertEqual(replied, 75)  # No live host is timed out.
+                self.assertLess(adaptive, fixed / 10)
+                with patch("sys.stdout", new=io.StringIO()) as fake_out:
+                    ping3.verbose_ping("10.0.0.4", count=2, timeout=4)
+                    self.assertEqual(fake_out.getvalue().count("Timeout > 0."), 2)  # The adapted timeout is shown, not the given 4s.
+            with patch("ping3.ADAPTIVE_TIMEOUT", ping3.RttEstimator(initial_timeout=8, max_timeout=10)), patch("sys.stdout", new=io.StringIO()) as fake_out:
+                ping3.verbose_ping("10.0.0.4", count=1)
+                self.assertIn("Timeout > 4s", fake_out.getvalue())  # Bounded by the default timeout of ping().
+
+    def test_is_alive(self):
+        self.assertTrue(ping3.is_alive("127.0.0.1"))
+        self.assertTrue(ping3.is_alive("::1", probes=1))
+        self.assertFalse(ping3.is_alive(NOT_EXIST_DOMAIN))
+        start_time = time.monotonic()
+        self.assertFalse(ping3.is_alive(UNREACHABLE_IP, probes=3, timeout=1))
+        self.assertLess(time.monotonic() - start_time, 1.5)  # One timeout for all the probes.
+        send_one_ping = ping3.send_one_ping
+
+        def lossy_send_one_ping(sock, dest_addr, icmp_id, seq, size):
+            if seq < 2:  # The first 2 probes are lost.
+                return None
+            return send_one_ping(sock, dest_addr, icmp_id, seq, size)
+
+        with patch("ping3.send_one_ping", lossy_send_one_ping):
+            start_time = time.monotonic()
+            self.assertTrue(ping3.is_alive("127.0.0.1", probes=3, timeout=1))
+            self.assertLess(time.monotonic() - start_time, 0.5)  # Returned on the reply of the 3rd probe.
+        with self.assertRaises(ValueError):
+            ping3.is_alive("127.0.0.1", probes=0)
+
+    def test_PING_RESULT(self):
+        with patch("ping3.PING_RESULT", True):
+            result = ping3.ping("127.0.0.1", seq=5, size=100, unit="ms")
+            self.assertIsInstance(result, ping3.PingResult)
+            self.assertTrue(result)
+            self.assertEqual(result.status, ping3.PingStatus.REPLIED)
+            self.assertEqual((result.seq, result.src, result.size), (5, "127.0.0.1", 100))
+            self.assertIsInstance(result.rtt, float)
+            self.assertEqual(result.delay, result.rtt)
+            self.assertEqual(ping3.ping("::1").src, "::1")
+            result = ping3.ping(NOT_EXIST_DOMAIN)
+            self.assertFalse(result)
+            self.assertEqual(result.status, ping3.PingStatus.HOST_UNKNOWN)
+            self.assertIs(result.delay, False)
+            with patch("ping3.receive_one_ping", side_effect=ping3.errors.Timeout(timeout=1)):
+                result = ping3.ping("127.0.0.1")
+            self.assertEqual((result.status, result.rtt, result.src), (ping3.PingStatus.TIMEOUT, None, None))
+            self.assertIsNone(result.delay)
+            with ping3.Pinger() as pinger:
+                self.assertEqual(pinger.ping("127.0.0.1").seq, 0)
+                self.assertEqual(pinger.ping("127.0.0.1").seq, 1)
+            with patch("sys.stdout", new=io.StringIO()):
+                stats = ping3.verbose_ping("127.0.0.1", count=2)
+            self.assertEqual(stats.received, 2)
+        self.assertIs(type(ping3.ping("127.0.0.1")), float)
+
+    def test_ping_results(self):
+        self.assertFalse(hasattr(ping3.PingResult(), "__dict__"))
+        results = ping3.PingResults()
+        results.append(ping3.PingResult(rtt=0.5, seq=0, ttl=64, src="192.168.1.1", size=56, status=ping3.PingStatus.REPLIED))
+        results.append(ping3.PingResult(seq=1))
+        results.extend([ping3.PingResult(seq=2, ttl=63, src="10.0.0.1", size=84, status=ping3.PingStatus.UNREACHABLE), ping3.PingResult(rtt=0.7, seq=3, ttl=64, src="192.168.1.1", size=56, status=ping3.PingStatus.REPLIED)])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0], ping3.PingResult(rtt=0.5, seq=0, ttl=64, src="192.168.1.1", size=56, status=ping3.PingStatus.REPLIED))
+        self.assertEqual(results[1], ping3.PingResult(seq=1))
+        self.assertEqual(results[-2].status, ping3.PingStatus.UNREACHABLE)
+        self.assertEqual(results[-2].src, "10.0.0.1")
+        with self.assertRaises(IndexError):
+            results[4]
+        self.assertEqual([result.seq for result in results], [0, 1, 2, 3])
+        self.assertTrue(math.isnan(results.rtts[1]))
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(results.count(ping3.PingStatus.TIMEOUT), 1)
+        stats = results.stats()
+        self.assertEqual((stats.transmitted, stats.received, stats.errors), (4, 2, 1))
+        self.assertAlmostEqual(stats.mean, 0.6)
+        self.assertIn("4 packets transmitted, 2 received", results.summary())
+
+    def test_rtt_recorder(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "rtt.log")
+            with ping3.RttRecorder(path, capacity=4) as recorder:
+                recorder.record("a", 0.5, timestamp=100)
+                recorder.record("b", None, timestamp=101)
+                recorder.record("a", 700, unit="ms", timestamp=102)
+                self.assertEqual(len(recorder), 3)
+            size = os.path.getsize(path)
+            with ping3.RttRecorder(path, capacity=100) as recorder:  # Appended with its own capacity.
+                self.assertEqual(recorder.capacity, 4)
+                recorder.record("b", False, timestamp=103)
+                recorder.record("a", ping3.PingResult(rtt=0.9, status=ping3.PingStatus.REPLIED), timestamp=104)  # Overwrites the oldest.
+                recorder.record("c", ping3.PingResult(status=ping3.PingStatus.UNREACHABLE), timestamp=105)
+                with ping3.RttLog(path) as log:  # Read while recording.
+                    self.assertEqual(len(log), 4)
+                    self.assertEqual(log.targets, ["a", "b", "c"])
+                    self.assertEqual([record.timestamp for record in log], [102, 103, 104, 105])
+                    self.assertEqual(list(log.window(start=103, end=105)), [ping3.RttRecord(103, "b", None, ping3.PingStatus.ERROR), ping3.RttRecord(104, "a", 0.9, ping3.PingStatus.REPLIED)])
+                    self.assertEqual([record.rtt for record in log.window(start=102.5, target="a")], [0.9])
+                    self.assertAlmostEqual(next(log.window(start=0)).rtt, 0.7)
+                    self.assertEqual(list(log.window(start=106)), [])
+                    self.assertEqual(list(log.window(target="d")), [])
+                    recorder.record("a", 1.0, timestamp=106)
+                    self.assertEqual([record.timestamp for record in log.window(start=105)], [105, 106])
+            self.assertEqual(os.path.getsize(path), size)  # Bounded.
+            with ping3.RttRecorder(path) as recorder:
+                with self.assertRaises(ValueError):
+                    recorder.record("x" * 5000, 0.1)
+            with open(path, "r+b") as file:
+                file.write(b"NOTALOG!")
+            with self.assertRaises(ValueError):
+                ping3.RttLog(path)
+            with self.assertRaises(ValueError):
+                ping3.RttRecorder(path)
+
+    def test_capabilities(self):
+        caps = ping3.capabilities()
+        self.assertIs(ping3.capabilities(), caps)  # Probed once.
+        self.assertIn(caps.socket_type[4], (socket.SOCK_RAW, socket.SOCK_DGRAM))
+        self.assertIsInstance(caps.bind_to_device, bool)
+        for version in (4, 6):
+            self.assertEqual(caps.id_rewritten[version], caps.socket_type[version] == socket.SOCK_DGRAM and not caps.ip_header[version])
+        with ping3._create_socket(4) as sock:
+            self.assertEqual(sock.type, caps.socket_type[4])
+            self.assertEqual(ping3._detect_ip_header(sock, bytes(28)), caps.ip_header[4])
+            self.assertEqual(ping3._id_rewritten(sock, True), caps.id_rewritten[4])
+        real_socket = socket.socket
+
+        def unprivileged_socket(family=-1, type=-1, proto=-1, fileno=None):
+            if type == socket.SOCK_RAW:
+                raise PermissionError(1, "Operation not permitted")
+            return real_socket(family, type, proto, fileno)
+
+        try:
+            with patch("socket.socket", unprivileged_socket):
+                caps = ping3.capabilities(refresh=True)
+                self.assertNotEqual(caps.socket_type[4], socket.SOCK_RAW)
+                self.assertFalse(caps.ip_header[4] and sys.platform == "linux")
+        finally:
+            caps = ping3.capabilities(refresh=True)
+        self.assertIs(ping3.capabilities(), caps)
+
     def test_DEBUG(self):
         with patch("ping3.DEBUG", True), patch("sys.stderr", new=io.StringIO()):
             ping3.ping(DEST_DOMAIN)
             self.assertIsNotNone(ping3.LOGGER)
 
+    def test_TRACER(self):
+        messages = []
+        with patch("ping3.TRACER", messages.append), patch("ping3.LOGGER", None):
+            ping3.ping("127.0.0.1")
+            self.assertIn("Function called: ping(127.0.0.1)", messages)
+            self.assertIsNone(ping3.LOGGER)  # TRACER works without DEBUG.
+        messages.clear()
+        ping3.ping("127.0.0.1")
+        self.assertEqual(messages, [])
+
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2, exit=False)